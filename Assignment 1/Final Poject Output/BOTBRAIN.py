@@ -2,113 +2,37 @@
 
 
 
-import collections
-import heapq
-import math
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from campusnav import INF, search
+from campusnav.graph import as_number
+from campusnav.buildings import BuildingOverlay
+from campusnav.campus_map import load_map
+from campusnav.landmarks import build_landmarks
+from campusnav.names import LocationIndex
 
 # ====================================================================
 # 1. CAMPUS ENVIRONMENT MODELING (UPDATED)
 # =====================================================================
 
-# Graph representation of the campus where keys are buildings (nodes)
-# and values are a list of tuples (neighbor, distance, speed_factor).
-# Speed factor is a multiplier for walking speed. E.g., 0.8 for slower paths.
-campus_graph = {
-    'Entry Gate': [('Security Gate', 180, 1.0)],
-    'Exit Gate': [('Security Gate', 180, 1.0), ('Hostel Building 1', 400, 1.0)],
-    'Security Gate': [('Entry Gate', 180, 1.0), ('Exit Gate', 180, 1.0), ('Flag Post', 50, 1.0)],
-    'Flag Post': [('Security Gate', 50, 1.0), ('Academic Block 1 Entrance', 210, 1.0)], # 90m + 120m combined
-    
-    # NEW INTERNAL NODES FOR ACADEMIC BLOCK 1
-    'Academic Block 1 Entrance': [
-        ('Flag Post', 210, 1.0), 
-        ('Lawn Area', 140, 1.0), 
-        ('Library', 0, 1.0), 
-        ('Auditorium', 0, 1.0), 
-        ('Admissions', 50, 1.0), 
-        ('Registrar Office', 60, 1.0), 
-        ('Cafeteria', 10, 1.0)
-    ],
-    # --- UPDATED: New direct connections from Auditorium ---
-    'Library': [
-        ('Academic Block 1 Entrance', 0, 1.0),
-        ('Auditorium', 15, 1.0)  # NEW: Direct connection to Auditorium
-    ],
-    'Auditorium': [
-        ('Academic Block 1 Entrance', 0, 1.0),
-        ('Library', 15, 1.0),    # NEW: Direct connection to Library
-        ('Cafeteria', 20, 1.0)   # NEW: Direct connection to Cafeteria
-    ],
-    'Admissions': [('Academic Block 1 Entrance', 50, 1.0)],
-    'Registrar Office': [
-        ('Academic Block 1 Entrance', 60, 1.0), 
-        ('Finance Dept', 10, 1.0)
-    ],
-    'Finance Dept': [
-        ('Registrar Office', 10, 1.0),
-        ('Academic Block 1 Entrance', 70, 1.0) # Calculated distance
-    ],
-    'Cafeteria': [
-        ('Academic Block 1 Entrance', 10, 1.0), 
-        ('Academic Block 2', 50, 1.0),
-        ('Auditorium', 20, 1.0)  # NEW: Direct connection to Auditorium
-    ],
-
-    # REMAINING EXTERNAL NODES
-    'Lawn Area': [('Academic Block 1 Entrance', 140, 1.0), ('Academic Block 2', 140, 1.0)],
-    'Academic Block 2': [('Lawn Area', 140, 1.0), ('Cafeteria', 50, 1.0), ('Food Court', 240, 1.0), ('Hostel Building 2', 50, 1.0)],
-    'Hostel Building 2': [('Academic Block 2', 50, 1.0), ('Hostel Building 1', 240, 1.0), ('Food Court', 50, 1.0)],
-    'Food Court': [('Academic Block 2', 240, 1.0), ('Cricket Ground', 40, 1.0), ('Hostel Building 1', 120, 1.0)], # 50m + 70m combined
-    'Hostel Building 1': [('Hostel Building 2', 240, 1.0), ('Food Court', 120, 1.0), ('Exit Gate', 400, 1.0)],
-    'Cricket Ground': [('Food Court', 40, 1.0)]
-}
-
-# Heuristic data for A* Search (coordinates for Euclidean distance).
-# These are relative coordinates on an imaginary grid representing the map.
-# --- UPDATED: Added new coordinates to improve A* accuracy ---
-building_coords = {
-    'Entry Gate': (0, 0),
-    'Exit Gate': (360, 0),
-    'Security Gate': (180, 0),
-    'Flag Post': (180, 50),
-    'Academic Block 1 Entrance': (180, 260),
-    'Library': (170, 260), # Shifted slightly to reflect new connection
-    'Auditorium': (180, 260), # Shifted slightly to be between Library and Cafeteria
-    'Admissions': (180, 310),
-    'Registrar Office': (180, 320),
-    'Finance Dept': (190, 320),
-    'Cafeteria': (190, 260), # Shifted slightly to reflect new connection
-    'Lawn Area': (180, 400),
-    'Academic Block 2': (180, 540),
-    'Food Court': (420, 540),
-    'Cricket Ground': (420, 580),
-    'Hostel Building 1': (660, 700),
-    'Hostel Building 2': (230, 600)
-}
+# The campus map (locations, corridors with distance and speed_factor,
+# coordinates and info texts) is read from campus_map.json, the same file
+# the web backend uses. Each corridor is (neighbor, distance, speed_factor);
+# speed factor is a multiplier for walking speed, e.g. 0.8 for slower paths.
+CAMPUS_MAP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'campus_map.json')
+campus_map = load_map(CAMPUS_MAP_PATH)
+building_coords, building_info = campus_map.coords, campus_map.info
 
-# Building Information (for display)
-building_info = {
-    'Entry Gate': "Main Entry Gate (A).",
-    'Exit Gate': "Main Exit Gate (B).",
-    'Security Gate': "Security Gate (C), central checkpoint.",
-    'Flag Post': "Campus Flag Post (D).",
-    'Academic Block 1 Entrance': (
-        "Main Entrance to Academic Block 1. This building is multi-story with lifts on both sides. "
-        "The following internal locations can be found here."
-    ),
-    'Library': "Located in Academic Block 1 on the right side. It has a direct connection to the Auditorium.",
-    'Auditorium': "Located in Academic Block 1 on the underground (UG) floor. It has direct exits to both the Library and the Cafeteria.",
-    'Admissions': "Located in Academic Block 1 on the 1st floor, 50m from the entrance.",
-    'Registrar Office': "Located in Academic Block 1 on the 3rd floor, 60m from the entrance.",
-    'Finance Dept': "Located in Academic Block 1 on the 3rd floor, 10m from the Registrar Office.",
-    'Cafeteria': "Located in Academic Block 1 on the lower ground (LG) floor. This exit provides the internal connection to Academic Block 2 and the Auditorium.",
-    'Academic Block 2': "Academic Block 2 is a central hub in the upper part of the campus. It is connected to Academic Block 1 via the Cafeteria exit.",
-    'Lawn Area': "Open Lawn Area (E).",
-    'Hostel Building 2': "Hostel Building 2 (F).",
-    'Food Court': "Campus Food Court (G).",
-    'Hostel Building 1': "Hostel Building 1 (H).",
-    'Cricket Ground': "Cricket Ground (I).",
-}
+# Typed names are matched ignoring case and punctuation, against aliases from
+# the map file, and with small typos corrected (see campusnav/names.py).
+location_index = LocationIndex.from_store(campus_map)
 
 # Constants
 WALKING_SPEED_MPS = 1.4  # meters per second (approx. 5 km/h)
@@ -122,106 +46,103 @@ def calculate_time(distance):
 # 2. SEARCH ALGORITHM IMPLEMENTATIONS
 # ====================================================================
 
+# The searches run on the compiled, integer-ID graph of the campus map.
+compiled_graph = campus_map.graph
+
+# Progress messages ("Starting BFS...") are for the interactive bot; batch
+# mode turns them off.
+VERBOSE = True
+
+def announce(message):
+    if VERBOSE:
+        print(message)
+
 def bfs(start, goal):
     """Breadth-First Search implementation."""
-    print("Starting BFS...")
-    queue = collections.deque([(start, [start], 0)])
-    visited = {start}
-    nodes_explored = 0
-
-    while queue:
-        nodes_explored += 1
-        current_node, path, distance = queue.popleft()
-        if current_node == goal:
-            return path, distance, nodes_explored
-        for neighbor, edge_dist, _ in campus_graph.get(current_node, []):
-            if neighbor not in visited:
-                visited.add(neighbor)
-                new_path = path + [neighbor]
-                new_distance = distance + edge_dist
-                queue.append((neighbor, new_path, new_distance))
-    return None, 0, nodes_explored
+    announce("Starting BFS...")
+    return compiled_graph.run(search.bfs, start, goal)
 
 def dfs(start, goal):
     """Depth-First Search implementation."""
-    print("Starting DFS...")
-    stack = [(start, [start], 0)]
-    visited = set()
-    nodes_explored = 0
-    while stack:
-        nodes_explored += 1
-        current_node, path, distance = stack.pop()
-        if current_node in visited:
-            continue
-        visited.add(current_node)
-        if current_node == goal:
-            return path, distance, nodes_explored
-        for neighbor, edge_dist, _ in reversed(campus_graph.get(current_node, [])):
-            if neighbor not in visited:
-                new_path = path + [neighbor]
-                new_distance = distance + edge_dist
-                stack.append((neighbor, new_path, new_distance))
-    return None, 0, nodes_explored
+    announce("Starting DFS...")
+    return compiled_graph.run(search.dfs, start, goal)
+
+# Depth limit (in corridors) for the depth-limited and iterative deepening DFS options.
+DEPTH_LIMIT = 8
+
+def depth_limited(start, goal):
+    """Depth-limited DFS implementation (paths of at most DEPTH_LIMIT corridors)."""
+    announce(f"Starting Depth-Limited DFS (limit {DEPTH_LIMIT})...")
+    return compiled_graph.run(search.depth_limited_dfs, start, goal, max_depth=DEPTH_LIMIT)
+
+def iddfs(start, goal):
+    """Iterative Deepening DFS implementation."""
+    announce(f"Starting Iterative Deepening DFS (limit {DEPTH_LIMIT})...")
+    return compiled_graph.run(search.iddfs, start, goal, max_depth=DEPTH_LIMIT)
+
+# Indoor locations of buildings a route only passes by are skipped using
+# precomputed entrance-to-entrance walks (see campusnav/buildings.py).
+building_overlay = BuildingOverlay.from_store(campus_map)
 
 def ucs(start, goal):
     """Uniform Cost Search implementation."""
-    print("Starting UCS...")
-    priority_queue = [(0, start, [start])]
-    visited_costs = {start: 0}
-    nodes_explored = 0
-    while priority_queue:
-        nodes_explored += 1
-        cost, current_node, path = heapq.heappop(priority_queue)
-        if current_node == goal:
-            return path, cost, nodes_explored
-        for neighbor, edge_dist, _ in campus_graph.get(current_node, []):
-            new_cost = cost + edge_dist
-            if neighbor not in visited_costs or new_cost < visited_costs[neighbor]:
-                visited_costs[neighbor] = new_cost
-                new_path = path + [neighbor]
-                heapq.heappush(priority_queue, (new_cost, neighbor, new_path))
-    return None, 0, nodes_explored
+    announce("Starting UCS...")
+    return compiled_graph.run(building_overlay.route if building_overlay else search.ucs, start, goal)
 
 def euclidean_distance(node1, node2):
     """Calculates the Euclidean distance heuristic."""
-    if node1 not in building_coords or node2 not in building_coords:
-        return 0
-    x1, y1 = building_coords[node1]
-    x2, y2 = building_coords[node2]
-    return math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
+    return search.euclidean_distance(compiled_graph, compiled_graph.node_id(node1), compiled_graph.node_id(node2))
 
 def a_star(start, goal):
     """A* Search implementation with Euclidean distance heuristic."""
-    print("Starting A* Search...")
-    priority_queue = [(0 + euclidean_distance(start, goal), 0, start, [start])]
-    visited_costs = {start: 0}
-    nodes_explored = 0
-    while priority_queue:
-        nodes_explored += 1
-        f_cost, g_cost, current_node, path = heapq.heappop(priority_queue)
-        if current_node == goal:
-            return path, g_cost, nodes_explored
-        for neighbor, edge_dist, _ in campus_graph.get(current_node, []):
-            new_g_cost = g_cost + edge_dist
-            if neighbor not in visited_costs or new_g_cost < visited_costs[neighbor]:
-                visited_costs[neighbor] = new_g_cost
-                new_f_cost = new_g_cost + euclidean_distance(neighbor, goal)
-                new_path = path + [neighbor]
-                heapq.heappush(priority_queue, (new_f_cost, new_g_cost, neighbor, new_path))
-    return None, 0, nodes_explored
+    announce("Starting A* Search...")
+    return compiled_graph.run(building_overlay.a_star if building_overlay else search.a_star, start, goal)
+
+def bidirectional_ucs(start, goal):
+    """Bidirectional Uniform Cost Search implementation."""
+    announce("Starting Bidirectional UCS...")
+    return compiled_graph.run(search.bidirectional_ucs, start, goal)
+
+def bidirectional_a_star(start, goal):
+    """Bidirectional A* Search implementation."""
+    announce("Starting Bidirectional A* Search...")
+    return compiled_graph.run(search.bidirectional_a_star, start, goal)
+
+# The campus is small enough to pick landmarks and fill their distance arrays at startup.
+landmarks = build_landmarks(compiled_graph)
+
+def alt_search(start, goal):
+    """A* Search implementation with landmark (ALT) lower bounds."""
+    announce("Starting ALT Search...")
+    return compiled_graph.run(landmarks.route, start, goal)
 
 # Map of algorithm names to their functions
 algorithms = {
     'BFS': bfs,
     'DFS': dfs,
+    'DLS': depth_limited,
+    'IDDFS': iddfs,
     'UCS': ucs,
-    'A*': a_star
+    'A*': a_star,
+    'BiUCS': bidirectional_ucs,
+    'BiA*': bidirectional_a_star,
+    'ALT': alt_search
 }
 
+# Menu input is upper-cased, so look algorithms up case-insensitively.
+algorithm_names = {name.upper(): name for name in algorithms}
+
 # ====================================================================
 # 3. BASIC QUERY PROCESSING AND INFORMATION SERVICES
 # ====================================================================
 
+def direction(location, next_location):
+    """One line of walking directions between two consecutive locations of a path."""
+    edge = compiled_graph.edge_weight(compiled_graph.node_id(location), compiled_graph.node_id(next_location))
+    if edge != INF:
+        return f"From {location}, walk {as_number(edge)} meters to {next_location}."
+    return f"From {location}, proceed to {next_location}."
+
 def show_path(path, distance):
     """Displays the found path and its details."""
     if path:
@@ -234,12 +155,7 @@ def show_path(path, distance):
         for i in range(len(path)):
             location = path[i]
             if i < len(path) - 1:
-                next_location = path[i+1]
-                edge = next((edge_dist for neighbor, edge_dist, _ in campus_graph.get(location, []) if neighbor == next_location), None)
-                if edge is not None:
-                    print(f"  > From {location}, walk {edge} meters to {next_location}.")
-                else:
-                    print(f"  > From {location}, proceed to {next_location}.")
+                print(f"  > {direction(location, path[i+1])}")
 
             if location in building_info:
                 print(f"    - Note about {location}: {building_info[location]}")
@@ -248,27 +164,41 @@ def show_path(path, distance):
         print("\n--- No path found ---")
         print("Sorry, no path could be found between the selected locations.")
 
+def ask_location(prompt):
+    """Prompts for a location and returns its map name, or None (after saying why) if it is unknown."""
+    text = input(prompt).strip()
+    if text.lower() == 'exit':
+        return 'exit'
+    location, suggestions = location_index.resolve(text)
+    if location is None:
+        print(f"Unknown location: {text}.")
+        if suggestions:
+            print("Did you mean: " + ", ".join(suggestions) + "?")
+    elif location.lower() != text.lower():
+        print(f"Using {location} for '{text}'.")
+    return location
+
 def run_query_loop():
     """Main interactive loop for the user."""
     while True:
         print("\n--- Campus Navigation Bot ---")
         print("Available locations:")
         # Display all primary and sub-locations for user guidance
-        all_locations = sorted(list(campus_graph.keys()))
+        all_locations = list(compiled_graph.names)
         print(", ".join(all_locations))
 
-        start_location = input("Enter your starting location (or 'exit' to quit): ").strip().title()
-        if start_location.lower() == 'exit':
+        start_location = ask_location("Enter your starting location (or 'exit' to quit): ")
+        if start_location == 'exit':
             break
+        if start_location is None:
+            continue
 
-        goal_location = input("Enter your destination: ").strip().title()
-
-        if start_location not in campus_graph or goal_location not in campus_graph:
-            print("Invalid location. Please choose from the available list.")
+        goal_location = ask_location("Enter your destination: ")
+        if goal_location is None or goal_location == 'exit':
             continue
 
-        print("\nAvailable algorithms: BFS, DFS, UCS, A*")
-        algorithm_choice = input("Choose a search algorithm: ").strip().upper()
+        print("\nAvailable algorithms: " + ", ".join(algorithms))
+        algorithm_choice = algorithm_names.get(input("Choose a search algorithm: ").strip().upper())
 
         if algorithm_choice not in algorithms:
             print("Invalid algorithm choice. Please select from the list.")
@@ -277,15 +207,173 @@ def run_query_loop():
         print(f"\nSearching for a path from {start_location} to {goal_location} using {algorithm_choice}...")
 
         path_finder = algorithms[algorithm_choice]
-        path, distance, nodes_explored = path_finder(start_location, goal_location)
+        try:
+            path, distance, nodes_explored = path_finder(start_location, goal_location)
+        except search.DepthLimitReached as error:
+            print(f"\n--- {error} ---")
+            print(f"Try BFS, or raise DEPTH_LIMIT (now {DEPTH_LIMIT}) for {algorithm_choice}.")
+            print(f"Search completed. Nodes explored: {error.nodes_explored}")
+            continue
 
         show_path(path, distance)
         print(f"Search completed. Nodes explored: {nodes_explored}")
 
+# ====================================================================
+# 4. BATCH MODE
+# ====================================================================
+
+# Answers a file of (start, goal, algorithm) rows without prompting, e.g. to
+# pre-generate direction sheets:
+#
+#     python BOTBRAIN.py --batch pairs.csv --output sheets.jsonl
+#
+# Rows are CSV (an optional "start,goal,algorithm" header line) or JSONL
+# (objects with those keys, or [start, goal, algorithm] lists); "-" reads
+# stdin. The algorithm may be left out to use --algorithm. Each row gives
+# one JSON line, in input order, with the route and its directions or an
+# "error". With --workers N the queries are spread over N worker processes
+# (see BATCH_START_METHOD); the output is the same as a serial run's.
+
+def read_queries(lines, fmt):
+    """Yields (start, goal, algorithm) for each non-blank row; None fields where a row is malformed."""
+    if fmt == 'jsonl':
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            if isinstance(row, dict):
+                yield row.get('start'), row.get('goal'), row.get('algorithm')
+            elif isinstance(row, list) and 2 <= len(row) <= 3:
+                yield tuple(row) + (None,) * (3 - len(row))
+            else:
+                yield None, None, None
+        return
+    for i, row in enumerate(csv.reader(lines)):
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        if i == 0 and row[0].strip().lower() == 'start':
+            continue  # header line
+        row = [cell.strip() for cell in row] + [None] * (3 - len(row))
+        yield row[0], row[1], row[2] or None
+
+def answer_query(query):
+    """Runs one (start, goal, algorithm) query and returns its result as a dict."""
+    start, goal, algorithm = query
+    if not all(isinstance(value, str) and value for value in (start, goal, algorithm)):
+        return {"start": start, "goal": goal, "algorithm": algorithm, "error": "Missing parameters"}
+    result = {"start": start, "goal": goal, "algorithm": algorithm_names.get(algorithm.strip().upper(), algorithm)}
+    for field in ("start", "goal"):
+        location, suggestions = location_index.resolve(result[field])
+        if location is None:
+            result["error"] = f"Unknown location: {result[field]}"
+            result["suggestions"] = suggestions
+            return result
+        result[field] = location
+    start, goal = result["start"], result["goal"]
+    if result["algorithm"] not in algorithms:
+        result["error"] = "Invalid algorithm"
+        return result
+
+    try:
+        path, distance, nodes_explored = algorithms[result["algorithm"]](start, goal)
+    except search.DepthLimitReached as error:
+        result.update({"error": str(error), "depth_limited": True, "nodes_explored": error.nodes_explored})
+        return result
+    if not path:
+        result["error"] = "No path found"
+        result["nodes_explored"] = nodes_explored
+        return result
+    result.update({
+        "path": path,
+        "distance": as_number(distance),
+        "time": calculate_time(distance),
+        "nodes_explored": nodes_explored,
+        "directions": [direction(location, next_location) for location, next_location in zip(path, path[1:])],
+    })
+    return result
+
+# Batch worker processes are forked where the OS can fork (they then share
+# the loaded map) and spawned elsewhere, i.e. on Windows.
+BATCH_START_METHOD = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+
+def init_batch_worker():
+    """Pool initializer. A spawned worker has imported this module afresh, which loaded the map; a forked
+    one already has it. Either way it must not print progress messages into the results."""
+    global VERBOSE
+    VERBOSE = False
+
+def run_batch(lines, fmt, output, default_algorithm, workers=1):
+    """Answers every query of ``lines`` and writes one JSON line per query to ``output``.
+
+    Returns (queries answered, queries with an error).
+    """
+    init_batch_worker()
+    queries = ((start, goal, algorithm or default_algorithm) for start, goal, algorithm in read_queries(lines, fmt))
+    answered = failed = 0
+    if workers > 1:
+        pool = multiprocessing.get_context(BATCH_START_METHOD).Pool(workers, initializer=init_batch_worker)
+        results = pool.imap(answer_query, queries, chunksize=64)
+    else:
+        pool = None
+        results = map(answer_query, queries)
+    try:
+        for result in results:
+            output.write(json.dumps(result) + "\n")
+            answered += 1
+            failed += "error" in result
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return answered, failed
+
+def batch_format(name, first_line):
+    """'csv' or 'jsonl' from the file extension, else from the first line (JSONL rows open with { or [)."""
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    if name.endswith('.csv'):
+        return 'csv'
+    return 'jsonl' if first_line.lstrip()[:1] in ('{', '[') else 'csv'
+
+def batch_main(args):
+    source = sys.stdin if args.batch == '-' else open(args.batch, newline='')
+    output = open(args.output, 'w') if args.output else sys.stdout
+    began = time.perf_counter()
+    try:
+        first_line = source.readline()
+        fmt = args.format or batch_format(args.batch, first_line)
+        lines = itertools.chain([first_line], source)
+        answered, failed = run_batch(lines, fmt, output, args.algorithm, args.workers)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(f"{answered} queries answered ({failed} with errors) in {time.perf_counter() - began:.2f} s",
+          file=sys.stderr)
+
 # ====================================================================
 # MAIN EXECUTION
 # ====================================================================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Campus Navigation Bot")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="answer (start, goal, algorithm) rows from a CSV or JSONL file ('-' for stdin) "
+                             "instead of prompting")
+    parser.add_argument('--output', '-o', metavar='FILE', help="write batch results (JSONL) here instead of stdout")
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help="input format (default: from the file extension)")
+    parser.add_argument('--algorithm', default='UCS', help="algorithm for rows that do not name one (default: UCS)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f"worker processes for batch mode (default: 1, i.e. serial; this machine has "
+                             f"{os.cpu_count() or 1} CPUs)")
+    args = parser.parse_args()
+    if args.batch:
+        batch_main(args)
+        sys.exit(0)
+
     # --- NEW FEATURE: WELCOME MESSAGE FOR NEW STUDENTS ---
     print("=====================================================")
     print("       Welcome to Chanakya University!")
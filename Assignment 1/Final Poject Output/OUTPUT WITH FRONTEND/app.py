@@ -1,137 +1,93 @@
+import argparse
+import atexit
 import collections
-import heapq
+import concurrent.futures
+import contextlib
+import datetime
+import json
 import math
-from flask import Flask, jsonify, request, render_template, url_for
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+try:
+    import fcntl
+except ImportError:  # Windows: only the single-process dev server runs there
+    fcntl = None
+from flask import Flask, Response, g, has_app_context, jsonify, request, render_template, stream_with_context, url_for
+
+# The shared routing engine lives next to BOTBRAIN.py, one directory up.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from campusnav import INF, search, tour, updates
+from campusnav.graph import as_number
+from campusnav.buildings import BuildingOverlay
+from campusnav.contraction import ContractionHierarchy, build_hierarchy
+from campusnav.k_shortest import k_shortest_paths
+from campusnav.campus_map import load_map
+from campusnav.landmarks import Landmarks, build_landmarks
+from campusnav.names import LocationIndex
+from campusnav.payloads import Payload
+from campusnav.metrics import CONTENT_TYPE, COUNT_BUCKETS, SECONDS_BUCKETS, MetricsRegistry
+from campusnav.route_cache import RouteCache
+from campusnav.route_table import RouteTable, build_route_table
+from campusnav.spatial import SpatialIndex
+from campusnav.time_profile import TimeDependentWeights, parse_clock
 
 # ====================================================================
 # 1. CAMPUS GEOMETRY AND DATA
 # =====================================================================
 
-# This graph defines all the locations and connections on the campus.
-# Each key is a point, and its value is a list of its neighbors.
-# The tuples are (destination_node, distance_in_meters, speed_factor).
-campus_graph = {
-    'Entry Gate': [('Security Gate', 200, 1.0)],
-    'Exit Gate': [('Security Gate', 170, 1.0)],
-    'Security Gate': [
-        ('Entry Gate', 200, 1.0),
-        ('Exit Gate', 170, 1.0),
-        ('Flag Post', 60, 1.0)
-    ],
-    'Flag Post': [('Security Gate', 60, 1.0), ('Academic Block 1 Entrance', 220, 1.0)],
-    
-    # Internal nodes for Academic Block 1.
-    'Academic Block 1 Entrance': [
-        ('Flag Post', 220, 1.0),
-        ('Lawn Area', 130, 1.0),
-        ('Library', 5, 1.0),
-        ('Auditorium', 10, 1.0),
-        ('Admissions', 55, 1.0),
-        ('Registrar Office', 70, 1.0),
-        ('Cafeteria', 15, 1.0)
-    ],
-    'Library': [
-        ('Academic Block 1 Entrance', 5, 1.0),
-        ('Auditorium', 20, 1.0)
-    ],
-    'Auditorium': [
-        ('Academic Block 1 Entrance', 10, 1.0),
-        ('Library', 20, 1.0),
-        ('Cafeteria', 25, 1.0)
-    ],
-    'Admissions': [('Academic Block 1 Entrance', 55, 1.0)],
-    'Registrar Office': [
-        ('Academic Block 1 Entrance', 70, 1.0),
-        ('Finance Dept', 12, 1.0)
-    ],
-    'Finance Dept': [
-        ('Registrar Office', 12, 1.0),
-        ('Academic Block 1 Entrance', 80, 1.0)
-    ],
-    'Cafeteria': [
-        ('Academic Block 1 Entrance', 15, 1.0),
-        ('Academic Block 2', 60, 1.0),
-        ('Auditorium', 25, 1.0)
-    ],
-
-    # The rest of the external campus locations.
-    'Lawn Area': [('Academic Block 1 Entrance', 130, 1.0), ('Academic Block 2', 150, 1.0)],
-    'Academic Block 2': [('Lawn Area', 150, 1.0), ('Cafeteria', 60, 1.0), ('Food Court', 250, 1.0), ('Hostel Building 2', 45, 1.0)],
-    'Hostel Building 2': [('Academic Block 2', 45, 1.0), ('Hostel Building 1', 250, 1.0), ('Food Court', 55, 1.0)],
-    'Food Court': [('Academic Block 2', 250, 1.0), ('Hostel Building 1', 130, 1.0)],
-    'Hostel Building 1': [('Hostel Building 2', 250, 1.0), ('Food Court', 130, 1.0), ('Exit Gate', 420, 1.0)],
-}
+# The campus map (locations, corridors with distance and speed_factor,
+# coordinates, info texts and images) lives in campus_map.json next to
+# BOTBRAIN.py, so both front ends route on the same map. It is compiled to
+# campus_map.bin on first load and memory-mapped from then on, so worker
+# processes share one copy. Set CAMPUS_MAP_PATH to serve another map. Saving
+# the file while the app runs reloads it (see reload_if_map_changed).
+# Everything built from the file is held by one MapState (section 2).
+CAMPUS_MAP_PATH = os.environ.get(
+    'CAMPUS_MAP_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'campus_map.json'))
+map_mtime = os.stat(CAMPUS_MAP_PATH).st_mtime_ns  # taken before loading, so a save during the load is seen
 
-# Adjusted coordinates for A* search based on visual analysis of the map.
-# The origin (0,0) is roughly the Security Gate.
-building_coords = {
-    'Entry Gate': (180, -140),
-    'Exit Gate': (-220, -120),
-    'Security Gate': (0, 0),
-    'Flag Post': (0, 70),
-    
-    # Locations in Academic Block 1
-    'Academic Block 1 Entrance': (0, 200),
-    'Library': (-30, 220),
-    'Auditorium': (30, 220),
-    'Admissions': (-10, 280),
-    'Registrar Office': (10, 280),
-    'Finance Dept': (20, 290),
-    'Cafeteria': (-50, 200),
-
-    # Other Campus Locations
-    'Lawn Area': (-80, 300),
-    'Academic Block 2': (-150, 420),
-    'Food Court': (-180, 520),
-    'Hostel Building 2': (-250, 480),
-    'Hostel Building 1': (-250, 680),
-    'cricket ground': (-350, 680),
-    'sports path': (-200, 600)
-}
+# A point farther than this (meters) from every location is not snapped.
+SNAP_MAX_DISTANCE = float(os.environ.get('SNAP_MAX_DISTANCE', 75))
 
-# Short descriptions for each location.
-building_info = {
-    'Entry Gate': "Main campus entry point, on the right.",
-    'Exit Gate': "Main campus exit point, on the left.",
-    'Security Gate': "The central security checkpoint for all campus traffic.",
-    'Flag Post': "The campus flag post.",
-    'Academic Block 1 Entrance': "Main entrance to Academic Block 1, which houses several internal departments.",
-    'Library': "Located inside Academic Block 1 with easy access to the Auditorium.",
-    'Auditorium': "Found on the lower ground floor of Academic Block 1.",
-    'Admissions': "The Admissions office, located on the 1st floor of Academic Block 1.",
-    'Registrar Office': "The Registrar's Office on the 3rd floor of Academic Block 1.",
-    'Finance Dept': "The Finance Department, adjacent to the Registrar's Office.",
-    'Cafeteria': "An on-campus cafeteria with connections to Academic Block 2 and the Auditorium.",
-    'Academic Block 2': "A secondary academic hub in the northern part of the campus.",
-    'Lawn Area': "A large open lawn area.",
-    'Hostel Building 2': "One of the two main residential buildings.",
-    'Food Court': "The main campus food court.",
-    'Hostel Building 1': "One of the main residential buildings.",
-    'cricket ground': "The main campus cricket ground.",
-    'sports path': "A winding path that connects various sports facilities."
-}
+def is_point(value):
+    return isinstance(value, list) and len(value) == 2 and all(
+        isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v) for v in value)
 
-# Dictionary to store image filenames for each location.
-location_images = {
-    'Entry Gate': 'entry_gate.jpg',
-    'Exit Gate': 'exit_gate.jpg',
-    'Security Gate': 'security_gate.jpg',
-    'Flag Post': 'flag_post.jpg',
-    'Academic Block 1 Entrance': 'academic_block_1_entrance.jpg',
-    'Library': 'library.jpg',
-    'Auditorium': 'auditorium.jpg',
-    'Admissions': 'admissions.jpg',
-    'Registrar Office': 'registrar_office.jpg',
-    'Finance Dept': 'finance_dept.jpg',
-    'Cafeteria': 'cafeteria.jpg',
-    'Lawn Area': 'lawn_area.jpg',
-    'Academic Block 2': 'academic_block_2.jpg',
-    'Food Court': 'food_court.jpg',
-    'Hostel Building 2': 'hostel_building_2.jpg',
-    'Hostel Building 1': 'hostel_building_1.jpg',
-    'cricket ground': 'cricket_ground.jpg',
-    'sports path': 'sports_path.jpg'
-}
+def snap_point(x, y):
+    """(name, distance) of the location nearest (x, y) within SNAP_MAX_DISTANCE, or None."""
+    m = current_map()
+    found = m.spatial_index.nearest(x, -y, 1, SNAP_MAX_DISTANCE)
+    if not found:
+        return None
+    distance, node = found[0]
+    return m.graph.names[node], distance
+
+def resolve_locations(*names):
+    """Map names for typed locations, or for [x, y] points snapped to the nearest location.
+
+    Returns (names, None), or (None, error body) for the first location
+    that does not resolve, with ranked "suggestions" for names.
+    """
+    location_index = current_map().location_index
+    resolved = []
+    for name in names:
+        if is_point(name):
+            snapped = snap_point(*name)
+            if snapped is None:
+                return None, {"error": f"No location within {SNAP_MAX_DISTANCE:g} m of {name}"}
+            resolved.append(snapped[0])
+            continue
+        location, suggestions = location_index.resolve(name)
+        if location is None:
+            return None, {"error": f"Unknown location: {name}", "suggestions": suggestions}
+        resolved.append(location)
+    return resolved, None
 
 # Average walking speed.
 WALKING_SPEED_MPS = 1.35  # Slightly adjusted speed.
@@ -141,108 +97,596 @@ def calculate_time(distance):
     time_seconds = distance / WALKING_SPEED_MPS
     return round(time_seconds / 60, 2)
 
+# Time-of-day crowding: (from, to, locations, factor). The factor multiplies the
+# speed_factor of every edge touching one of the locations during that period.
+congestion_profile = [
+    ("12:00", "14:00", {'Cafeteria', 'Food Court'}, 0.6),
+    ("08:30", "09:15", {'Entry Gate', 'Security Gate', 'Flag Post'}, 0.8),
+    ("16:30", "17:30", {'Security Gate', 'Exit Gate'}, 0.8),
+]
+
 
 # ====================================================================
 # 2. PATHFINDING ALGORITHMS
 # =====================================================================
 
-def bfs(start, goal):
+# Precomputed all-pairs table written by `python app.py --precompute-routes`.
+# When present (and built for this exact graph) UCS and A* are answered by
+# walking the table instead of searching.
+ROUTE_TABLE_PATH = os.environ.get(
+    'ROUTE_TABLE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'route_table.bin'))
+
+# Contraction hierarchy written by `python app.py --build-hierarchy`, used by
+# the 'CH' algorithm. Without it, CH queries fall back to plain UCS.
+HIERARCHY_PATH = os.environ.get(
+    'HIERARCHY_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hierarchy.bin'))
+
+# Landmark distance arrays written by `python app.py --build-landmarks`, used
+# by the 'ALT' algorithm. Without them, ALT queries fall back to plain UCS.
+LANDMARKS_PATH = os.environ.get(
+    'LANDMARKS_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'landmarks.bin'))
+
+class MapState:
+    """Everything built from one version of the campus map file.
+
+    reload_graph builds a complete new one next to the one being served and
+    swaps it in with a single assignment; requests read theirs through
+    current_map(), so none of them sees parts of two maps.
+    """
+
+    def __init__(self, path):
+        self.store = load_map(path)
+        self.coords, self.info, self.images = self.store.coords, self.store.info, self.store.images
+        # All searches run on the compiled, integer-ID graph; location names
+        # are only converted at the API boundary.
+        self.graph = self.store.graph
+        # Typed location names (any case, aliases from the map file, small
+        # typos) are resolved through this index before they reach a search
+        # or a cache key; see campusnav/names.py.
+        self.location_index = LocationIndex.from_store(self.store)
+        # Grid buckets over the location coordinates, for nearest-location
+        # lookups, snapping map clicks to locations and viewport (bbox)
+        # listings; see campusnav/spatial.py. The API takes and returns points
+        # in the frame of /api/buildings coords, which is the map file's with
+        # y negated.
+        self.spatial_index = SpatialIndex(self.graph)
+        # Buildings declared in the map file: UCS and A* step over the indoor
+        # locations of buildings the route only passes by, using precomputed
+        # entrance-to-entrance walks.
+        self.building_overlay = BuildingOverlay.from_store(self.store)
+        self.route_table = RouteTable.open(ROUTE_TABLE_PATH, self.graph)
+        self.hierarchy = ContractionHierarchy.load(HIERARCHY_PATH, self.graph)
+        self.landmarks = Landmarks.load(LANDMARKS_PATH, self.graph)
+        # Travel-time weights per time-of-day interval for the 'Fastest' algorithm.
+        self.time_weights = TimeDependentWeights(self.graph, WALKING_SPEED_MPS, congestion_profile)
+        # Content fingerprint of the compiled graph; part of every route cache key.
+        self.version = self.graph.fingerprint()
+        # Rendered pieces of responses, filled in on first use (see
+        # cached_payload, fragments_for and building_entries).
+        self.payloads = {}
+        self.location_fragments = {}
+        self.building_listing = {}
+
+map_state = MapState(CAMPUS_MAP_PATH)
+
+def current_map():
+    """The MapState this request started with, or outside a request the one being served."""
+    if has_app_context():
+        state = g.get('map_state')
+        if state is not None:
+            return state
+    return map_state
+
+# Runtime corridor changes made through /api/edges: {(from, to): distance},
+# with INF for a closed edge. The map file itself keeps the mapped distances.
+edge_overrides = {}
+# Reentrant, since reload_graph holds it while re-applying the overrides.
+edge_update_lock = threading.RLock()
+# Bumped under edge_update_lock by every edge change. A search that started
+# in an older generation may have read the old weights, so its result is
+# not cached (see cache_put).
+edit_generation = 0
+
+# Depth limit of 'DLS' and 'IDDFS' requests that do not send "max_depth",
+# and the largest one a request may send: their work grows exponentially
+# with the limit. A search the limit stopped short answers with
+# "depth_limited" (see depth_limited_body) rather than "No path found".
+DEFAULT_DEPTH_LIMIT = int(os.environ.get('DEFAULT_DEPTH_LIMIT', search.DEFAULT_DEPTH_LIMIT))
+MAX_DEPTH_LIMIT = int(os.environ.get('MAX_DEPTH_LIMIT', DEFAULT_DEPTH_LIMIT))
+
+# Searches that always return a shortest path. Their cached routes survive
+# edge changes that provably cannot affect them; other algorithms' cached
+# routes are dropped on any change.
+EXACT_ALGORITHMS = {'UCS', 'BiUCS', 'CH', 'ALT'}
+
+def reload_graph():
+    """Reloads the campus map file after an edit so searches and caches see the new map.
+
+    The new MapState gets the runtime edge changes before it is swapped in,
+    under edge_update_lock so no change lands on the old one in between.
+    """
+    global map_state, edit_generation, map_mtime
+    mtime = os.stat(CAMPUS_MAP_PATH).st_mtime_ns
+    state = MapState(CAMPUS_MAP_PATH)
+    with edge_update_lock:
+        for (source_name, target_name), distance in list(edge_overrides.items()):
+            update_edge(source_name, target_name, distance, state)
+        edit_generation += 1
+        map_state = state
+    map_mtime = mtime
+    reset_search_pool()
+
+map_reload_lock = threading.Lock()
+
+def reload_if_map_changed():
+    """Reloads the campus map if its file has been saved since this process loaded it.
+
+    Every worker and search process checks for itself before each request
+    or pooled search, so all of them move to the new map. A file that does
+    not load is reported once and the current map is kept.
+    """
+    global map_mtime
+    try:
+        mtime = os.stat(CAMPUS_MAP_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return
+    if mtime == map_mtime:
+        return
+    with map_reload_lock:
+        if mtime == map_mtime:
+            return
+        try:
+            reload_graph()
+        except ValueError as error:
+            map_mtime = mtime
+            print(f"Keeping the current map: {CAMPUS_MAP_PATH} does not load ({error})", file=sys.stderr)
+
+def update_edge(source_name, target_name, distance=None, state=None):
+    """Sets the distance of one directed edge: INF closes it, None reopens it as mapped.
+
+    The edge is changed in ``state``, by default the MapState being served.
+    Only the route table rows and route cache entries that depend on the
+    edge are recomputed or dropped. Returns a summary, or None if there is
+    no such edge.
+    """
+    global edit_generation
+    with edge_update_lock:
+        state = state or map_state
+        graph = state.graph
+        source = graph.node_id(source_name)
+        target = graph.node_id(target_name)
+        if source < 0 or target < 0:
+            return None
+        old_weight = graph.set_edge_weight(source, target, distance)
+        if old_weight is None:
+            return None
+        new_weight = graph.edge_weight(source, target)
+        if distance is None:
+            edge_overrides.pop((source_name, target_name), None)
+        else:
+            edge_overrides[(source_name, target_name)] = distance
+
+        summary = {
+            "from": source_name,
+            "to": target_name,
+            "old_distance": None if old_weight == INF else as_number(old_weight),
+            "new_distance": None if new_weight == INF else as_number(new_weight),
+            "table_rows_recomputed": 0,
+            "cache_entries_invalidated": 0,
+        }
+        if new_weight == old_weight:
+            return summary
+        edit_generation += 1
+
+        state.time_weights.update_edges(graph, source, target)
+        state.building_overlay.edge_changed(source, target)
+        if state.route_table:
+            rows = updates.affected_table_rows(state.route_table, source, target, old_weight, new_weight)
+            state.route_table.recompute_rows(rows)
+            summary["table_rows_recomputed"] = len(rows)
+        summary["cache_entries_invalidated"] = route_cache.invalidate(updates.stale_route_predicate(
+            graph, source, target, old_weight, new_weight, EXACT_ALGORITHMS))
+        # An edge only matters to a bounded search that reached its source.
+        reachability_cache.invalidate(lambda key, reached: source in reached)
+        return summary
+
+# Runtime edge changes are shared by every process serving the app (serve.py's
+# workers and their search processes) through one small file: the edit
+# version on the first line, then the overrides as JSON [from, to, distance]
+# entries, null meaning closed. /api/edges rewrites it under an exclusive
+# file lock, and each process re-applies it before every request or pooled
+# search when the version has moved. It is created empty on first import,
+# once, in serve.py's master process, so a restart starts from the mapped
+# distances; set EDGE_STATE_PATH to keep edits across restarts instead.
+if 'EDGE_STATE_PATH' not in os.environ:
+    os.environ['EDGE_STATE_PATH'] = os.path.join(tempfile.gettempdir(), f'campusnav-edges-{os.getpid()}.txt')
+    with open(os.environ['EDGE_STATE_PATH'], 'w', encoding='utf-8') as f:
+        f.write('0\n[]')
+
+    @atexit.register
+    def remove_edge_state(path=os.environ['EDGE_STATE_PATH'], owner=os.getpid()):
+        if os.getpid() == owner:
+            for name in (path, path + '.lock'):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(name)
+EDGE_STATE_PATH = os.environ['EDGE_STATE_PATH']
+edge_state_version = 0
+edge_sync_lock = threading.Lock()
+
+def sync_edge_overrides():
+    """Applies the shared edge state if another process has changed it since this one last did."""
+    global edge_state_version
+    with edge_sync_lock:
+        try:
+            with open(EDGE_STATE_PATH, encoding='utf-8') as f:
+                version = int(f.readline())
+                if version == edge_state_version:
+                    return
+                wanted = {(source, target): INF if distance is None else distance
+                          for source, target, distance in json.load(f)}
+        except FileNotFoundError:
+            return
+        for source, target in [key for key in edge_overrides if key not in wanted]:
+            update_edge(source, target)
+        for (source, target), distance in wanted.items():
+            if edge_overrides.get((source, target)) != distance:
+                update_edge(source, target, distance)
+        edge_state_version = version
+
+@contextlib.contextmanager
+def shared_edge_edit():
+    """Holds the cross-process edit lock with this process's edges in sync; publishes them on exit."""
+    global edge_state_version
+    with open(EDGE_STATE_PATH + '.lock', 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        sync_edge_overrides()
+        yield
+        with edge_sync_lock:
+            overrides = [[source, target, None if distance == INF else distance]
+                         for (source, target), distance in edge_overrides.items()]
+            with open(EDGE_STATE_PATH + '.tmp', 'w', encoding='utf-8') as f:
+                f.write(f'{edge_state_version + 1}\n' + json.dumps(overrides))
+            os.replace(EDGE_STATE_PATH + '.tmp', EDGE_STATE_PATH)
+            edge_state_version += 1
+
+def bfs(start, goal, stats=None):
     """Breadth-First Search (BFS) explores the graph layer by layer."""
-    queue = collections.deque([(start, [start], 0)])
-    visited = {start}
-    nodes_explored = 0
-    while queue:
-        nodes_explored += 1
-        current_node, path, distance = queue.popleft()
-        if current_node == goal:
-            return path, distance, nodes_explored
-        for neighbor, edge_dist, _ in campus_graph.get(current_node, []):
-            if neighbor not in visited:
-                visited.add(neighbor)
-                new_path = path + [neighbor]
-                new_distance = distance + edge_dist
-                queue.append((neighbor, new_path, new_distance))
-    return None, 0, nodes_explored
-
-def dfs(start, goal):
+    return current_map().graph.run(search.bfs, start, goal, stats=stats)
+
+def dfs(start, goal, stats=None):
     """Depth-First Search (DFS) dives deep into a single path first."""
-    stack = [(start, [start], 0)]
-    visited = set()
-    nodes_explored = 0
-    while stack:
-        nodes_explored += 1
-        current_node, path, distance = stack.pop()
-        if current_node in visited:
-            continue
-        visited.add(current_node)
-        for neighbor, edge_dist, _ in reversed(campus_graph.get(current_node, [])):
-            if neighbor not in visited:
-                new_path = path + [neighbor]
-                new_distance = distance + edge_dist
-                stack.append((neighbor, new_path, new_distance))
-    return None, 0, nodes_explored
-
-def ucs(start, goal):
+    return current_map().graph.run(search.dfs, start, goal, stats=stats)
+
+def depth_limited_search(start, goal, max_depth=None, stats=None):
+    """Depth-Limited DFS only follows paths of up to max_depth corridors, in O(depth) memory."""
+    max_depth = DEFAULT_DEPTH_LIMIT if max_depth is None else max_depth
+    return current_map().graph.run(search.depth_limited_dfs, start, goal, max_depth=max_depth, stats=stats)
+
+def iterative_deepening(start, goal, max_depth=None, stats=None):
+    """Iterative Deepening DFS finds the fewest-corridor path like BFS, with DFS's memory use."""
+    max_depth = DEFAULT_DEPTH_LIMIT if max_depth is None else max_depth
+    return current_map().graph.run(search.iddfs, start, goal, max_depth=max_depth, stats=stats)
+
+def ucs(start, goal, stats=None):
     """Uniform Cost Search (UCS) finds the path with the lowest total cost."""
-    priority_queue = [(0, start, [start])]
-    visited_costs = {start: 0}
-    nodes_explored = 0
-    while priority_queue:
-        nodes_explored += 1
-        cost, current_node, path = heapq.heappop(priority_queue)
-        if current_node == goal:
-            return path, cost, nodes_explored
-        for neighbor, edge_dist, _ in campus_graph.get(current_node, []):
-            new_cost = cost + edge_dist
-            if neighbor not in visited_costs or new_cost < visited_costs[neighbor]:
-                visited_costs[neighbor] = new_cost
-                new_path = path + [neighbor]
-                heapq.heappush(priority_queue, (new_cost, neighbor, new_path))
-    return None, 0, nodes_explored
+    m = current_map()
+    if m.route_table:
+        return m.graph.run(m.route_table.route, start, goal, stats=stats)
+    if m.building_overlay:
+        return m.graph.run(m.building_overlay.route, start, goal, stats=stats)
+    return m.graph.run(search.ucs, start, goal, stats=stats)
 
 def euclidean_distance(node1, node2):
     """Calculates a straight-line distance, used as a heuristic for A*."""
-    if node1 not in building_coords or node2 not in building_coords:
-        return 0
-    x1, y1 = building_coords[node1]
-    x2, y2 = building_coords[node2]
-    return math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
+    graph = current_map().graph
+    return search.euclidean_distance(graph, graph.node_id(node1), graph.node_id(node2))
 
-def a_star(start, goal):
+def a_star(start, goal, stats=None):
     """A* Search combines cost with a heuristic for efficient pathfinding."""
-    priority_queue = [(0 + euclidean_distance(start, goal), 0, start, [start])]
-    visited_costs = {start: 0}
-    nodes_explored = 0
-    while priority_queue:
-        nodes_explored += 1
-        f_cost, g_cost, current_node, path = heapq.heappop(priority_queue)
-        if current_node == goal:
-            return path, g_cost, nodes_explored
-        for neighbor, edge_dist, _ in campus_graph.get(current_node, []):
-            new_g_cost = g_cost + edge_dist
-            if neighbor not in visited_costs or new_g_cost < visited_costs[neighbor]:
-                visited_costs[neighbor] = new_g_cost
-                new_f_cost = new_g_cost + euclidean_distance(neighbor, goal)
-                new_path = path + [neighbor]
-                heapq.heappush(priority_queue, (new_f_cost, new_g_cost, neighbor, new_path))
-    return None, 0, nodes_explored
+    m = current_map()
+    if m.route_table:
+        return m.graph.run(m.route_table.route, start, goal, stats=stats)
+    if m.building_overlay:
+        return m.graph.run(m.building_overlay.a_star, start, goal, stats=stats)
+    return m.graph.run(search.a_star, start, goal, stats=stats)
+
+def bidirectional_ucs(start, goal, stats=None):
+    """Bidirectional UCS searches forward from the start and backward from the goal."""
+    return current_map().graph.run(search.bidirectional_ucs, start, goal, stats=stats)
+
+def bidirectional_a_star(start, goal, stats=None):
+    """Bidirectional A* meets in the middle using averaged straight-line heuristics."""
+    return current_map().graph.run(search.bidirectional_a_star, start, goal, stats=stats)
+
+def contraction_hierarchy_search(start, goal, stats=None):
+    """Contraction Hierarchies: an upward-only bidirectional search on the precomputed hierarchy."""
+    m = current_map()
+    # Shortcuts bake in the mapped distances, so the hierarchy sits out while any edge is changed.
+    if m.hierarchy and not edge_overrides:
+        return m.graph.run(m.hierarchy.route, start, goal, stats=stats)
+    return m.graph.run(search.ucs, start, goal, stats=stats)
+
+def alt_search(start, goal, stats=None):
+    """A* guided by landmark distances (ALT); works for locations without coordinates."""
+    m = current_map()
+    # Landmark bounds stay admissible when edges get longer or close, not when they get shorter.
+    if m.landmarks and not m.graph.lowered_edges:
+        return m.graph.run(m.landmarks.route, start, goal, stats=stats)
+    return m.graph.run(search.ucs, start, goal, stats=stats)
+
+def departure_minute(depart_at=None):
+    """Minutes after midnight for an "HH:MM" departure, defaulting to the current local time."""
+    if depart_at is None:
+        now = datetime.datetime.now()
+        return now.hour * 60 + now.minute
+    return parse_clock(depart_at)
+
+def fastest_route(start, goal, depart_minute=None, stats=None):
+    """Quickest route by walking time, using speed_factor and the time-of-day congestion profile.
+
+    Returns (path, distance, nodes_explored, travel_minutes); the fourth value
+    replaces the constant-speed estimate from calculate_time().
+    """
+    if depart_minute is None:
+        depart_minute = departure_minute()
+    m = current_map()
+    path, seconds, nodes_explored = m.graph.run(
+        m.time_weights.route, start, goal, depart_seconds=depart_minute * 60, stats=stats)
+    if not path:
+        return None, 0, nodes_explored
+    return path, m.graph.path_length(path), nodes_explored, round(seconds / 60, 2)
+
+def alternative_routes(start, goal, count, stats=None):
+    """Up to ``count`` loopless routes by distance (Yen's algorithm), shortest first.
+
+    Returns (routes, nodes_explored) with routes a list of (path, distance).
+    """
+    graph = current_map().graph
+    start_id, goal_id = graph.node_id(start), graph.node_id(goal)
+    if start_id < 0 or goal_id < 0:
+        return [], 0
+    routes, nodes_explored = k_shortest_paths(graph, start_id, goal_id, count, stats)
+    return [(graph.path_names(path), as_number(distance)) for path, distance in routes], nodes_explored
 
 algorithms = {
-    'BFS': bfs, 'DFS': dfs, 'UCS': ucs, 'A*': a_star
+    'BFS': bfs, 'DFS': dfs, 'DLS': depth_limited_search, 'IDDFS': iterative_deepening,
+    'UCS': ucs, 'A*': a_star,
+    'BiUCS': bidirectional_ucs, 'BiA*': bidirectional_a_star,
+    'CH': contraction_hierarchy_search, 'ALT': alt_search,
+    'Fastest': fastest_route
 }
 
+# Process pool for CPU-bound searches (used by serve.py in production).
+# Web workers run request threads, and forking a threaded process can copy
+# locks held by other threads, so pool processes are spawned: each imports
+# this module afresh, mapping the same compiled map file (see campus_map.py)
+# and precomputed tables, whose pages the OS shares between processes. They
+# pick up edge changes from the shared edge state before every search. Small
+# graphs are searched in-process, where the hand-off would cost more than
+# the search.
+SEARCH_PROCESSES = int(os.environ.get('NAV_SEARCH_PROCESSES', 0))
+OFFLOAD_MIN_NODES = int(os.environ.get('NAV_OFFLOAD_MIN_NODES', 5000))
+_search_pool = None
+_search_pool_pid = None
+_search_pool_lock = threading.Lock()
+
+def submit_search(*args):
+    """Submits _search_in_pool(*args) to this process's search pool, creating it on first use."""
+    global _search_pool, _search_pool_pid
+    with _search_pool_lock:
+        if _search_pool is None or _search_pool_pid != os.getpid():
+            _search_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=SEARCH_PROCESSES, mp_context=multiprocessing.get_context('spawn'))
+            _search_pool_pid = os.getpid()
+        return _search_pool.submit(_search_in_pool, *args)
+
+def reset_search_pool():
+    """Starts a new pool for the next search; the old one finishes the searches it has, then exits."""
+    global _search_pool
+    with _search_pool_lock:
+        if _search_pool is not None and _search_pool_pid == os.getpid():
+            _search_pool.shutdown(wait=False)
+        _search_pool = None
+
+@atexit.register
+def shutdown_search_pool():
+    if _search_pool is not None and _search_pool_pid == os.getpid():
+        _search_pool.shutdown()
+
+def _search_in_pool(algorithm, start, goal, options):
+    reload_if_map_changed()
+    sync_edge_overrides()
+    stats = search.SearchStats()
+    return algorithms[algorithm](start, goal, stats=stats, **options), stats
+
+def find_route(algorithm, start, goal, options, stats=None):
+    """Runs one search, in the process pool when it is enabled and the graph is large.
+
+    Search effort is added to ``stats`` (a search.SearchStats) when given.
+    """
+    if SEARCH_PROCESSES > 0 and current_map().graph.node_count >= OFFLOAD_MIN_NODES:
+        result, pool_stats = submit_search(algorithm, start, goal, options).result()
+        if stats is not None:
+            stats.merge(pool_stats)
+        return result
+    return algorithms[algorithm](start, goal, stats=stats, **options)
+
 # ====================================================================
 # 3. FLASK APPLICATION AND API ENDPOINTS
 # =====================================================================
 
-app = Flask(__name__)
+# index.html sits next to this file rather than in templates/.
+app = Flask(__name__, template_folder='.')
+
+# Rendered /api/navigate responses, keyed by route_cache_key().
+route_cache = RouteCache(
+    max_entries=int(os.environ.get('ROUTE_CACHE_MAX_ENTRIES', 1024)),
+    max_bytes=int(os.environ.get('ROUTE_CACHE_MAX_BYTES', 8 * 1024 * 1024)),
+)
+
+# Per-process metrics for /metrics. The search and serialization phases of
+# /api/navigate are timed apart from the whole request, so a latency spike
+# can be pinned on the search, on building the JSON, or on Flask itself.
+metrics = MetricsRegistry()
+request_seconds = metrics.histogram(
+    'campusnav_http_request_seconds', "Time from Flask dispatching a request to its response being ready.",
+    SECONDS_BUCKETS, ('endpoint',))
+search_seconds = metrics.histogram(
+    'campusnav_search_seconds', "Wall time of the search phase of /api/navigate.",
+    SECONDS_BUCKETS, ('algorithm',))
+serialize_seconds = metrics.histogram(
+    'campusnav_serialize_seconds', "Wall time spent rendering and caching an /api/navigate response.",
+    SECONDS_BUCKETS, ('algorithm',))
+search_effort = {
+    name: metrics.histogram(f'campusnav_search_{name}', description, COUNT_BUCKETS, ('algorithm',))
+    for name, description in (
+        ('pushes', "Frontier (heap, queue or stack) pushes per search."),
+        ('pops', "Frontier pops per search, stale entries included."),
+        ('edges_relaxed', "Edges that improved a node's cost, per search."),
+        ('peak_frontier', "Largest frontier size reached, per search."),
+    )
+}
+cache_lookups = metrics.counter(
+    'campusnav_route_cache_lookups_total', "Route cache lookups by /api/navigate and /api/navigate/batch.",
+    ('result',))
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    reload_if_map_changed()
+    sync_edge_overrides()
+    # Read once: a reload while this request runs leaves it on the map it started with.
+    g.map_state = map_state
+
+@app.after_request
+def record_request_time(response):
+    started = g.get('request_started')
+    if started is not None:
+        request_seconds.observe(time.perf_counter() - started, request.endpoint or 'unmatched')
+    return response
+
+@app.route('/metrics')
+def api_metrics():
+    """Prometheus text-format scrape of this worker process's metrics."""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+# Third-party front-end files. They are not checked in: `python app.py
+# --vendor-assets` downloads the pinned release under static/vendor, and
+# until that has been run the page loads Leaflet from the CDN, so the map
+# needs internet access. app.py and serve.py say which one they serve at
+# startup, and every worker logs a warning when it renders the page with
+# the CDN. The version is part of the path, so clients may cache the local
+# copies for good.
+LEAFLET_VERSION = '1.7.1'
+LEAFLET_CDN = f'https://unpkg.com/leaflet@{LEAFLET_VERSION}/dist/'
+LEAFLET_VENDOR_DIR = f'vendor/leaflet-{LEAFLET_VERSION}/'
+LEAFLET_FILES = ('leaflet.js', 'leaflet.css', 'images/layers.png', 'images/layers-2x.png',
+                 'images/marker-icon.png', 'images/marker-icon-2x.png', 'images/marker-shadow.png')
+
+def vendor_assets():
+    """Downloads LEAFLET_FILES into static/vendor; returns the directory."""
+    directory = os.path.join(app.static_folder, LEAFLET_VENDOR_DIR)
+    for name in LEAFLET_FILES:
+        path = os.path.join(directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with urllib.request.urlopen(LEAFLET_CDN + name, timeout=30) as response:
+            data = response.read()
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)
+    return directory
+
+def leaflet_vendored():
+    """Whether every one of LEAFLET_FILES has been downloaded into static/vendor."""
+    directory = os.path.join(app.static_folder, LEAFLET_VENDOR_DIR)
+    return all(os.path.isfile(os.path.join(directory, name)) for name in LEAFLET_FILES)
+
+def leaflet_url():
+    """Base URL of the Leaflet files: the local copy when it is complete, else the CDN (logged)."""
+    if leaflet_vendored():
+        return url_for('static', filename=LEAFLET_VENDOR_DIR)
+    app.logger.warning(leaflet_notice())
+    return LEAFLET_CDN
+
+def leaflet_notice():
+    """One startup line saying where the page gets Leaflet from."""
+    if leaflet_vendored():
+        return f"Serving Leaflet {LEAFLET_VERSION} from static/{LEAFLET_VENDOR_DIR}"
+    return (f"No local Leaflet in static/{LEAFLET_VENDOR_DIR}; the page loads it from {LEAFLET_CDN} "
+            "(run `python app.py --vendor-assets` for offline kiosks).")
+
+# Lifetime of responses fetched with ?v=<their ETag>: such a URL always
+# names the same body, so clients need never ask again.
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+def cached_payload(name, render, content_type='application/json'):
+    """Precompressed body of a read-mostly response, rendered on first use for this map."""
+    payloads = current_map().payloads
+    payload = payloads.get(name)
+    if payload is None:
+        payload = payloads[name] = Payload(render(), content_type)
+    return payload
+
+def send_payload(payload):
+    """Responds with ``payload`` in the best encoding the client accepts, or 304 if its ETag matches.
+
+    Requests carrying ?v=<ETag> may be cached for IMMUTABLE_MAX_AGE;
+    anything else is revalidated on every use.
+    """
+    if request.if_none_match.contains_weak(payload.etag):
+        response = Response(status=304)
+    else:
+        coding, body = payload.encoded(request.accept_encodings.quality)
+        response = Response(body, content_type=payload.content_type)
+        if coding != 'identity':
+            response.headers['Content-Encoding'] = coding
+    response.set_etag(payload.etag, weak=True)
+    response.vary.add('Accept-Encoding')
+    if request.args.get('v') == payload.etag:
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+def prepare_payloads():
+    """Renders every payload now, e.g. in serve.py's master process before the workers fork."""
+    with app.test_request_context():
+        for render in (index_payload, buildings_payload, graph_payload):
+            render()
+
+@app.after_request
+def cache_vendored_assets(response):
+    if request.path.startswith(url_for('static', filename='vendor/')) and response.status_code in (200, 304):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+def index_payload():
+    if app.debug:
+        current_map().payloads.pop('index', None)  # pick up template edits, as render_template would
+    return cached_payload('index', lambda: render_template(
+        'index.html', static_url=url_for('static', filename=''), leaflet_url=leaflet_url()),
+        'text/html; charset=utf-8')
 
 @app.route('/')
 def index():
-    return render_template('index.html', static_url=url_for('static', filename=''))
+    return send_payload(index_payload())
 
 @app.route('/api/navigate', methods=['POST'])
 def api_navigate():
+    """Finds a route.
+
+    Locations are resolved like typed names (case, aliases, small typos); an
+    unknown one gets a 400 listing "suggestions". A start or goal may also be
+    an [x, y] point, snapped to the nearest location. With "stream": true (or ?stream=1) a found route is sent as NDJSON, see
+    route_stream. With "alternatives": k the body also lists the k shortest
+    loopless routes, so a crowded corridor's traffic can be spread over them.
+    """
     data = request.json
     start_location = data.get('start')
     goal_location = data.get('goal')
@@ -255,59 +699,641 @@ def api_navigate():
     if not path_finder:
         return jsonify({"error": "Invalid algorithm"}), 400
 
-    path, distance, nodes_explored = path_finder(start_location, goal_location)
+    resolved, unknown = resolve_locations(start_location, goal_location)
+    if unknown:
+        return jsonify(unknown), 400
+    start_location, goal_location = resolved
 
-    if not path:
+    try:
+        options = search_options(algorithm, data)
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    alternatives = data.get('alternatives')
+    if alternatives is not None and (not isinstance(alternatives, int) or isinstance(alternatives, bool)
+                                     or not 1 <= alternatives <= MAX_ALTERNATIVES):
+        return jsonify({"error": f"alternatives must be a whole number from 1 to {MAX_ALTERNATIVES}"}), 400
+
+    want_timing = data.get('timing') or request.args.get('timing') == '1'
+    if data.get('stream') or request.args.get('stream') == '1':
+        if alternatives:
+            return jsonify({"error": "alternatives cannot be streamed"}), 400
+        return stream_route(algorithm, start_location, goal_location, options, want_timing)
+
+    # Alternatives ride in the options part of the key, so plain requests keep
+    # sharing entries with /api/navigate/batch.
+    key_options = tuple(options.items()) + ((('alternatives', alternatives),) if alternatives else ())
+    cache_key = route_cache_key(start_location, goal_location, algorithm, key_options)
+    cached = route_cache.get(cache_key)
+    cache_lookups.inc('miss' if cached is None else 'hit')
+    timing = {"cache": "hit"}
+    if cached is None:
+        generation = edit_generation
+        stats = search.SearchStats()
+        began = time.perf_counter()
+        try:
+            result = find_route(algorithm, start_location, goal_location, options, stats)
+        except search.DepthLimitReached as error:
+            return Response(depth_limited_body(error), status=404, mimetype='application/json')
+        routes = None
+        if alternatives and result[0]:
+            routes = alternative_routes(start_location, goal_location, alternatives, stats)
+        searched = time.perf_counter()
+        cached = cache_route(cache_key, generation, algorithm, start_location, goal_location, result, routes)
+        serialized = time.perf_counter()
+
+        search_seconds.observe(searched - began, algorithm)
+        serialize_seconds.observe(serialized - searched, algorithm)
+        for name, value in stats.as_dict().items():
+            search_effort[name].observe(value, algorithm)
+        timing = {
+            "cache": "miss",
+            "search_ms": round((searched - began) * 1000, 3),
+            "serialize_ms": round((serialized - searched) * 1000, 3),
+            **stats.as_dict(),
+        }
+
+    status, body = cached
+    if want_timing:
+        # The cached body is shared, so the timing block is spliced into this response only.
+        timing["handler_ms"] = round((time.perf_counter() - g.request_started) * 1000, 3)
+        body = body[:-1] + ',"timing":' + app.json.dumps(timing) + '}'
+    return Response(body, status=status, mimetype='application/json')
+
+def stream_route(algorithm, start, goal, options, want_timing=False):
+    """Streams a route as NDJSON for /api/navigate.
+
+    Long routes are what this mode is for, so it skips the route cache
+    rather than holding their whole rendered body there.
+    """
+    stats = search.SearchStats()
+    began = time.perf_counter()
+    try:
+        result = find_route(algorithm, start, goal, options, stats)
+    except search.DepthLimitReached as error:
+        return Response(depth_limited_body(error), status=404, mimetype='application/json')
+    searched = time.perf_counter()
+    search_seconds.observe(searched - began, algorithm)
+    for name, value in stats.as_dict().items():
+        search_effort[name].observe(value, algorithm)
+    if not result[0]:
+        return jsonify({"error": "No path found"}), 404
+    timing = None
+    if want_timing:
+        timing = {"cache": "bypass", "search_ms": round((searched - began) * 1000, 3), **stats.as_dict()}
+    # The body is rendered after the handler returns; stream_with_context keeps
+    # this request's MapState (see current_map) in reach until it is sent.
+    return Response(stream_with_context(route_stream(*result, timing=timing)), mimetype='application/x-ndjson')
+
+def depth_limited_body(error):
+    """Error body for a DLS or IDDFS search whose depth limit may have hidden the goal.
+
+    It is a 404 like "No path found", but says so with "depth_limited" and
+    the "max_depth" used, so the caller knows a larger one may succeed.
+    """
+    return app.json.dumps({"error": str(error), "depth_limited": True, "max_depth": error.max_depth,
+                           "nodes_explored": error.nodes_explored})
+
+def search_options(algorithm, query):
+    """Extra keyword arguments an algorithm takes from a request; raises ValueError on bad input."""
+    if algorithm == 'Fastest':
+        return {"depart_minute": departure_minute(query.get('depart_at'))}
+    if algorithm in ('DLS', 'IDDFS') and query.get('max_depth') is not None:
+        max_depth = query['max_depth']
+        if not isinstance(max_depth, int) or isinstance(max_depth, bool) or not 0 <= max_depth <= MAX_DEPTH_LIMIT:
+            raise ValueError(f"max_depth must be a whole number of corridors from 0 to {MAX_DEPTH_LIMIT}")
+        return {"max_depth": max_depth}
+    return {}
+
+# Upper bound on "alternatives" per /api/navigate request.
+MAX_ALTERNATIVES = int(os.environ.get('MAX_ALTERNATIVES', 10))
+
+# Upper bound on queries accepted by a single /api/navigate/batch call.
+MAX_BATCH_QUERIES = int(os.environ.get('MAX_BATCH_QUERIES', 10000))
+
+@app.route('/api/navigate/batch', methods=['POST'])
+def api_navigate_batch():
+    """Answers a list of (start, goal, algorithm) queries in one response.
+
+    Results come back in query order, each shaped like an /api/navigate
+    body. Unless a route table answers them, UCS queries that miss the
+    route cache are grouped by start, so one expansion (through the
+    building overlay when the map has buildings, as ucs() does) answers all
+    of that start's goals with the body /api/navigate would render.
+    """
+    data = request.json
+    queries = data.get('queries') if isinstance(data, dict) else data
+    if not isinstance(queries, list):
+        return jsonify({"error": "Expected a list of queries"}), 400
+    if len(queries) > MAX_BATCH_QUERIES:
+        return jsonify({"error": f"At most {MAX_BATCH_QUERIES} queries per batch"}), 400
+
+    m = current_map()
+    generation = edit_generation
+    bodies = [None] * len(queries)
+    ucs_groups = collections.defaultdict(list)
+    for i, query in enumerate(queries):
+        if isinstance(query, dict):
+            start, goal, algorithm = query.get('start'), query.get('goal'), query.get('algorithm')
+        elif isinstance(query, list) and len(query) == 3:
+            start, goal, algorithm = query
+        else:
+            start = goal = algorithm = None
+        if not (isinstance(algorithm, str) and algorithm
+                and all((isinstance(value, str) and value) or is_point(value) for value in (start, goal))):
+            bodies[i] = app.json.dumps({"error": "Missing parameters"})
+            continue
+        path_finder = algorithms.get(algorithm)
+        if not path_finder:
+            bodies[i] = app.json.dumps({"error": "Invalid algorithm"})
+            continue
+        resolved, unknown = resolve_locations(start, goal)
+        if unknown:
+            bodies[i] = app.json.dumps(unknown)
+            continue
+        start, goal = resolved
+        try:
+            options = search_options(algorithm, query if isinstance(query, dict) else {})
+        except ValueError as error:
+            bodies[i] = app.json.dumps({"error": str(error)})
+            continue
+
+        cache_key = route_cache_key(start, goal, algorithm, tuple(options.items()))
+        cached = route_cache.get(cache_key)
+        cache_lookups.inc('miss' if cached is None else 'hit')
+        if cached is not None:
+            bodies[i] = cached[1]
+        elif algorithm == 'UCS' and not m.route_table:
+            ucs_groups[start].append((i, goal, cache_key))
+        else:
+            try:
+                result = find_route(algorithm, start, goal, options)
+            except search.DepthLimitReached as error:
+                bodies[i] = depth_limited_body(error)
+                continue
+            bodies[i] = cache_route(cache_key, generation, algorithm, start, goal, result)[1]
+
+    search_many = m.building_overlay.route_many if m.building_overlay else search.ucs_many
+    for start, pending in ucs_groups.items():
+        results = m.graph.run_many(search_many, start, [goal for _, goal, _ in pending])
+        for i, goal, cache_key in pending:
+            bodies[i] = cache_route(cache_key, generation, 'UCS', start, goal, results[goal])[1]
+
+    # Bodies are already serialized, so the batch response is stitched together as text.
+    return Response('{"results":[' + ','.join(bodies) + ']}', mimetype='application/json')
+
+# Upper bound on stops in a single /api/tour call.
+MAX_TOUR_STOPS = int(os.environ.get('MAX_TOUR_STOPS', 50))
+
+@app.route('/api/tour', methods=['POST'])
+def api_tour():
+    """Plans one route through several stops, starting at the first.
+
+    Body: {"stops": [...], "optimize": true, "round_trip": false, "fixed_end": false}.
+    With "optimize" the stops after the first are reordered for the shortest
+    walk ("fixed_end" keeps the last one last); otherwise they are visited as
+    listed. The response is shaped like an /api/navigate body for the whole
+    stitched path, plus "stops" in visiting order, per-leg "legs" and the
+    "solver" that picked the order.
+    """
+    data = request.json
+    stops = data.get('stops') if isinstance(data, dict) else None
+    if not isinstance(stops, list) or len(stops) < 2 \
+            or not all((isinstance(stop, str) and stop) or is_point(stop) for stop in stops):
+        return jsonify({"error": "Expected a list of at least two stops"}), 400
+    if len(stops) > MAX_TOUR_STOPS:
+        return jsonify({"error": f"At most {MAX_TOUR_STOPS} stops per tour"}), 400
+    flags = {"optimize": data.get('optimize', True), "round_trip": data.get('round_trip', False),
+             "fixed_end": data.get('fixed_end', False)}
+    for name, value in flags.items():
+        if not isinstance(value, bool):
+            return jsonify({"error": f"{name} must be true or false"}), 400
+    stops, unknown = resolve_locations(*stops)
+    if unknown:
+        return jsonify(unknown), 400
+    graph = current_map().graph
+    stop_ids = [graph.node_id(stop) for stop in stops]
+
+    order, path, distance, leg_distances, nodes_explored, solver = tour.plan_tour(graph, stop_ids, **flags)
+    if path is None:
         return jsonify({"error": "No path found"}), 404
 
-    path_coords = [building_coords[loc] for loc in path if loc in building_coords]
-    
-    # Flip the y-coordinates for Leaflet's simple CRS
-    flipped_coords = [(x, -y) for x, y in path_coords]
-
-    # Create the detailed path with images and directions
-    path_details = []
-    for i in range(len(path)):
-        location = path[i]
-        next_location = None
-        direction = ""
-        
-        if i < len(path) - 1:
-            next_location = path[i+1]
-            edge = next((edge_dist for neighbor, edge_dist, _ in campus_graph.get(location, []) if neighbor == next_location), None)
-            if edge is not None:
-                direction = f"From {location}, walk {edge} meters to {next_location}."
-            else:
-                direction = f"From {location}, proceed to {next_location}."
-
-        path_details.append({
-            "location": location,
-            "image": location_images.get(location, None),
-            "direction": direction
-        })
-
-    return jsonify({
-        "path": path,
-        "path_coords": flipped_coords,
+    status, body = render_route(graph.path_names(path), as_number(distance), nodes_explored)
+    extra = app.json.dumps({
+        "stops": [stops[index] for index in order],
+        "legs": [{"from": stops[a], "to": stops[b], "distance": as_number(leg)}
+                 for a, b, leg in zip(order, order[1:], leg_distances)],
+        "solver": solver,
+    })
+    return Response(body[:-1] + ', ' + extra[1:], status=status, mimetype='application/json')
+
+def route_cache_key(start, goal, algorithm, options):
+    """Route cache key for /api/navigate and /api/navigate/batch.
+
+    Besides the query and graph version it names the UCS/A* backend (route
+    table, building overlay or flat graph): they agree on routes but not on
+    nodes_explored, so their bodies must not stand in for each other.
+    """
+    m = current_map()
+    backend = 'table' if m.route_table else 'buildings' if m.building_overlay else 'graph'
+    return (start, goal, algorithm, options, m.version, backend)
+
+def cache_put(cache, generation, key, status, body, meta):
+    """Stores a response computed from a search begun in edit ``generation``, if no edge has changed since.
+
+    Checked under edge_update_lock, so an entry is either stored before an
+    edge change (and invalidated by it) or not stored at all.
+    """
+    with edge_update_lock:
+        if generation == edit_generation:
+            cache.put(key, status, body, meta=meta)
+
+def cache_route(cache_key, generation, algorithm, start, goal, result, alternatives=None):
+    """Renders a search result, stores it in the route cache and returns (status, body).
+
+    The cache entry keeps the route as node IDs so edge updates can tell
+    whether it is affected. ``alternatives`` is alternative_routes() output
+    to list in the body; such entries are dropped on any edge change, since
+    the change may reorder routes other than the cached one.
+    """
+    cached = render_route(*result)
+    path, distance = result[0], result[1]
+    if alternatives is not None and path:
+        routes, nodes_explored = alternatives
+        bodies = [render_route(route, route_distance, nodes_explored)[1] for route, route_distance in routes]
+        cached = cached[0], cached[1][:-1] + ', "alternatives": [' + ', '.join(bodies) + ']}'
+        algorithm = algorithm + '+alternatives'
+    graph = current_map().graph
+    meta = (
+        algorithm,
+        graph.node_id(start),
+        graph.node_id(goal),
+        distance if path else INF,
+        [graph.node_id(location) for location in path] if path else None,
+    )
+    cache_put(route_cache, generation, cache_key, *cached, meta)
+    return cached
+
+def render_route(path, distance, nodes_explored, travel_minutes=None):
+    """Serializes a search result into (status, body) for the API and route cache."""
+    if not path:
+        return 404, app.json.dumps({"error": "No path found"})
+    return 200, ''.join(route_body_chunks(path, distance, nodes_explored, travel_minutes))
+
+def route_summary(distance, nodes_explored, travel_minutes=None):
+    return {
         "distance": round(distance, 2),
-        "time": calculate_time(distance),
+        "time": calculate_time(distance) if travel_minutes is None else travel_minutes,
         "nodes_explored": nodes_explored,
-        "path_details": path_details
-    })
+    }
+
+# Pre-rendered JSON pieces of each location's path_details entry, kept in
+# MapState.location_fragments and filled in as routes use them: rendering a
+# route then joins strings instead of building and encoding a dict per hop.
+# Only names, coordinates and images are baked in; hop distances come from
+# the live edge weights, so closing or reweighting an edge needs no
+# invalidation, and a reload starts a new table with its new MapState.
+
+def fragments_for(location):
+    """Returns (node ID, coords, direction head, direction tail, entry tail) for a location.
+
+    The last four are JSON text: a path_details entry for a hop X -> Y is
+    ``head(X) + step + tail(Y) + entry(X)``, where step is "walk N meters"
+    or "proceed".
+    """
+    m = current_map()
+    fragments = m.location_fragments.get(location)
+    if fragments is None:
+        node = m.graph.node_id(location)
+        quoted = app.json.dumps(location)
+        coords = m.coords.get(location)
+        fragments = (
+            node,
+            None if coords is None else app.json.dumps((coords[0], -coords[1])),  # y flipped for Leaflet's simple CRS
+            '{"direction": "From ' + quoted[1:-1] + ', ',
+            ' to ' + quoted[1:-1] + '."',
+            ', "image": ' + app.json.dumps(m.images.get(location, None)) + ', "location": ' + quoted + '}',
+        )
+        # Names outside the graph can only come from a request; keep them out of the table.
+        if node >= 0:
+            m.location_fragments[location] = fragments
+    return fragments
+
+def path_detail_chunks(path):
+    """Yields (coords, path_details entry) JSON text for each location of a path, in order."""
+    graph = current_map().graph
+    locations = iter(path)
+    node, coords, head, _, entry = fragments_for(next(locations))
+    for next_location in locations:
+        next_fragments = fragments_for(next_location)
+        next_node = next_fragments[0]
+        edge = graph.edge_weight(node, next_node) if node >= 0 and next_node >= 0 else INF
+        step = f"walk {as_number(edge)} meters" if edge != INF else "proceed"
+        yield coords, head + step + next_fragments[3] + entry
+        node, coords, head, _, entry = next_fragments
+    yield coords, '{"direction": ""' + entry
+
+def route_body_chunks(path, distance, nodes_explored, travel_minutes=None):
+    """Yields the /api/navigate body for a found path as JSON text pieces.
+
+    Same document as encoding the payload dict with app.json (sorted keys):
+    path, path_coords (y flipped), distance, time, nodes_explored and
+    path_details with an image and a direction per location.
+    """
+    summary = route_summary(distance, nodes_explored, travel_minutes)
+    details = list(path_detail_chunks(path))
+    yield '{"distance": ' + app.json.dumps(summary["distance"])
+    yield ', "nodes_explored": ' + app.json.dumps(nodes_explored)
+    yield ', "path": ' + app.json.dumps(path)
+    yield ', "path_coords": [' + ', '.join(coords for coords, _ in details if coords is not None) + ']'
+    yield ', "path_details": [' + ', '.join(entry for _, entry in details) + ']'
+    yield ', "time": ' + app.json.dumps(summary["time"]) + '}'
+
+def route_stream(path, distance, nodes_explored, travel_minutes=None, timing=None):
+    """Yields a found route as NDJSON: a summary line, then one line per location.
+
+    Each location line is its path_details entry plus its flipped "coords"
+    (null without coordinates). Lines are rendered as they are sent, so the
+    first byte does not wait for the whole route and no full body is held.
+    """
+    header = {**route_summary(distance, nodes_explored, travel_minutes), "locations": len(path)}
+    if timing is not None:
+        header["timing"] = timing
+    yield app.json.dumps(header) + '\n'
+    for coords, entry in path_detail_chunks(path):
+        yield '{"coords": ' + (coords or 'null') + ', ' + entry[1:] + '\n'
+
+@app.route('/api/edges', methods=['GET', 'POST'])
+def api_edges():
+    """Lists runtime edge changes (GET) or closes, reopens or reweights a corridor (POST).
+
+    POST body: {"action": "close" | "reopen" | "reweight", "from": ..., "to": ...,
+    "distance": meters (reweight only), "bidirectional": true}
+    """
+    if request.method == 'GET':
+        return jsonify([
+            {"from": source, "to": target, "distance": None if distance == INF else distance, "closed": distance == INF}
+            for (source, target), distance in edge_overrides.items()
+        ])
+
+    data = request.json or {}
+    action = data.get('action')
+    source_name, target_name = data.get('from'), data.get('to')
+    if not source_name or not target_name:
+        return jsonify({"error": "Missing parameters"}), 400
+    if action == 'close':
+        distance = INF
+    elif action == 'reopen':
+        distance = None
+    elif action == 'reweight':
+        distance = data.get('distance')
+        if not isinstance(distance, (int, float)) or isinstance(distance, bool) or not 0 <= distance < INF:
+            return jsonify({"error": "reweight needs a non-negative 'distance'"}), 400
+    else:
+        return jsonify({"error": "Invalid action"}), 400
+
+    directions = [(source_name, target_name)]
+    if data.get('bidirectional', True):
+        directions.append((target_name, source_name))
+    with shared_edge_edit():
+        results = [update_edge(source, target, distance) for source, target in directions]
+    results = [result for result in results if result is not None]
+    if not results:
+        return jsonify({"error": "No such edge"}), 404
+    return jsonify({"updates": results})
+
+# Budgets of /api/reachable are rounded down to whole buckets, so kiosks
+# asking for nearby budgets share cache entries. A budget under one bucket
+# is used as given, since rounding it up would list places out of reach.
+REACHABLE_BUCKET_MINUTES = float(os.environ.get('REACHABLE_BUCKET_MINUTES', 0.5))
+MAX_REACHABLE_MINUTES = float(os.environ.get('MAX_REACHABLE_MINUTES', 60))
+
+# Rendered /api/reachable responses, keyed on (start, budget in minutes, map version).
+reachability_cache = RouteCache(
+    max_entries=int(os.environ.get('REACHABILITY_CACHE_MAX_ENTRIES', 256)),
+    max_bytes=int(os.environ.get('REACHABILITY_CACHE_MAX_BYTES', 4 * 1024 * 1024)),
+)
+
+@app.route('/api/reachable')
+def api_reachable():
+    """Every location within a walking-time budget: GET /api/reachable?start=...&minutes=5.
+
+    One bounded Dijkstra from the start, at WALKING_SPEED_MPS, stops at the
+    budget. Locations come back by arrival time with their distance, time
+    (as calculate_time gives it) and flipped coords. "minutes" in the
+    response is the budget after rounding down to REACHABLE_BUCKET_MINUTES,
+    or as given when it is less than one bucket.
+    """
+    start = request.args.get('start')
+    try:
+        minutes = float(request.args.get('minutes', ''))
+    except ValueError:
+        minutes = -1
+    if not start:
+        return jsonify({"error": "Missing parameters"}), 400
+    if not 0 < minutes <= MAX_REACHABLE_MINUTES:
+        return jsonify({"error": f"minutes must be above 0 and at most {MAX_REACHABLE_MINUTES:g}"}), 400
+    resolved, unknown = resolve_locations(start)
+    if unknown:
+        return jsonify(unknown), 400
+    start = resolved[0]
+    m = current_map()
+    start_id = m.graph.node_id(start)
+
+    bucket = int(minutes / REACHABLE_BUCKET_MINUTES + 1e-9)
+    budget_minutes = bucket * REACHABLE_BUCKET_MINUTES if bucket else minutes
+    cache_key = (start, budget_minutes, m.version)
+    cached = reachability_cache.get(cache_key)
+    if cached is None:
+        generation = edit_generation
+        reached, nodes_explored = search.ucs_within(
+            m.graph, start_id, budget_minutes * 60 * WALKING_SPEED_MPS)
+        locations = []
+        for node, distance in reached:
+            name = m.graph.names[node]
+            coords = m.coords.get(name)
+            locations.append({
+                "location": name,
+                "distance": round(as_number(distance), 2),
+                "time": calculate_time(distance),
+                "coords": None if coords is None else [coords[0], -coords[1]],
+            })
+        body = app.json.dumps({"start": start, "minutes": budget_minutes, "nodes_explored": nodes_explored,
+                               "reachable": locations})
+        cached = (200, body)
+        cache_put(reachability_cache, generation, cache_key, *cached, {node for node, _ in reached})
+    return Response(cached[1], status=cached[0], mimetype='application/json')
+
+@app.route('/api/cache/stats')
+def api_cache_stats():
+    return jsonify(route_cache.stats())
+
+def building_entries():
+    """/api/buildings entries in map file order, built on first use: {node: (position, entry)}."""
+    m = current_map()
+    if not m.building_listing:
+        for position, (name, coords) in enumerate(m.coords.items()):
+            m.building_listing[m.graph.node_id(name)] = (position, {
+                "name": name,
+                "coords": [coords[0], -coords[1]],
+                "info": m.info.get(name, "No info available.")
+            })
+    return m.building_listing
+
+def parse_numbers(text, count):
+    """``count`` comma-separated finite numbers from ``text``; raises ValueError otherwise."""
+    values = [float(part) for part in (text or '').split(',')]
+    if len(values) != count or not all(math.isfinite(value) for value in values):
+        raise ValueError(text)
+    return values
 
 @app.route('/api/buildings')
 def api_buildings():
-    buildings = []
-    for name, coords in building_coords.items():
-        buildings.append({
-            "name": name,
-            "coords": [coords[0], -coords[1]],
-            "info": building_info.get(name, "No info available.")
-        })
-    return jsonify(buildings)
+    """Every location with coordinates, or with ?bbox=min_x,min_y,max_x,max_y only those inside the box.
+
+    The box is in the frame of the returned coords, so a map view can ask
+    for just what it shows.
+    """
+    bbox = request.args.get('bbox')
+    if bbox is None:
+        return send_payload(buildings_payload())
+    entries = building_entries()
+    try:
+        min_x, min_y, max_x, max_y = parse_numbers(bbox, 4)
+    except ValueError:
+        return jsonify({"error": "bbox must be min_x,min_y,max_x,max_y"}), 400
+    inside = sorted(entries[node] for node in current_map().spatial_index.within(min_x, -max_y, max_x, -min_y))
+    return jsonify([entry for _, entry in inside])
+
+def buildings_payload():
+    return cached_payload('buildings', lambda: app.json.response(
+        [entry for _, entry in building_entries().values()]).get_data())
+
+# On maps with at most this many locations the page filters its markers from
+# the versioned /api/buildings list, which browsers keep; on larger ones it
+# asks for the markers of each view. Its start and destination lists are
+# filled from the full list either way.
+FULL_LISTING_MAX_LOCATIONS = int(os.environ.get('FULL_LISTING_MAX_LOCATIONS', 2000))
+
+def graph_payload():
+    def render():
+        m = current_map()
+        spatial_index = m.spatial_index
+        listing = None
+        if len(spatial_index) <= FULL_LISTING_MAX_LOCATIONS:
+            listing = url_for('api_buildings', v=buildings_payload().etag)
+        bounds = None
+        if len(spatial_index):
+            bounds = [as_number(spatial_index.min_x), -as_number(spatial_index.max_y),
+                      as_number(spatial_index.max_x), -as_number(spatial_index.min_y)]
+        return app.json.response({
+            "version": m.version,
+            "locations": m.graph.node_count,
+            "edges": m.graph.edge_count,
+            "bounds": bounds,
+            "buildings": list(m.building_overlay.building_names),
+            "algorithms": sorted(algorithms),
+            "listing": listing,
+        }).get_data()
+    return cached_payload('graph', render)
+
+@app.route('/api/graph')
+def api_graph():
+    """Map metadata: version, size, coordinate bounds (in the /api/buildings frame), buildings and algorithms.
+
+    "listing" is the versioned URL of the full /api/buildings list, or null
+    when the map is too large for the page to filter markers from it.
+    """
+    return send_payload(graph_payload())
+
+# Upper bound on "k" for /api/nearest.
+MAX_NEAREST = int(os.environ.get('MAX_NEAREST', 50))
+
+def location_point(node, distance):
+    graph = current_map().graph
+    return {
+        "name": graph.names[node],
+        "coords": [as_number(graph.xs[node]), -as_number(graph.ys[node])],
+        "distance": round(distance, 2),
+    }
+
+@app.route('/api/nearest')
+def api_nearest():
+    """Locations nearest a point: GET /api/nearest?x=...&y=...&k=1&max_distance=...
+
+    x and y are in the frame of /api/buildings coords. Returns up to k
+    locations, nearest first, within max_distance meters when it is given.
+    """
+    try:
+        x, y = parse_numbers(f"{request.args.get('x')},{request.args.get('y')}", 2)
+    except ValueError:
+        return jsonify({"error": "x and y must be numbers"}), 400
+    k = request.args.get('k', '1')
+    if not k.isdigit() or not 1 <= int(k) <= MAX_NEAREST:
+        return jsonify({"error": f"k must be a whole number from 1 to {MAX_NEAREST}"}), 400
+    max_distance = request.args.get('max_distance')
+    if max_distance is not None:
+        try:
+            max_distance, = parse_numbers(max_distance, 1)
+        except ValueError:
+            max_distance = -1
+        if max_distance < 0:
+            return jsonify({"error": "max_distance must be a non-negative number"}), 400
+    found = current_map().spatial_index.nearest(x, -y, int(k), max_distance)
+    return jsonify({"x": x, "y": y, "nearest": [location_point(node, distance) for distance, node in found]})
+
+@app.route('/api/snap')
+def api_snap():
+    """The location a map click or GPS fix at ?x=...&y=... stands for (within SNAP_MAX_DISTANCE)."""
+    try:
+        x, y = parse_numbers(f"{request.args.get('x')},{request.args.get('y')}", 2)
+    except ValueError:
+        return jsonify({"error": "x and y must be numbers"}), 400
+    snapped = snap_point(x, y)
+    if snapped is None:
+        return jsonify({"error": f"No location within {SNAP_MAX_DISTANCE:g} m"}), 404
+    name, distance = snapped
+    return jsonify(location_point(current_map().graph.node_id(name), distance))
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Campus Navigation System Backend")
+    parser.add_argument('--precompute-routes', action='store_true',
+                        help="write the all-pairs route table to ROUTE_TABLE_PATH and exit")
+    parser.add_argument('--build-hierarchy', action='store_true',
+                        help="write the contraction hierarchy to HIERARCHY_PATH and exit")
+    parser.add_argument('--build-landmarks', action='store_true',
+                        help="write ALT landmark distance arrays to LANDMARKS_PATH and exit")
+    parser.add_argument('--vendor-assets', action='store_true',
+                        help="download Leaflet into static/vendor so the page works offline, and exit")
+    args = parser.parse_args()
+
+    if args.vendor_assets:
+        print(f"Leaflet {LEAFLET_VERSION} written to {vendor_assets()}")
+        sys.exit(0)
+
+    if args.precompute_routes or args.build_hierarchy or args.build_landmarks:
+        if args.precompute_routes:
+            build_route_table(map_state.graph, ROUTE_TABLE_PATH)
+            print(f"Route table for {map_state.graph.node_count} locations written to {ROUTE_TABLE_PATH}")
+        if args.build_hierarchy:
+            build_hierarchy(map_state.graph).save(HIERARCHY_PATH)
+            print(f"Contraction hierarchy for {map_state.graph.node_count} locations written to {HIERARCHY_PATH}")
+        if args.build_landmarks:
+            build_landmarks(map_state.graph).save(LANDMARKS_PATH)
+            print(f"Landmarks for {map_state.graph.node_count} locations written to {LANDMARKS_PATH}")
+        sys.exit(0)
+
     print("=====================================================")
     print("          Campus Navigation System Backend           ")
     print("=====================================================")
+    print(f"Campus map: {map_state.graph.node_count} locations from {CAMPUS_MAP_PATH}")
+    if map_state.route_table:
+        print(f"Serving UCS/A* from precomputed route table: {ROUTE_TABLE_PATH}")
+    if not map_state.hierarchy:
+        print(f"No contraction hierarchy at {HIERARCHY_PATH}; CH requests fall back to UCS.")
+    elif map_state.hierarchy.falls_back_to_ucs(map_state.graph):
+        print("The map has 0-length corridors; CH requests fall back to UCS.")
+    if not map_state.landmarks:
+        print(f"No landmark arrays at {LANDMARKS_PATH}; ALT requests fall back to UCS.")
+    print(leaflet_notice())
     app.run(debug=True)
@@ -0,0 +1,85 @@
+"""Production entry point for the Campus Navigation System backend.
+
+Runs app.py under gunicorn's pre-fork server instead of the single-threaded
+Werkzeug dev server:
+
+    python serve.py --workers 4 --threads 8 --search-processes 2
+
+The app (and with it the compiled campus graph, route table and other
+precomputed data) is imported once in the master process before workers
+fork, so every worker shares those read-only pages copy-on-write. Each
+worker handles requests on several threads, and searches on large graphs
+go to a per-worker process pool (see find_route in app.py), so one slow
+search never blocks the other kiosks.
+
+Every option can also come from the environment: NAV_BIND, NAV_WORKERS,
+NAV_THREADS, NAV_SEARCH_PROCESSES, NAV_OFFLOAD_MIN_NODES, NAV_TIMEOUT.
+
+Edge changes made through /api/edges reach every worker and search process
+through the shared edge state file (see EDGE_STATE_PATH in app.py).
+"""
+
+import argparse
+import gc
+import multiprocessing
+import os
+import sys
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Campus Navigation System production server")
+    parser.add_argument('--bind', default=os.environ.get('NAV_BIND', '0.0.0.0:8000'))
+    parser.add_argument('--workers', type=int,
+                        default=int(os.environ.get('NAV_WORKERS', multiprocessing.cpu_count())))
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('NAV_THREADS', 8)))
+    parser.add_argument('--search-processes', type=int,
+                        default=int(os.environ.get('NAV_SEARCH_PROCESSES', 2)),
+                        help="processes per worker for large-graph searches (0 keeps searches in-thread)")
+    parser.add_argument('--offload-min-nodes', type=int,
+                        default=int(os.environ.get('NAV_OFFLOAD_MIN_NODES', 5000)),
+                        help="only graphs with at least this many nodes use the search processes")
+    parser.add_argument('--timeout', type=int, default=int(os.environ.get('NAV_TIMEOUT', 60)))
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        sys.exit("serve.py needs gunicorn: pip install gunicorn")
+
+    # app.py reads these at import time.
+    os.environ['NAV_SEARCH_PROCESSES'] = str(args.search_processes)
+    os.environ['NAV_OFFLOAD_MIN_NODES'] = str(args.offload_min_nodes)
+    import app as navigation_app
+    # Render and compress the page, location listing and graph metadata once, here.
+    navigation_app.prepare_payloads()
+
+    # Move everything loaded so far out of the collector's reach, so workers
+    # don't dirty the shared pages just by running a GC pass over them.
+    gc.freeze()
+
+    class NavigationServer(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', args.bind)
+            self.cfg.set('workers', args.workers)
+            self.cfg.set('threads', args.threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('timeout', args.timeout)
+            self.cfg.set('preload_app', True)
+
+        def load(self):
+            return navigation_app.app
+
+    print("=====================================================")
+    print("          Campus Navigation System Backend           ")
+    print("=====================================================")
+    print(f"{args.workers} workers x {args.threads} threads on {args.bind}, "
+          f"{args.search_processes} search processes per worker")
+    print(navigation_app.leaflet_notice())
+    NavigationServer().run()
+
+
+if __name__ == "__main__":
+    main()
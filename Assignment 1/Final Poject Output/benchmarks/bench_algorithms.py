@@ -0,0 +1,224 @@
+"""Algorithm benchmark suite: BFS, DFS, UCS and A* on the real campus and synthetic graphs.
+
+For every graph and algorithm it reports p50/p99 query latency, mean
+nodes_explored, peak traced memory of one query, and path optimality
+relative to UCS (share of optimal answers and the mean/max cost ratio).
+The real campus is measured through the algorithm tables of both
+BOTBRAIN.py and app.py (app.py needs Flask; it is skipped without it).
+Synthetic graphs (grid, random geometric, scale-free) run the shared
+campusnav searches both entry points call.
+
+    python benchmarks/bench_algorithms.py --sizes 1000 10000 100000 --output results.json
+    python benchmarks/bench_algorithms.py --compare results.json   # exit 1 on regressions
+
+1M-node graphs work (--sizes 1000000) but need several GB of RAM and a
+few minutes to generate.
+"""
+
+import argparse
+import contextlib
+import datetime
+import gc
+import importlib.util
+import io
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from campusnav import CompiledGraph, search
+from synthetic_graphs import grid_graph, random_geometric_graph, scale_free_graph
+
+ALGORITHMS = ('BFS', 'DFS', 'UCS', 'A*')
+ENGINE_SEARCHES = {'BFS': search.bfs, 'DFS': search.dfs, 'UCS': search.ucs, 'A*': search.a_star}
+
+GENERATORS = {
+    'grid': lambda nodes, seed: grid_graph(max(2, round(math.sqrt(nodes))), max(2, round(math.sqrt(nodes))), seed=seed),
+    'geometric': lambda nodes, seed: random_geometric_graph(nodes, seed=seed),
+    'scale-free': lambda nodes, seed: scale_free_graph(nodes, seed=seed),
+}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def peak_memory(run, query):
+    gc.collect()
+    tracemalloc.start()
+    run(*query)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def measure(runners, queries):
+    """Runs every algorithm over ``queries``; ``runners`` maps name -> run(start, goal).
+
+    Returns one result dict per algorithm, with optimality against the UCS answers.
+    """
+    answers = {}
+    results = []
+    for name in ALGORITHMS:
+        run = runners[name]
+        latencies, explored, distances = [], [], []
+        for start, goal in queries:
+            began = time.perf_counter()
+            path, distance, nodes_explored = run(start, goal)
+            latencies.append(time.perf_counter() - began)
+            explored.append(nodes_explored)
+            distances.append(distance if path else None)
+        answers[name] = distances
+        latencies.sort()
+        results.append({
+            "algorithm": name,
+            "queries": len(queries),
+            "found": sum(distance is not None for distance in distances),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+            "mean_nodes_explored": round(sum(explored) / len(explored), 1),
+            "peak_kb": round(peak_memory(run, queries[0]) / 1024, 1),
+        })
+
+    for result in results:
+        ratios = [distance / optimum if optimum else 1.0
+                  for distance, optimum in zip(answers[result["algorithm"]], answers['UCS'])
+                  if distance is not None and optimum is not None]
+        result["optimal_fraction"] = round(sum(ratio <= 1 + 1e-9 for ratio in ratios) / len(ratios), 4) if ratios else None
+        result["mean_cost_ratio"] = round(sum(ratios) / len(ratios), 4) if ratios else None
+        result["max_cost_ratio"] = round(max(ratios), 4) if ratios else None
+    return results
+
+
+def load_entry_point(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def campus_results():
+    """All ordered location pairs of the real campus, through each entry point's own table."""
+    results = []
+    entry_points = [('BOTBRAIN.py', os.path.join(ROOT, 'BOTBRAIN.py')),
+                    ('app.py', os.path.join(ROOT, 'OUTPUT WITH FRONTEND', 'app.py'))]
+    for label, path in entry_points:
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                module = load_entry_point(path, f"bench_{label.replace('.', '_')}")
+        except ImportError as error:
+            print(f"skipping {label}: {error}")
+            continue
+        names = list(module.compiled_graph.names)
+        queries = [(start, goal) for start in names for goal in names if start != goal]
+
+        def quiet(function):
+            def run(start, goal):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    return function(start, goal)
+            return run
+        runners = {name: quiet(module.algorithms[name]) for name in ALGORITHMS}
+        for result in measure(runners, queries):
+            results.append({"graph": "campus", "entry_point": label,
+                            "nodes": module.compiled_graph.node_count,
+                            "edges": module.compiled_graph.edge_count, **result})
+    return results
+
+
+def synthetic_results(kind, nodes, query_count, seed):
+    graph_dict, coords = GENERATORS[kind](nodes, seed)
+    graph = CompiledGraph.from_dict(graph_dict, coords)
+    del graph_dict
+    rng = random.Random(seed)
+    queries = [(rng.randrange(graph.node_count), rng.randrange(graph.node_count)) for _ in range(query_count)]
+    runners = {name: (lambda search_function: lambda start, goal: search_function(graph, start, goal))(function)
+               for name, function in ENGINE_SEARCHES.items()}
+    return [{"graph": kind, "entry_point": "campusnav", "nodes": graph.node_count, "edges": graph.edge_count, **result}
+            for result in measure(runners, queries)]
+
+
+def result_key(result):
+    return (result["graph"], result["entry_point"], result["nodes"], result["algorithm"])
+
+
+def compare(baseline, results, tolerance):
+    """Lists regressions against a previous run: slower p50, more nodes explored, or worse paths."""
+    previous = {result_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None:
+            continue
+        label = "/".join(str(part) for part in result_key(result))
+        # Sub-quarter-millisecond differences are timer noise, whatever the ratio.
+        if result["p50_ms"] > old["p50_ms"] * tolerance and result["p50_ms"] - old["p50_ms"] > 0.25:
+            regressions.append(f"{label}: p50 {old['p50_ms']} -> {result['p50_ms']} ms")
+        if result["mean_nodes_explored"] > old["mean_nodes_explored"]:
+            regressions.append(f"{label}: nodes explored {old['mean_nodes_explored']} -> {result['mean_nodes_explored']}")
+        if (result["mean_cost_ratio"] or 1) > (old["mean_cost_ratio"] or 1) + 1e-9:
+            regressions.append(f"{label}: mean cost ratio {old['mean_cost_ratio']} -> {result['mean_cost_ratio']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="synthetic graph sizes in nodes (up to 1000000)")
+    parser.add_argument('--graphs', nargs='+', default=list(GENERATORS), choices=list(GENERATORS))
+    parser.add_argument('--queries', type=int, default=50, help="random start/goal pairs per synthetic graph")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-campus', action='store_true', help="skip the real campus map")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--compare', help="previous JSON results to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help="allowed p50 slowdown factor before --compare flags a regression")
+    args = parser.parse_args()
+
+    results = [] if args.no_campus else campus_results()
+    for kind in args.graphs:
+        for nodes in args.sizes:
+            print(f"generating {kind} graph with {nodes} nodes...", file=sys.stderr)
+            results.extend(synthetic_results(kind, nodes, args.queries, args.seed))
+
+    print(f"{'graph':11} {'entry':11} {'nodes':>8} {'alg':4} {'p50 ms':>10} {'p99 ms':>10} "
+          f"{'explored':>10} {'peak KB':>9} {'optimal':>8} {'cost x':>7}")
+    for result in results:
+        print(f"{result['graph']:11} {result['entry_point']:11} {result['nodes']:>8} {result['algorithm']:4} "
+              f"{result['p50_ms']:>10} {result['p99_ms']:>10} {result['mean_nodes_explored']:>10} "
+              f"{result['peak_kb']:>9} {result['optimal_fraction']!s:>8} {result['mean_cost_ratio']!s:>7}")
+
+    if args.output:
+        report = {
+            "meta": {
+                "timestamp": datetime.datetime.now().isoformat(timespec='seconds'),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "queries": args.queries,
+                "seed": args.seed,
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
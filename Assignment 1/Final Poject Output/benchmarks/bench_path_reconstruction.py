@@ -0,0 +1,133 @@
+"""Regression benchmark: predecessor-map searches vs. per-push path copies.
+
+Runs on a synthetic ~50k-node grid and compares wall time, peak traced
+memory and garbage-collector activity. Exits non-zero if the engine's
+searches allocate more than the legacy path-copying versions.
+
+    python benchmarks/bench_path_reconstruction.py [--side 224]
+"""
+
+import argparse
+import collections
+import gc
+import heapq
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from campusnav import CompiledGraph, search
+from synthetic_graphs import grid_graph
+
+
+# --- Legacy searches: the pre-predecessor-map versions, kept for comparison ---
+
+def legacy_bfs(graph, start, goal):
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    queue = collections.deque([(start, [start], 0)])
+    visited = {start}
+    nodes_explored = 0
+    while queue:
+        nodes_explored += 1
+        current_node, path, distance = queue.popleft()
+        if current_node == goal:
+            return path, distance, nodes_explored
+        for edge in range(offsets[current_node], offsets[current_node + 1]):
+            neighbor = targets[edge]
+            if neighbor not in visited:
+                visited.add(neighbor)
+                queue.append((neighbor, path + [neighbor], distance + weights[edge]))
+    return None, 0, nodes_explored
+
+
+def legacy_ucs(graph, start, goal):
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    priority_queue = [(0, start, [start])]
+    visited_costs = {start: 0}
+    nodes_explored = 0
+    while priority_queue:
+        nodes_explored += 1
+        cost, current_node, path = heapq.heappop(priority_queue)
+        if current_node == goal:
+            return path, cost, nodes_explored
+        for edge in range(offsets[current_node], offsets[current_node + 1]):
+            neighbor = targets[edge]
+            new_cost = cost + weights[edge]
+            if neighbor not in visited_costs or new_cost < visited_costs[neighbor]:
+                visited_costs[neighbor] = new_cost
+                heapq.heappush(priority_queue, (new_cost, neighbor, path + [neighbor]))
+    return None, 0, nodes_explored
+
+
+def legacy_a_star(graph, start, goal):
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    heuristic = search.euclidean_distance
+    priority_queue = [(heuristic(graph, start, goal), 0, start, [start])]
+    visited_costs = {start: 0}
+    nodes_explored = 0
+    while priority_queue:
+        nodes_explored += 1
+        f_cost, g_cost, current_node, path = heapq.heappop(priority_queue)
+        if current_node == goal:
+            return path, g_cost, nodes_explored
+        for edge in range(offsets[current_node], offsets[current_node + 1]):
+            neighbor = targets[edge]
+            new_g_cost = g_cost + weights[edge]
+            if neighbor not in visited_costs or new_g_cost < visited_costs[neighbor]:
+                visited_costs[neighbor] = new_g_cost
+                new_f_cost = new_g_cost + heuristic(graph, neighbor, goal)
+                heapq.heappush(priority_queue, (new_f_cost, new_g_cost, neighbor, path + [neighbor]))
+    return None, 0, nodes_explored
+
+
+# --- Measurement ---
+
+def measure(function, graph, start, goal):
+    """Returns (result, seconds, peak_bytes, gc_collections) for one search."""
+    gc.collect()
+    collections_before = sum(stat['collections'] for stat in gc.get_stats())
+    began = time.perf_counter()
+    result = function(graph, start, goal)
+    seconds = time.perf_counter() - began
+    collections_after = sum(stat['collections'] for stat in gc.get_stats())
+
+    # Peak memory is taken on a second run so tracing overhead stays out of the timing.
+    gc.collect()
+    tracemalloc.start()
+    function(graph, start, goal)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak, collections_after - collections_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--side', type=int, default=224, help="grid side length (224 -> ~50k nodes)")
+    args = parser.parse_args()
+
+    graph_dict, coords = grid_graph(args.side, args.side)
+    graph = CompiledGraph.from_dict(graph_dict, coords)
+    start = graph.node_id("g0_0")
+    goal = graph.node_id(f"g{args.side - 1}_{args.side - 1}")
+    print(f"Grid: {graph.node_count} nodes, {graph.edge_count} edges")
+
+    failed = False
+    pairs = [('BFS', legacy_bfs, search.bfs), ('UCS', legacy_ucs, search.ucs), ('A*', legacy_a_star, search.a_star)]
+    for label, legacy, current in pairs:
+        old_result, old_time, old_peak, old_gc = measure(legacy, graph, start, goal)
+        new_result, new_time, new_peak, new_gc = measure(current, graph, start, goal)
+        print(f"{label:4} legacy : {old_time * 1000:8.1f} ms  peak {old_peak / 1e6:7.2f} MB  gc runs {old_gc}")
+        print(f"{label:4} parents: {new_time * 1000:8.1f} ms  peak {new_peak / 1e6:7.2f} MB  gc runs {new_gc}")
+        if old_result[1] != new_result[1]:
+            print(f"  REGRESSION: {label} distance changed ({old_result[1]} -> {new_result[1]})")
+            failed = True
+        if new_peak > old_peak:
+            print(f"  REGRESSION: {label} peak memory grew")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
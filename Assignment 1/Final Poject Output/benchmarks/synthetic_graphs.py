@@ -0,0 +1,89 @@
+import math
+import random
+
+# ====================================================================
+# SYNTHETIC GRAPH GENERATORS FOR BENCHMARKS
+# =====================================================================
+
+# Generators return (graph, coords) in the same shape as campus_graph and
+# building_coords, so they can be fed straight into CompiledGraph.from_dict.
+
+
+def grid_graph(width, height, spacing=10, seed=0):
+    """A width x height walking grid with slightly jittered edge lengths."""
+    rng = random.Random(seed)
+    graph = {}
+    coords = {}
+    for row in range(height):
+        for col in range(width):
+            name = f"g{row}_{col}"
+            coords[name] = (col * spacing, row * spacing)
+            graph[name] = []
+    for row in range(height):
+        for col in range(width):
+            name = f"g{row}_{col}"
+            for d_row, d_col in ((0, 1), (1, 0)):
+                n_row, n_col = row + d_row, col + d_col
+                if n_row < height and n_col < width:
+                    neighbor = f"g{n_row}_{n_col}"
+                    dist = spacing + rng.randint(0, spacing // 2)
+                    graph[name].append((neighbor, dist, 1.0))
+                    graph[neighbor].append((name, dist, 1.0))
+    return graph, coords
+
+
+def random_geometric_graph(node_count, average_degree=6, size=1000.0, seed=0):
+    """Nodes scattered uniformly over a size x size square, linked to every neighbour within
+    the radius that gives ``average_degree``; edge length is the straight-line distance."""
+    rng = random.Random(seed)
+    radius = size * math.sqrt(average_degree / (math.pi * node_count))
+    coords = {f"r{i}": (rng.uniform(0, size), rng.uniform(0, size)) for i in range(node_count)}
+    graph = {name: [] for name in coords}
+
+    # Bucket points into radius-sized cells so only neighbouring cells are compared.
+    cells = {}
+    for name, (x, y) in coords.items():
+        cells.setdefault((int(x // radius), int(y // radius)), []).append(name)
+    for (cell_x, cell_y), names in cells.items():
+        for d_x, d_y in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+            others = cells.get((cell_x + d_x, cell_y + d_y))
+            if not others:
+                continue
+            for i, name in enumerate(names):
+                x, y = coords[name]
+                for other in (others[i + 1:] if (d_x, d_y) == (0, 0) else others):
+                    dist = math.hypot(coords[other][0] - x, coords[other][1] - y)
+                    if dist <= radius:
+                        graph[name].append((other, dist, 1.0))
+                        graph[other].append((name, dist, 1.0))
+    return graph, coords
+
+
+def scale_free_graph(node_count, edges_per_node=3, size=1000.0, seed=0):
+    """Barabasi-Albert preferential attachment: a few hub nodes with very high degree.
+
+    Nodes get random coordinates and each edge is at least as long as the
+    straight line between its ends, so the Euclidean A* heuristic stays admissible.
+    """
+    rng = random.Random(seed)
+    coords = {f"s{i}": (rng.uniform(0, size), rng.uniform(0, size)) for i in range(node_count)}
+    names = list(coords)
+    graph = {name: [] for name in names}
+    # Every edge end is listed once, so a uniform pick is proportional to degree.
+    endpoints = []
+    for node in range(node_count):
+        name = names[node]
+        if node <= edges_per_node:
+            chosen = set(range(node))
+        else:
+            chosen = set()
+            while len(chosen) < edges_per_node:
+                chosen.add(rng.choice(endpoints))
+        for other in chosen:
+            other_name = names[other]
+            (x1, y1), (x2, y2) = coords[name], coords[other_name]
+            dist = math.hypot(x2 - x1, y2 - y1) * rng.uniform(1.0, 1.3)
+            graph[name].append((other_name, dist, 1.0))
+            graph[other_name].append((name, dist, 1.0))
+            endpoints.extend((node, other))
+    return graph, coords
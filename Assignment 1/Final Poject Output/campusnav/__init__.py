@@ -0,0 +1,4 @@
+"""Shared routing engine for the campus navigation bot and web backend."""
+
+from campusnav.graph import INF, CompiledGraph
+from campusnav import search, tour, updates
@@ -0,0 +1,190 @@
+import heapq
+
+from campusnav.graph import INF
+from campusnav.search import _cost_array, _parent_array, _rebuild_path, _record, euclidean_distance
+
+# ====================================================================
+# TWO-LEVEL (OUTDOOR / INDOOR) ROUTING
+# =====================================================================
+
+# Indoor locations (rooms, corridors, lifts and stairs of a building) sit in
+# the same CompiledGraph as the outdoors, tagged with a building. The
+# outdoor locations they have edges to or from are that building's portals
+# (entrances and exits). For each building the shortest indoor walk between
+# every pair of its portals is computed once, and searches use those
+# portal-to-portal shortcuts instead of expanding the building's indoor
+# locations, unless the start or goal is inside that building. A
+# cross-campus query therefore costs the same however detailed the floor
+# plans are.
+#
+# Every route through a building enters and leaves by portals and is at
+# least as long as the shortcut between them, so distances match a search
+# of the full graph exactly; the shortcut's indoor walk is put back into
+# the returned path.
+
+
+class BuildingOverlay:
+    """Portal shortcuts for the buildings of a CompiledGraph.
+
+    ``building_of[node]`` is the node's building index, or -1 outdoors;
+    ``building_names`` lists the buildings by index. A building's shortcut
+    table is built on first use and rebuilt after ``edge_changed`` touches it.
+    """
+
+    def __init__(self, graph, building_of, building_names):
+        self.graph = graph
+        self.building_of = building_of
+        self.building_names = list(building_names)
+        self.portals = [set() for _ in self.building_names]
+        if self.building_names:
+            for node in range(graph.node_count):
+                building = building_of[node]
+                for edge in range(graph.offsets[node], graph.offsets[node + 1]):
+                    other = building_of[graph.targets[edge]]
+                    if building >= 0 and other < 0:
+                        self.portals[building].add(graph.targets[edge])
+                    elif building < 0 and other >= 0:
+                        self.portals[other].add(node)
+        # portal node -> buildings it opens into
+        self.portal_buildings = {}
+        for building, portals in enumerate(self.portals):
+            for portal in portals:
+                self.portal_buildings.setdefault(portal, []).append(building)
+        self._shortcuts = [None] * len(self.building_names)
+
+    @classmethod
+    def from_store(cls, store):
+        return cls(store.graph, store.building_of, store.building_names)
+
+    def __bool__(self):
+        return bool(self.building_names)
+
+    def edge_changed(self, source, target):
+        """Drops the shortcut tables of buildings an edge change could affect."""
+        for node in (source, target):
+            building = self.building_of[node]
+            if building >= 0:
+                self._shortcuts[building] = None
+
+    def shortcuts(self, building):
+        """{portal: [(other_portal, distance, indoor_path), ...]} for one building.
+
+        indoor_path is the walk's inner locations, without the two portals.
+        """
+        table = self._shortcuts[building]
+        if table is None:
+            table = {portal: self._walks_from(portal, building) for portal in self.portals[building]}
+            self._shortcuts[building] = table
+        return table
+
+    def _walks_from(self, portal, building):
+        """Dijkstra from ``portal`` through ``building``'s indoor locations to its other portals."""
+        graph, building_of = self.graph, self.building_of
+        costs = {portal: 0}
+        parents = {portal: -1}
+        priority_queue = [(0, portal)]
+        walks = []
+        while priority_queue:
+            cost, node = heapq.heappop(priority_queue)
+            if cost > costs[node]:
+                continue
+            if node != portal and building_of[node] < 0:
+                # Another portal: record the walk, but do not leave the building through it.
+                walks.append((node, cost, _rebuild_path(parents, node)[1:-1]))
+                continue
+            for edge in range(graph.offsets[node], graph.offsets[node + 1]):
+                neighbor = graph.targets[edge]
+                # Portal to portal directly is an outdoor edge, not a walk through the building.
+                if building_of[neighbor] != building and (node == portal or neighbor not in self.portals[building]):
+                    continue
+                new_cost = cost + graph.weights[edge]
+                if new_cost < costs.get(neighbor, INF):
+                    costs[neighbor] = new_cost
+                    parents[neighbor] = node
+                    heapq.heappush(priority_queue, (new_cost, neighbor))
+        return walks
+
+    def route(self, graph, start, goal, heuristic=None, stats=None):
+        """UCS (or A* with a consistent ``heuristic(node)``) from ``start`` to ``goal`` over the two levels.
+
+        Only the buildings containing the start or goal are searched indoors.
+        Returns (path_of_ids, distance, nodes_explored) like the searches in search.py.
+        """
+        return self._search(graph, start, {goal}, heuristic, stats)[goal]
+
+    def route_many(self, graph, start, goals):
+        """``route`` from ``start`` to every goal in ``goals``, one expansion per building the goals are in.
+
+        Returns {goal: (path_of_ids, distance, nodes_explored)}. Goals in the
+        same building open the same buildings, so one UCS expansion pops
+        nodes in the order each separate ``route`` call would, and every goal
+        gets the same result, as with search.ucs_many.
+        """
+        groups = {}
+        for goal in goals:
+            groups.setdefault(self.building_of[goal], set()).add(goal)
+        results = {}
+        for pending in groups.values():
+            results.update(self._search(graph, start, pending))
+        return results
+
+    def _search(self, graph, start, goals, heuristic=None, stats=None):
+        """The expansion behind ``route`` and ``route_many``; stops once every goal is popped."""
+        offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+        building_of = self.building_of
+        opened = {building_of[start]} | {building_of[goal] for goal in goals}
+        estimate = heuristic or (lambda node: 0)
+        pending = set(goals)
+        results = {}
+        priority_queue = [(estimate(start), 0, start)]
+        visited_costs = _cost_array(graph)
+        visited_costs[start] = 0
+        parents = _parent_array(graph)
+        parents[start] = -1
+        walks = {}  # node -> indoor walk of the shortcut that last improved it
+        nodes_explored = 0
+        peak_frontier = 0
+        while priority_queue:
+            nodes_explored += 1
+            _, cost, current_node = heapq.heappop(priority_queue)
+            if current_node in pending:
+                pending.discard(current_node)
+                results[current_node] = (self._unpack(_rebuild_path(parents, current_node), walks),
+                                         cost, nodes_explored)
+                if not pending:
+                    break
+            if cost > visited_costs[current_node]:
+                continue
+            moves = [(targets[edge], weights[edge], None)
+                     for edge in range(offsets[current_node], offsets[current_node + 1])
+                     if building_of[targets[edge]] < 0 or building_of[targets[edge]] in opened]
+            for building in self.portal_buildings.get(current_node, ()):
+                if building not in opened:
+                    moves.extend(self.shortcuts(building).get(current_node, ()))
+            for neighbor, weight, walk in moves:
+                new_cost = cost + weight
+                if new_cost < visited_costs[neighbor]:
+                    visited_costs[neighbor] = new_cost
+                    parents[neighbor] = current_node
+                    if walk:
+                        walks[neighbor] = walk
+                    else:
+                        walks.pop(neighbor, None)
+                    heapq.heappush(priority_queue, (new_cost + estimate(neighbor), new_cost, neighbor))
+            peak_frontier = max(peak_frontier, len(priority_queue))
+        _record(stats, nodes_explored, len(priority_queue), peak_frontier)
+        for goal in pending:
+            results[goal] = (None, 0, nodes_explored)
+        return results
+
+    def a_star(self, graph, start, goal, stats=None):
+        """``route`` guided by straight-line distance, as search.a_star."""
+        return self.route(graph, start, goal, lambda node: euclidean_distance(graph, node, goal), stats)
+
+    @staticmethod
+    def _unpack(path, walks):
+        full = [path[0]]
+        for node in path[1:]:
+            full.extend(walks.get(node, ()))
+            full.append(node)
+        return full
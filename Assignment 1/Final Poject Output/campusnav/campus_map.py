@@ -0,0 +1,172 @@
+import json
+import math
+import os
+import sys
+import zlib
+
+from campusnav.graph import CompiledGraph
+from campusnav.graph_store import GraphStore, pack_graph_store, write_graph_store
+
+# ====================================================================
+# CAMPUS MAP FILES: TEXT SOURCE AND COMPILED BINARY
+# =====================================================================
+
+# The text source (campus_map.json) is the one copy of the campus that
+# people edit, shared by BOTBRAIN.py and the web backend:
+#     {"locations": [{"name": ..., "coords": [x, y], "info": ..., "image": ...,
+#                     "building": ..., "floor": ..., "aliases": [...]}, ...],
+#      "edges": [[from, to, distance_m, speed_factor], ...]}
+# Edges are directed. Each location's edges keep their listed order, which
+# is the neighbour order BFS and DFS explore in; locations keep their listed
+# order in building listings.
+#
+# Locations with a "building" are indoors (rooms, corridors, lifts, stairs,
+# with an optional "floor" label); every other location is outdoors. Indoor
+# locations may only have edges within their own building or to outdoor
+# locations, which become that building's entrances (see buildings.py).
+#
+# "aliases" lists other names people use for a location ("AB1", "Canteen");
+# they are matched by the name resolver (see names.py) and must not repeat a
+# location name or another location's alias.
+#
+# The compiled form is a graph store (see graph_store.py) stamped with the
+# CRC32 of the source text and written next to it. load_map maps that file
+# when the stamp matches and recompiles from the text otherwise.
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def parse_map(text):
+    """Parses and validates map source text into (graph, coords, info, images, places, aliases) dicts.
+
+    ``places`` maps each indoor location to its (building, floor) pair, with
+    floor "" when none is given; ``aliases`` maps locations to their alias lists.
+
+    Raises ValueError listing every problem found, including edges to
+    undeclared locations and locations that no edge touches.
+    """
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as error:
+        raise ValueError(f"campus map is not valid JSON: {error}") from None
+    if not isinstance(data, dict):
+        raise ValueError("campus map must be a JSON object with 'locations' and 'edges'")
+
+    problems = []
+    graph, coords, info, images, places, aliases = {}, {}, {}, {}, {}, {}
+    for index, location in enumerate(data.get('locations', [])):
+        name = location.get('name') if isinstance(location, dict) else None
+        if not isinstance(name, str) or not name:
+            problems.append(f"location #{index + 1} has no name")
+            continue
+        if name in graph:
+            problems.append(f"location {name!r} is declared twice")
+            continue
+        graph[name] = []
+        if 'coords' in location:
+            point = location['coords']
+            if isinstance(point, list) and len(point) == 2 and all(_is_number(value) for value in point):
+                coords[name] = tuple(point)
+            else:
+                problems.append(f"location {name!r} has malformed coords {point!r}")
+        for field, target in (('info', info), ('image', images)):
+            if field in location:
+                if isinstance(location[field], str):
+                    target[name] = location[field]
+                else:
+                    problems.append(f"location {name!r} has a non-text {field}")
+        building, floor = location.get('building'), location.get('floor', "")
+        if building is not None and (not isinstance(building, str) or not building):
+            problems.append(f"location {name!r} has a malformed building {building!r}")
+        elif not isinstance(floor, str):
+            problems.append(f"location {name!r} has a non-text floor")
+        elif building is not None:
+            places[name] = (building, floor)
+        elif floor:
+            problems.append(f"location {name!r} has a floor but no building")
+        if 'aliases' in location:
+            names = location['aliases']
+            if isinstance(names, list) and all(isinstance(alias, str) and alias.strip() and "\n" not in alias
+                                               for alias in names):
+                aliases[name] = names
+            else:
+                problems.append(f"location {name!r} has malformed aliases {names!r}")
+
+    alias_owner = {}
+    for name, names in aliases.items():
+        for alias in names:
+            if alias in graph:
+                problems.append(f"alias {alias!r} of {name!r} is already a location name")
+            elif alias_owner.setdefault(alias, name) != name:
+                problems.append(f"alias {alias!r} is claimed by {alias_owner[alias]!r} and {name!r}")
+
+    for index, edge in enumerate(data.get('edges', [])):
+        if not isinstance(edge, list) or len(edge) not in (3, 4):
+            problems.append(f"edge #{index + 1} is not [from, to, distance, speed_factor]")
+            continue
+        source, target, distance = edge[:3]
+        speed_factor = edge[3] if len(edge) == 4 else 1.0
+        edge_problems = [f"edge {source!r} -> {target!r} references unknown location {endpoint!r}"
+                         for endpoint in (source, target) if not isinstance(endpoint, str) or endpoint not in graph]
+        if not _is_number(distance) or distance < 0:
+            edge_problems.append(f"edge {source!r} -> {target!r} has invalid distance {distance!r}")
+        if not _is_number(speed_factor) or speed_factor <= 0:
+            edge_problems.append(f"edge {source!r} -> {target!r} has invalid speed_factor {speed_factor!r}")
+        if not edge_problems and source in places and target in places \
+                and places[source][0] != places[target][0]:
+            edge_problems.append(f"edge {source!r} -> {target!r} joins two buildings; "
+                                 "connect them through an outdoor location")
+        if edge_problems:
+            problems.extend(edge_problems)
+            continue
+        graph[source].append((target, distance, speed_factor))
+
+    connected = {name for name, edges in graph.items() if edges}
+    connected.update(target for edges in graph.values() for target, _, _ in edges)
+    problems.extend(f"location {name!r} has no edges" for name in graph if name not in connected)
+
+    if problems:
+        raise ValueError("invalid campus map:\n  " + "\n  ".join(problems))
+    return graph, coords, info, images, places, aliases
+
+
+def compiled_path_for(source_path):
+    return os.path.splitext(source_path)[0] + ".bin"
+
+
+def load_map(source_path, compiled_path=None):
+    """Loads a campus map as a GraphStore (graph, coords, info, images, places, aliases).
+
+    Maps the compiled file when it was built from this exact source text;
+    otherwise parses the source, writes a fresh compiled file and maps
+    that. If the compiled file cannot be written the map is served from
+    memory instead.
+    """
+    compiled_path = compiled_path or compiled_path_for(source_path)
+    with open(source_path, "rb") as f:
+        source = f.read()
+    checksum = zlib.crc32(source)
+    store = GraphStore.open(compiled_path, checksum)
+    if store:
+        return store
+
+    graph, coords, info, images, places, aliases = parse_map(source.decode("utf-8"))
+    compiled = CompiledGraph.from_dict(graph, coords)
+    try:
+        write_graph_store(compiled_path, compiled, coords, info, images, checksum, places, aliases)
+    except OSError:
+        return GraphStore.from_buffer(pack_graph_store(compiled, coords, info, images, checksum, places, aliases))
+    return GraphStore.open(compiled_path, checksum)
+
+
+if __name__ == "__main__":
+    # python -m campusnav.campus_map campus_map.json  -> validates and compiles
+    for path in sys.argv[1:]:
+        try:
+            campus_map = load_map(path)
+        except ValueError as error:
+            sys.exit(f"{path}: {error}")
+        print(f"{path}: {campus_map.graph.node_count} locations, {campus_map.graph.edge_count} edges "
+              f"-> {compiled_path_for(path)}")
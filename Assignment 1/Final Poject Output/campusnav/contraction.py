@@ -0,0 +1,431 @@
+import heapq
+import logging
+import os
+import struct
+from array import array
+
+from campusnav.graph import INF
+from campusnav.search import _record, ucs
+
+# ====================================================================
+# CONTRACTION HIERARCHIES
+# =====================================================================
+
+# Preprocessing contracts nodes one at a time (cheapest first by edge
+# difference), adding a shortcut u -> w through v whenever no witness path
+# u ~> w avoiding v is at least as short. Every node keeps the edges it
+# still had to higher-ranked nodes when it was contracted:
+#   upward forward edges   v -> w   with rank[w] > rank[v]
+#   upward backward edges  u -> v   with rank[u] > rank[v], stored at v
+# A query is a bidirectional Dijkstra that only ever climbs in rank, and
+# each shortcut remembers its middle node so the path can be unpacked.
+#
+# Where several routes tie for shortest, the unpacked one may differ from
+# the route ucs returns, so it is then walked back from the goal and
+# corrected hop by hop to ucs's choice (see _ucs_path).
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"CNCH"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sIQQQI4x")
+
+# Witness searches give up after settling this many nodes; a missed witness
+# only costs an unnecessary shortcut, never a wrong answer.
+WITNESS_SETTLE_LIMIT = 64
+
+
+def _witness_costs(out_edges, source, skipped, max_cost):
+    """Bounded Dijkstra from ``source`` in the remaining graph, never entering ``skipped``."""
+    costs = {source: 0}
+    priority_queue = [(0, source)]
+    settled = 0
+    while priority_queue:
+        cost, current_node = heapq.heappop(priority_queue)
+        if cost > costs[current_node]:
+            continue
+        if cost > max_cost or settled >= WITNESS_SETTLE_LIMIT:
+            break
+        settled += 1
+        for neighbor, (edge_cost, _) in out_edges[current_node].items():
+            if neighbor == skipped:
+                continue
+            new_cost = cost + edge_cost
+            if new_cost < costs.get(neighbor, INF):
+                costs[neighbor] = new_cost
+                heapq.heappush(priority_queue, (new_cost, neighbor))
+    return costs
+
+
+def _needed_shortcuts(out_edges, in_edges, node):
+    """Returns the (u, w, cost) shortcuts that contracting ``node`` would require."""
+    shortcuts = []
+    if not out_edges[node]:
+        return shortcuts
+    max_out = max(edge_cost for edge_cost, _ in out_edges[node].values())
+    for source, (in_cost, _) in in_edges[node].items():
+        witness = _witness_costs(out_edges, source, node, in_cost + max_out)
+        for target, (out_cost, _) in out_edges[node].items():
+            if target == source:
+                continue
+            via_node = in_cost + out_cost
+            if witness.get(target, INF) > via_node:
+                shortcuts.append((source, target, via_node))
+    return shortcuts
+
+
+def _to_csr(node_count, rows):
+    """Packs per-node [(other, cost, middle), ...] lists into offset/other/cost/middle arrays."""
+    offsets = array('q', [0])
+    others = array('i')
+    costs = array('d')
+    middles = array('i')
+    for node in range(node_count):
+        for other, cost, middle in rows[node]:
+            others.append(other)
+            costs.append(cost)
+            middles.append(middle)
+        offsets.append(len(others))
+    return offsets, others, costs, middles
+
+
+def build_hierarchy(graph):
+    """Orders and contracts every node of ``graph``; returns a ContractionHierarchy."""
+    node_count = graph.node_count
+    # Remaining graph as {neighbor: (cost, middle)}; parallel edges keep the cheapest.
+    out_edges = [{} for _ in range(node_count)]
+    in_edges = [{} for _ in range(node_count)]
+    for node in range(node_count):
+        for edge in range(graph.offsets[node], graph.offsets[node + 1]):
+            target = graph.targets[edge]
+            cost = graph.weights[edge]
+            if target == node or cost == INF:
+                continue
+            if cost < out_edges[node].get(target, (INF, -1))[0]:
+                out_edges[node][target] = (cost, -1)
+                in_edges[target][node] = (cost, -1)
+
+    contracted_neighbors = [0] * node_count
+
+    def priority(node):
+        shortcuts = _needed_shortcuts(out_edges, in_edges, node)
+        edge_difference = len(shortcuts) - len(out_edges[node]) - len(in_edges[node])
+        return edge_difference + contracted_neighbors[node], shortcuts
+
+    priority_queue = [(priority(node)[0], node) for node in range(node_count)]
+    heapq.heapify(priority_queue)
+    rank = array('i', [0]) * node_count
+    upward_forward = [None] * node_count
+    upward_backward = [None] * node_count
+    next_rank = 0
+    while priority_queue:
+        _, node = heapq.heappop(priority_queue)
+        # Lazy update: re-evaluate and put the node back if it is no longer the cheapest.
+        current_priority, shortcuts = priority(node)
+        if priority_queue and current_priority > priority_queue[0][0]:
+            heapq.heappush(priority_queue, (current_priority, node))
+            continue
+
+        rank[node] = next_rank
+        next_rank += 1
+        upward_forward[node] = [(w, cost, middle) for w, (cost, middle) in out_edges[node].items()]
+        upward_backward[node] = [(u, cost, middle) for u, (cost, middle) in in_edges[node].items()]
+        for source, target, cost in shortcuts:
+            if cost < out_edges[source].get(target, (INF, -1))[0]:
+                out_edges[source][target] = (cost, node)
+                in_edges[target][source] = (cost, node)
+        for source in in_edges[node]:
+            del out_edges[source][node]
+            contracted_neighbors[source] += 1
+        for target in out_edges[node]:
+            del in_edges[target][node]
+            contracted_neighbors[target] += 1
+        out_edges[node] = {}
+        in_edges[node] = {}
+
+    return ContractionHierarchy(
+        graph.fingerprint(), rank,
+        _to_csr(node_count, upward_forward),
+        _to_csr(node_count, upward_backward),
+    )
+
+
+class ContractionHierarchy:
+    """Upward search graphs plus shortcut middles; answers exact shortest-path queries."""
+
+    def __init__(self, fingerprint, rank, forward, backward):
+        self.fingerprint = fingerprint
+        self.rank = rank
+        self.forward_offsets, self.forward_targets, self.forward_costs, self.forward_middles = forward
+        self.backward_offsets, self.backward_sources, self.backward_costs, self.backward_middles = backward
+        self._zero_weights = None  # whether the routed graph has 0-weight edges; see falls_back_to_ucs
+
+    # --- Persistence ---
+
+    def save(self, path):
+        arrays = (
+            self.rank,
+            self.forward_offsets, self.forward_targets, self.forward_costs, self.forward_middles,
+            self.backward_offsets, self.backward_sources, self.backward_costs, self.backward_middles,
+        )
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(self.rank), len(self.forward_targets),
+                                len(self.backward_sources), self.fingerprint))
+            for data in arrays:
+                data.tofile(f)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path, graph):
+        """Reads a saved hierarchy; returns None if it is missing or built for another graph."""
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return None
+            magic, version, node_count, forward_count, backward_count, fingerprint = HEADER.unpack(header)
+            if (magic, version) != (MAGIC, FORMAT_VERSION):
+                return None
+            if node_count != graph.node_count or fingerprint != graph.fingerprint():
+                return None
+
+            def read(typecode, count):
+                data = array(typecode)
+                data.fromfile(f, count)
+                return data
+
+            try:
+                rank = read('i', node_count)
+                forward = (read('q', node_count + 1), read('i', forward_count),
+                           read('d', forward_count), read('i', forward_count))
+                backward = (read('q', node_count + 1), read('i', backward_count),
+                            read('d', backward_count), read('i', backward_count))
+            except EOFError:
+                return None
+        return cls(fingerprint, rank, forward, backward)
+
+    # --- Queries ---
+
+    def falls_back_to_ucs(self, graph):
+        """Whether route answers with plain ucs on ``graph``, because it has 0-weight edges.
+
+        With such edges ucs no longer settles nodes in (distance, ID) order,
+        which is what _ucs_path relies on to match its ties. The first such
+        query logs a warning.
+        """
+        if self._zero_weights is None:
+            self._zero_weights = 0 in graph.weights
+            if self._zero_weights:
+                log.warning("graph has 0-weight edges: contraction hierarchy queries run plain ucs")
+        return self._zero_weights
+
+    def route(self, graph, start, goal, stats=None):
+        """ID-based search signature for ``CompiledGraph.run``.
+
+        Returns the same path and distance as ``ucs``, ties included.
+        nodes_explored counts pops from both upward searches, plus the
+        nodes evaluated to settle ties.
+
+        Two limits: on a graph with 0-weight edges this is plain ``ucs``
+        (see falls_back_to_ucs), and matching ucs's ties costs distance
+        lookups around the path, which are logged at debug level. Where
+        many routes tie, as on a grid of equal corridors, those lookups can
+        take as long as ucs itself, so the hierarchy pays off on maps whose
+        corridor lengths vary.
+        """
+        if self.falls_back_to_ucs(graph):
+            return ucs(graph, start, goal, stats)
+        if start == goal:
+            _record(stats, 1, 0, 0)
+            return [start], 0, 1
+        if goal < 0:
+            _record(stats, 1, 0, 0)
+            return None, 0, 1
+        # Search spaces are tiny compared with the graph, so dicts beat full-size arrays here.
+        forward_costs = {start: 0}
+        forward_parents = {start: (-1, -1)}
+        backward_costs = {goal: 0}
+        backward_parents = {goal: (-1, -1)}
+        forward_queue = [(0, start)]
+        backward_queue = [(0, goal)]
+        best_distance = INF
+        meeting_node = -1
+        nodes_explored = 0
+        peak_frontier = 0
+        sides = (
+            (forward_queue, forward_costs, forward_parents, backward_costs,
+             self.forward_offsets, self.forward_targets, self.forward_costs, self.forward_middles),
+            (backward_queue, backward_costs, backward_parents, forward_costs,
+             self.backward_offsets, self.backward_sources, self.backward_costs, self.backward_middles),
+        )
+        while True:
+            # Each side may stop once its smallest key can no longer beat the best meeting.
+            active = [side for side in sides if side[0] and side[0][0][0] < best_distance]
+            if not active:
+                break
+            side = min(active, key=lambda s: s[0][0][0])
+            queue, costs, parents, other_costs, offsets, others, edge_costs, middles = side
+            nodes_explored += 1
+            cost, current_node = heapq.heappop(queue)
+            if cost > costs[current_node]:
+                continue
+            if current_node in other_costs and cost + other_costs[current_node] < best_distance:
+                best_distance = cost + other_costs[current_node]
+                meeting_node = current_node
+            for edge in range(offsets[current_node], offsets[current_node + 1]):
+                neighbor = others[edge]
+                new_cost = cost + edge_costs[edge]
+                if new_cost < costs.get(neighbor, INF):
+                    costs[neighbor] = new_cost
+                    parents[neighbor] = (current_node, middles[edge])
+                    heapq.heappush(queue, (new_cost, neighbor))
+            peak_frontier = max(peak_frontier, len(forward_queue) + len(backward_queue))
+
+        _record(stats, nodes_explored, len(forward_queue) + len(backward_queue), peak_frontier, roots=2)
+        if meeting_node < 0:
+            return None, 0, nodes_explored
+
+        # Upward forward chain start -> meeting node, then downward chain to the goal.
+        hops = []
+        node = meeting_node
+        while forward_parents[node][0] != -1:
+            parent, middle = forward_parents[node]
+            hops.append((parent, node, middle))
+            node = parent
+        hops.reverse()
+        node = meeting_node
+        while backward_parents[node][0] != -1:
+            child, middle = backward_parents[node]
+            hops.append((node, child, middle))
+            node = child
+
+        path = [start]
+        for source, target, middle in hops:
+            self._unpack(source, target, middle, path)
+        path, lookups = self._ucs_path(graph, path)
+        if lookups:
+            log.debug("route %d -> %d: %d distance lookups to match ucs's tie-breaking", start, goal, lookups)
+        _record(stats, lookups, 0, 0, roots=lookups)  # tie lookups count as pops, not relaxed edges
+        return path, best_distance, nodes_explored + lookups
+
+    def _ucs_path(self, graph, path):
+        """Returns (the shortest path ucs picks between the ends of ``path``, lookups spent); ``path`` is shortest.
+
+        With positive weights ucs settles nodes in (distance, ID) order and
+        keeps the first predecessor that reaches a node at its final
+        distance, so each hop's predecessor is the in-neighbour u with
+        d(start, u) + w(u, v) = d(start, v) that has the smallest
+        (distance, ID). Such a u has distance d(start, v) - w(u, v), so only
+        in-neighbours that would beat the best one known so far need their
+        distance looked up (by _settle).
+        """
+        start = path[0]
+        known = {start: 0}
+        cost = 0
+        for source, target in zip(path, path[1:]):
+            cost += graph.edge_weight(source, target)
+            known[target] = cost
+        forward_space = None
+        lookups = 0
+        reverse_offsets, reverse_sources, reverse_weights = graph.reverse_edges()
+        node = path[-1]
+        rebuilt = [node]
+        while node != start:
+            node_cost = known[node]
+            tolerance = 1e-9 * node_cost
+            edges = range(reverse_offsets[node], reverse_offsets[node + 1])
+            best = None
+            # Known distances first, so the lookups below can be skipped more often.
+            for edge in sorted(edges, key=lambda edge: reverse_sources[edge] not in known):
+                source = reverse_sources[edge]
+                tight_cost = node_cost - reverse_weights[edge]
+                if source not in known:
+                    if tight_cost < -tolerance or (best is not None and (tight_cost - tolerance, source) >= best):
+                        continue  # can't be tight, or would lose the tie anyway
+                    if forward_space is None:
+                        forward_space, lookups = self._upward_space(start)
+                    lookups += self._settle(forward_space, source, known)
+                if abs(known[source] - tight_cost) <= tolerance and (best is None or (known[source], source) < best):
+                    best = (known[source], source)
+            node = best[1]
+            rebuilt.append(node)
+        rebuilt.reverse()
+        return rebuilt, lookups
+
+    def _upward_space(self, start):
+        """({node: cost}, pops) for every node the upward forward search from ``start`` reaches."""
+        costs = {start: 0}
+        priority_queue = [(0, start)]
+        pops = 0
+        while priority_queue:
+            pops += 1
+            cost, current_node = heapq.heappop(priority_queue)
+            if cost > costs[current_node]:
+                continue
+            for edge in range(self.forward_offsets[current_node], self.forward_offsets[current_node + 1]):
+                neighbor = self.forward_targets[edge]
+                new_cost = cost + self.forward_costs[edge]
+                if new_cost < costs.get(neighbor, INF):
+                    costs[neighbor] = new_cost
+                    heapq.heappush(priority_queue, (new_cost, neighbor))
+        return costs, pops
+
+    def _settle(self, forward_space, node, known):
+        """Adds the distances from the start of ``forward_space`` to ``node`` and the nodes above it to ``known``.
+
+        d(v) = min(forward_space[v], min d(u) + c over the upward backward
+        edges u -> v): every shortest path climbs then descends in rank, and
+        the right-hand side only refers to higher-ranked nodes. Results stay
+        in ``known``, so lookups near the path share their work. Returns how
+        many nodes were evaluated.
+        """
+        offsets, sources, costs = self.backward_offsets, self.backward_sources, self.backward_costs
+        evaluated = 0
+        # A node is pushed as itself to queue the nodes above it, then as ~node to be evaluated after them.
+        stack = [node]
+        while stack:
+            current_node = stack.pop()
+            if current_node >= 0:
+                if current_node not in known:
+                    stack.append(~current_node)
+                    for edge in range(offsets[current_node], offsets[current_node + 1]):
+                        if sources[edge] not in known:
+                            stack.append(sources[edge])
+                continue
+            current_node = ~current_node
+            if current_node in known:
+                continue
+            best = forward_space.get(current_node, INF)
+            for edge in range(offsets[current_node], offsets[current_node + 1]):
+                cost = known[sources[edge]] + costs[edge]
+                if cost < best:
+                    best = cost
+            known[current_node] = best
+            evaluated += 1
+        return evaluated
+
+    def _unpack(self, source, target, middle, path):
+        """Appends the original nodes of edge source -> target (after ``source``) to ``path``."""
+        stack = [(source, target, middle)]
+        while stack:
+            source, target, middle = stack.pop()
+            if middle < 0:
+                path.append(target)
+                continue
+            # middle was contracted before both ends, so source -> middle is one of
+            # its upward backward edges and middle -> target one of its upward forward edges.
+            stack.append((middle, target, self._middle_of(
+                self.forward_offsets, self.forward_targets, self.forward_middles, middle, target)))
+            stack.append((source, middle, self._middle_of(
+                self.backward_offsets, self.backward_sources, self.backward_middles, middle, source)))
+
+    @staticmethod
+    def _middle_of(offsets, others, middles, node, other):
+        for edge in range(offsets[node], offsets[node + 1]):
+            if others[edge] == other:
+                return middles[edge]
+        raise ValueError("corrupt hierarchy: shortcut edge not found")
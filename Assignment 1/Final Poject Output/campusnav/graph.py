@@ -0,0 +1,254 @@
+import math
+import zlib
+from array import array
+
+# ====================================================================
+# COMPILED (CSR) CAMPUS GRAPH
+# =====================================================================
+
+# Edge weights are stored as doubles so a closed edge can be marked with INF.
+INF = math.inf
+
+
+class CompiledGraph:
+    """Array-backed view of a campus_graph-style adjacency dict.
+
+    Node names are interned to integer IDs (in sorted name order, so ID
+    order matches the string order the original tuple heaps tie-broke on).
+    The outgoing edges of node ``u`` live at ``offsets[u]:offsets[u + 1]``
+    in the parallel ``targets``, ``weights`` and ``speeds`` arrays.
+    """
+
+    def __init__(self, names, offsets, targets, weights, speeds, xs, ys, has_coords,
+                 ids=None, base_weights=None, edge_order=None):
+        self.names = names
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.speeds = speeds
+        self.xs = xs
+        self.ys = ys
+        self.has_coords = has_coords
+        # Anything with a dict-style ``get(name, default)`` can map names to IDs;
+        # the graph store passes its sorted string table instead of a dict.
+        self._ids = ids if ids is not None else {name: i for i, name in enumerate(names)}
+        self._reverse = None
+        self._edge_order = edge_order
+        # Weights as compiled, so runtime edge changes can be undone, and the
+        # edges currently cheaper than that (precomputed lower bounds such as
+        # landmarks are only valid while this stays empty).
+        self.base_weights = base_weights if base_weights is not None else array('d', weights)
+        self.lowered_edges = set()
+        self._heuristic_scale = False  # not computed yet; see heuristic_scale
+
+    @classmethod
+    def from_dict(cls, graph, coords=None):
+        """Builds the compiled graph once from ``{name: [(neighbor, dist, speed), ...]}``."""
+        coords = coords or {}
+        # Locations that only have coordinates become nodes without edges.
+        node_names = set(graph) | set(coords)
+        for edges in graph.values():
+            node_names.update(neighbor for neighbor, _, _ in edges)
+        names = sorted(node_names)
+        ids = {name: i for i, name in enumerate(names)}
+
+        offsets = array('q', [0])
+        targets = array('i')
+        weights = array('d')
+        speeds = array('d')
+        for name in names:
+            for neighbor, edge_dist, speed_factor in graph.get(name, []):
+                targets.append(ids[neighbor])
+                weights.append(edge_dist)
+                speeds.append(speed_factor)
+            offsets.append(len(targets))
+
+        xs = array('d', [0.0]) * len(names)
+        ys = array('d', [0.0]) * len(names)
+        has_coords = bytearray(len(names))
+        for name, (x, y) in coords.items():
+            node = ids.get(name)
+            if node is not None:
+                xs[node], ys[node] = x, y
+                has_coords[node] = 1
+
+        return cls(names, offsets, targets, weights, speeds, xs, ys, has_coords)
+
+    @property
+    def node_count(self):
+        return len(self.names)
+
+    @property
+    def edge_count(self):
+        return len(self.targets)
+
+    def reverse_edges(self):
+        """Returns (offsets, sources, weights): the incoming edges of every node, in CSR form.
+
+        Built on first use and kept, since only the bidirectional searches need it.
+        """
+        if self._reverse is None:
+            node_count = self.node_count
+            counts = array('q', [0]) * (node_count + 1)
+            for target in self.targets:
+                counts[target + 1] += 1
+            for node in range(node_count):
+                counts[node + 1] += counts[node]
+            sources = array('i', [0]) * self.edge_count
+            weights = array('d', [0.0]) * self.edge_count
+            fill = array('q', counts)
+            for node in range(node_count):
+                for edge in range(self.offsets[node], self.offsets[node + 1]):
+                    slot = fill[self.targets[edge]]
+                    sources[slot] = node
+                    weights[slot] = self.weights[edge]
+                    fill[self.targets[edge]] += 1
+            self._reverse = (counts, sources, weights)
+        return self._reverse
+
+    @property
+    def heuristic_scale(self):
+        """Largest s <= 1 with s * straight-line length <= weight for every compiled edge.
+
+        s times the Euclidean distance is then a consistent heuristic: it
+        never overestimates and never drops by more than an edge's weight.
+        None when some node has no coordinates, since a heuristic of 0 there
+        breaks consistency. Only valid while ``lowered_edges`` is empty;
+        computed on first use.
+        """
+        if self._heuristic_scale is False:
+            scale = None
+            if all(self.has_coords):
+                scale = 1.0
+                xs, ys, targets, weights = self.xs, self.ys, self.targets, self.base_weights
+                for node in range(self.node_count):
+                    for edge in range(self.offsets[node], self.offsets[node + 1]):
+                        target = targets[edge]
+                        length = math.hypot(xs[target] - xs[node], ys[target] - ys[node])
+                        if length > 0 and weights[edge] < scale * length:
+                            scale = weights[edge] / length
+            self._heuristic_scale = scale
+        return self._heuristic_scale
+
+    @property
+    def edge_order(self):
+        """Edge positions with each node's slice sorted by target: the (u, v) edge index.
+
+        ``edge_order[offsets[u]:offsets[u + 1]]`` lists u's edges by target
+        (parallel edges keep their listed order), so ``edges_between`` finds
+        u -> v by binary search instead of scanning u's neighbours. Built on
+        first use unless the graph store supplied it.
+        """
+        if self._edge_order is None:
+            targets = self.targets
+            order = array('i')
+            for node in range(self.node_count):
+                order.extend(sorted(range(self.offsets[node], self.offsets[node + 1]), key=targets.__getitem__))
+            self._edge_order = order
+        return self._edge_order
+
+    def fingerprint(self):
+        """CRC32 over names and edge arrays, used to detect stale precomputed files."""
+        checksum = zlib.crc32("\n".join(self.names).encode("utf-8"))
+        for data in (self.offsets, self.targets, self.weights):
+            checksum = zlib.crc32(memoryview(data).cast('B'), checksum)
+        return checksum
+
+    def node_id(self, name):
+        """Returns the integer ID for a location name, or -1 if it is not a graph node."""
+        return self._ids.get(name, -1)
+
+    def edges_between(self, source, target):
+        """Positions of the source -> target edges, looked up in the ``edge_order`` index."""
+        order, targets = self.edge_order, self.targets
+        low, end = self.offsets[source], self.offsets[source + 1]
+        high = end
+        while low < high:
+            middle = (low + high) // 2
+            if targets[order[middle]] < target:
+                low = middle + 1
+            else:
+                high = middle
+        edges = []
+        while low < end and targets[order[low]] == target:
+            edges.append(order[low])
+            low += 1
+        return edges
+
+    def edge_weight(self, source, target):
+        """Shortest direct edge weight source -> target, or INF if there is none."""
+        best = INF
+        for edge in self.edges_between(source, target):
+            if self.weights[edge] < best:
+                best = self.weights[edge]
+        return best
+
+    def set_edge_weight(self, source, target, weight=None):
+        """Changes every source -> target edge in place; ``None`` restores the compiled weight.
+
+        Returns the edge's previous weight, or None if there is no such edge.
+        """
+        previous = None
+        for edge in self.edges_between(source, target):
+            if previous is None or self.weights[edge] < previous:
+                previous = self.weights[edge]
+            new_weight = self.base_weights[edge] if weight is None else weight
+            self.weights[edge] = new_weight
+            if new_weight < self.base_weights[edge]:
+                self.lowered_edges.add(edge)
+            else:
+                self.lowered_edges.discard(edge)
+        if previous is not None and self._reverse is not None:
+            reverse_offsets, reverse_sources, reverse_weights = self._reverse
+            for edge in range(reverse_offsets[target], reverse_offsets[target + 1]):
+                if reverse_sources[edge] == source:
+                    reverse_weights[edge] = self.edge_weight(source, target)
+        return previous
+
+    def path_length(self, names):
+        """Total edge distance along a path of location names."""
+        ids = [self.node_id(name) for name in names]
+        return as_number(sum(self.edge_weight(u, v) for u, v in zip(ids, ids[1:])))
+
+    def path_names(self, path):
+        return [self.names[node] for node in path]
+
+    def run(self, search, start, goal, **kwargs):
+        """Runs an ID-based ``search`` with location names in and out.
+
+        Keeps the ``(path, distance, nodes_explored)`` contract of the
+        original name-based functions, including their behaviour for
+        locations that have no graph entry.
+        """
+        start_id = self.node_id(start)
+        goal_id = self.node_id(goal)
+        if start_id < 0:
+            # The original searches pop the start once and find no neighbours.
+            return ([start], 0, 1) if start == goal else (None, 0, 1)
+        path, distance, nodes_explored = search(self, start_id, goal_id, **kwargs)
+        if path is None:
+            return None, 0, nodes_explored
+        return self.path_names(path), as_number(distance), nodes_explored
+
+    def run_many(self, search_many, start, goals):
+        """Like ``run`` for a one-to-many search; returns {goal_name: result}."""
+        start_id = self.node_id(start)
+        if start_id < 0:
+            return {goal: ([start], 0, 1) if start == goal else (None, 0, 1) for goal in goals}
+        goal_ids = {goal: self.node_id(goal) for goal in goals}
+        found = search_many(self, start_id, list(set(goal_ids.values())))
+        results = {}
+        for goal, goal_id in goal_ids.items():
+            path, distance, nodes_explored = found[goal_id]
+            if path is None:
+                results[goal] = (None, 0, nodes_explored)
+            else:
+                results[goal] = (self.path_names(path), as_number(distance), nodes_explored)
+        return results
+
+
+def as_number(value):
+    """Returns whole-metre float distances as ints, matching the dict-based output."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
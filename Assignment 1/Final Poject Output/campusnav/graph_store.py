@@ -0,0 +1,282 @@
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from collections.abc import Mapping
+
+from campusnav.graph import CompiledGraph, as_number
+
+# ====================================================================
+# MEMORY-MAPPED GRAPH STORE SHARED BY WORKER PROCESSES
+# =====================================================================
+
+# One file holds everything a worker needs to route: the CSR arrays of a
+# CompiledGraph, coordinates, and the location names, info texts and image
+# file names as string tables. Opening it maps the file copy-on-write, so
+# every process on the machine shares the same physical pages; a worker
+# that closes or reweights an edge only copies the page it writes to. This
+# is also the compiled form of the campus map (see campus_map.py).
+#
+# File layout (little endian, every section 8-byte aligned):
+#   header         magic, format version, node count, edge count,
+#                  checksum of the source map, section count
+#   section table  (offset, length, CRC32) for each entry of SECTIONS
+#   sections       raw array data
+#
+# edge_order is the graph's (u, v) edge index (CompiledGraph.edge_order),
+# stored so workers do not each sort their own copy. building_of holds each
+# location's index in the buildings string table, or -1 outdoors. A
+# location's aliases are one string table entry, joined by newlines.
+#
+# A string table is an int64 offsets array (count + 1 entries) plus one
+# UTF-8 blob. Names are stored sorted, so a name is found by binary search
+# over the mapped bytes without building a dict.
+MAGIC = b"CNGS"
+FORMAT_VERSION = 5
+HEADER = struct.Struct("<4sIQQII")
+SECTION = struct.Struct("<QQI4x")
+
+SECTIONS = (
+    ('name_offsets', 'q'), ('names', 'B'),
+    ('offsets', 'q'), ('targets', 'i'), ('weights', 'd'), ('base_weights', 'd'), ('speeds', 'd'),
+    ('edge_order', 'i'),
+    ('xs', 'd'), ('ys', 'd'), ('has_coords', 'B'), ('coord_order', 'i'),
+    ('has_info', 'B'), ('info_offsets', 'q'), ('info', 'B'),
+    ('has_image', 'B'), ('image_offsets', 'q'), ('images', 'B'),
+    ('has_place', 'B'), ('building_of', 'i'), ('building_offsets', 'q'), ('buildings', 'B'),
+    ('floor_offsets', 'q'), ('floors', 'B'),
+    ('has_alias', 'B'), ('alias_offsets', 'q'), ('aliases', 'B'),
+)
+
+
+def _string_table(strings):
+    offsets = array('q', [0])
+    blob = bytearray()
+    for text in strings:
+        blob += text.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, blob
+
+
+def pack_graph_store(graph, coords, info=None, images=None, checksum=0, places=None, aliases=None):
+    """Serializes ``graph`` and its per-location data into the store layout; returns a bytearray.
+
+    ``coords``, ``info``, ``images``, ``places`` ((building, floor) of
+    indoor locations) and ``aliases`` (lists of other names) are keyed by
+    location name; every key must be a node of ``graph``. Coordinates keep
+    their dict order for iteration.
+    """
+    info = info or {}
+    images = images or {}
+    places = places or {}
+    aliases = aliases or {}
+    node_count = graph.node_count
+    for label, mapping in (("coords", coords), ("info", info), ("images", images), ("places", places),
+                           ("aliases", aliases)):
+        unknown = [name for name in mapping if graph.node_id(name) < 0]
+        if unknown:
+            raise ValueError(f"{label} entries for unknown locations: {', '.join(unknown)}")
+
+    name_offsets, names = _string_table(graph.names)
+    has_info = bytearray(node_count)
+    has_image = bytearray(node_count)
+    for name in info:
+        has_info[graph.node_id(name)] = 1
+    for name in images:
+        has_image[graph.node_id(name)] = 1
+    info_offsets, info_blob = _string_table(info.get(name, "") for name in graph.names)
+    image_offsets, image_blob = _string_table(images.get(name) or "" for name in graph.names)
+    coord_order = array('i', [graph.node_id(name) for name in coords])
+
+    building_names = list(dict.fromkeys(building for building, _ in places.values()))
+    building_index = {building: index for index, building in enumerate(building_names)}
+    has_place = bytearray(node_count)
+    building_of = array('i', [-1]) * node_count
+    for name, (building, _) in places.items():
+        has_place[graph.node_id(name)] = 1
+        building_of[graph.node_id(name)] = building_index[building]
+    building_offsets, building_blob = _string_table(building_names)
+    floor_offsets, floor_blob = _string_table(places.get(name, (None, ""))[1] for name in graph.names)
+    has_alias = bytearray(node_count)
+    for name in aliases:
+        has_alias[graph.node_id(name)] = 1
+    alias_offsets, alias_blob = _string_table("\n".join(aliases.get(name, ())) for name in graph.names)
+
+    data = {
+        'name_offsets': name_offsets, 'names': names,
+        'offsets': graph.offsets, 'targets': graph.targets, 'weights': graph.weights,
+        'base_weights': graph.base_weights, 'speeds': graph.speeds, 'edge_order': graph.edge_order,
+        'xs': graph.xs, 'ys': graph.ys, 'has_coords': graph.has_coords, 'coord_order': coord_order,
+        'has_info': has_info, 'info_offsets': info_offsets, 'info': info_blob,
+        'has_image': has_image, 'image_offsets': image_offsets, 'images': image_blob,
+        'has_place': has_place, 'building_of': building_of,
+        'building_offsets': building_offsets, 'buildings': building_blob,
+        'floor_offsets': floor_offsets, 'floors': floor_blob,
+        'has_alias': has_alias, 'alias_offsets': alias_offsets, 'aliases': alias_blob,
+    }
+
+    buffer = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, node_count, graph.edge_count, checksum, len(SECTIONS)))
+    table_start = len(buffer)
+    buffer += bytes(SECTION.size * len(SECTIONS))
+    for index, (name, _) in enumerate(SECTIONS):
+        buffer += bytes(-len(buffer) % 8)
+        raw = memoryview(data[name]).cast('B')
+        SECTION.pack_into(buffer, table_start + index * SECTION.size, len(buffer), len(raw), zlib.crc32(raw))
+        buffer += raw
+    return buffer
+
+
+def write_graph_store(path, graph, coords, info=None, images=None, checksum=0, places=None, aliases=None):
+    """Writes ``pack_graph_store`` output to ``path`` atomically, for ``GraphStore.open``."""
+    buffer = pack_graph_store(graph, coords, info, images, checksum, places, aliases)
+    # Per-process temp name: several workers may compile the same map at once.
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(buffer)
+    os.replace(temp_path, path)
+
+
+class StringTable:
+    """Read-only sequence of strings backed by an offsets array and a UTF-8 blob."""
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def _encoded(self, index):
+        return bytes(self._blob[self._offsets[index]:self._offsets[index + 1]])
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError("string table index out of range")
+        return self._encoded(index % len(self)).decode("utf-8")
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._encoded(index).decode("utf-8")
+
+    def get(self, name, default=None):
+        """Index of ``name`` in a sorted table, by binary search; ``default`` if absent.
+
+        UTF-8 byte order equals code point order, so the encoded bytes can be
+        compared directly against the sorted Python strings they came from.
+        """
+        if not isinstance(name, str):
+            return default
+        key = name.encode("utf-8")
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._encoded(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self) and self._encoded(low) == key:
+            return low
+        return default
+
+
+class NodeMapping(Mapping):
+    """Dict-like ``{location name: value}`` view over per-node store arrays."""
+
+    def __init__(self, graph, present, value_of, order=None):
+        self._graph = graph
+        self._present = present
+        self._value_of = value_of
+        self._order = order
+
+    def __getitem__(self, name):
+        node = self._graph.node_id(name)
+        if node < 0 or not self._present[node]:
+            raise KeyError(name)
+        return self._value_of(node)
+
+    def __iter__(self):
+        nodes = self._order if self._order is not None else range(len(self._present))
+        for node in nodes:
+            if self._present[node]:
+                yield self._graph.names[node]
+
+    def __len__(self):
+        return sum(1 for node in range(len(self._present)) if self._present[node])
+
+
+class GraphStore:
+    """A graph store mapped into this process (or held in memory, see ``from_buffer``).
+
+    ``graph`` is a CompiledGraph whose arrays are views into the mapping.
+    ``coords``, ``info`` and ``images`` are read-only mappings by location
+    name, standing in for building_coords, building_info and location_images;
+    ``places`` maps indoor locations to (building, floor) and ``aliases``
+    locations to tuples of their other names. ``building_of``
+    and ``building_names`` are the per-node form used by BuildingOverlay.
+    """
+
+    def __init__(self, buffer, sections):
+        self._buffer = buffer
+        names = StringTable(sections['name_offsets'], sections['names'])
+        self.graph = CompiledGraph(
+            names, sections['offsets'], sections['targets'], sections['weights'], sections['speeds'],
+            sections['xs'], sections['ys'], sections['has_coords'],
+            ids=names, base_weights=sections['base_weights'], edge_order=sections['edge_order'])
+        xs, ys = sections['xs'], sections['ys']
+        info = StringTable(sections['info_offsets'], sections['info'])
+        images = StringTable(sections['image_offsets'], sections['images'])
+        self.coords = NodeMapping(self.graph, sections['has_coords'],
+                                  lambda node: (as_number(xs[node]), as_number(ys[node])),
+                                  order=sections['coord_order'])
+        self.info = NodeMapping(self.graph, sections['has_info'], info.__getitem__)
+        self.images = NodeMapping(self.graph, sections['has_image'], lambda node: images[node] or None)
+        self.building_of = sections['building_of']
+        self.building_names = StringTable(sections['building_offsets'], sections['buildings'])
+        floors = StringTable(sections['floor_offsets'], sections['floors'])
+        self.places = NodeMapping(self.graph, sections['has_place'],
+                                  lambda node: (self.building_names[self.building_of[node]], floors[node]))
+        aliases = StringTable(sections['alias_offsets'], sections['aliases'])
+        self.aliases = NodeMapping(self.graph, sections['has_alias'], lambda node: tuple(aliases[node].split("\n")))
+
+    @classmethod
+    def open(cls, path, checksum=None):
+        """Maps the store at ``path``; returns None if missing, corrupt, or built from another map."""
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                return None
+            # ACCESS_COPY: pages stay shared until this process writes to one.
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        return cls.from_buffer(mapped, checksum)
+
+    @classmethod
+    def from_buffer(cls, buffer, checksum=None):
+        """Wraps a writable buffer holding a packed store; returns None if it does not check out."""
+        if len(buffer) < HEADER.size:
+            return None
+        magic, version, node_count, edge_count, stored_checksum, section_count = HEADER.unpack_from(buffer)
+        if (magic, version, section_count) != (MAGIC, FORMAT_VERSION, len(SECTIONS)):
+            return None
+        if checksum is not None and stored_checksum != checksum:
+            return None
+        if len(buffer) < HEADER.size + SECTION.size * len(SECTIONS):
+            return None
+
+        view = memoryview(buffer)
+        sections = {}
+        for index, (name, typecode) in enumerate(SECTIONS):
+            offset, length, crc = SECTION.unpack_from(buffer, HEADER.size + index * SECTION.size)
+            if offset % 8 or offset + length > len(buffer):
+                return None
+            raw = view[offset:offset + length]
+            if zlib.crc32(raw) != crc:
+                return None
+            sections[name] = raw.cast(typecode)
+        if len(sections['offsets']) != node_count + 1 or len(sections['targets']) != edge_count \
+                or len(sections['edge_order']) != edge_count or len(sections['building_of']) != node_count:
+            return None
+        return cls(buffer, sections)
@@ -0,0 +1,105 @@
+import heapq
+
+from campusnav.graph import INF
+from campusnav.search import _rebuild_path, _record, dijkstra_costs
+
+# ====================================================================
+# K SHORTEST LOOPLESS ROUTES (YEN'S ALGORITHM)
+# =====================================================================
+
+# Yen's algorithm finds the k best loopless routes one at a time: every
+# node of the last route found is tried as a "spur" where a new route
+# branches off, with the route's prefix (the root) kept, the root's other
+# nodes removed, and the next edges already taken from that root by earlier
+# routes removed. Two things keep it cheap enough to run per request:
+#   - One reverse Dijkstra from the goal gives every node's exact distance
+#     to the goal on the full graph. It is the A* heuristic of every spur
+#     search in every iteration (removing nodes and edges only makes true
+#     distances longer, so it stays admissible), and a spur search whose
+#     tree path is not blocked walks straight down it.
+#   - Lawler's rule: a route that branched off its parent at position d only
+#     spurs from positions d onward; spurs before d share the parent's root
+#     and were already searched when the parent was.
+
+
+def _spur_search(graph, spur, goal, to_goal, blocked_nodes, banned_next, stats):
+    """A* from ``spur`` to ``goal`` avoiding ``blocked_nodes`` and the spur's edges to ``banned_next``.
+
+    Returns (path_of_ids, distance, nodes_explored). Costs and parents are
+    dicts: with an exact heuristic a spur search touches few nodes.
+    """
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    # Ties on f go to the deeper node (larger g), so equally short routes are
+    # followed to the goal instead of being widened level by level.
+    priority_queue = [(to_goal[spur], 0, spur)]
+    costs = {spur: 0}
+    parents = {spur: -1}
+    nodes_explored = 0
+    peak_frontier = 0
+    while priority_queue:
+        nodes_explored += 1
+        _, negative_cost, current_node = heapq.heappop(priority_queue)
+        cost = -negative_cost
+        if current_node == goal:
+            _record(stats, nodes_explored, len(priority_queue), peak_frontier)
+            return _rebuild_path(parents, goal), cost, nodes_explored
+        if cost > costs[current_node]:
+            continue
+        for edge in range(offsets[current_node], offsets[current_node + 1]):
+            neighbor = targets[edge]
+            if neighbor in blocked_nodes or (current_node == spur and neighbor in banned_next):
+                continue
+            new_cost = cost + weights[edge]
+            if new_cost < costs.get(neighbor, INF):
+                costs[neighbor] = new_cost
+                parents[neighbor] = current_node
+                estimate = new_cost + to_goal[neighbor]
+                if estimate < INF:
+                    heapq.heappush(priority_queue, (estimate, -new_cost, neighbor))
+        peak_frontier = max(peak_frontier, len(priority_queue))
+    _record(stats, nodes_explored, len(priority_queue), peak_frontier)
+    return None, 0, nodes_explored
+
+
+def k_shortest_paths(graph, start, goal, k, stats=None):
+    """Up to ``k`` loopless routes start -> goal, shortest first.
+
+    Returns (routes, nodes_explored) with routes a list of
+    (path_of_ids, distance); nodes_explored counts the pops of every spur
+    search. Closed (INF) edges are never used.
+    """
+    reverse_offsets, reverse_sources, reverse_weights = graph.reverse_edges()
+    to_goal = dijkstra_costs(reverse_offsets, reverse_sources, reverse_weights, graph.node_count, goal)
+    if k < 1 or to_goal[start] == INF:
+        return [], 0
+
+    path, distance, nodes_explored = _spur_search(graph, start, goal, to_goal, (), (), stats)
+    routes = [(path, distance)]
+    deviations = [0]
+    candidates = []
+    seen = {tuple(path)}
+    while len(routes) < k:
+        path, _ = routes[-1]
+        root_costs = [0]
+        for u, v in zip(path, path[1:]):
+            root_costs.append(root_costs[-1] + graph.edge_weight(u, v))
+
+        for i in range(deviations[-1], len(path) - 1):
+            root = path[:i + 1]
+            banned_next = {other[i + 1] for other, _ in routes if len(other) > i + 1 and other[:i + 1] == root}
+            spur_path, spur_cost, explored = _spur_search(
+                graph, path[i], goal, to_goal, set(root[:-1]), banned_next, stats)
+            nodes_explored += explored
+            if spur_path is None:
+                continue
+            candidate = tuple(root[:-1] + spur_path)
+            if candidate not in seen:
+                seen.add(candidate)
+                heapq.heappush(candidates, (root_costs[i] + spur_cost, i, candidate))
+
+        if not candidates:
+            break
+        distance, deviation, candidate = heapq.heappop(candidates)
+        routes.append((list(candidate), distance))
+        deviations.append(deviation)
+    return routes, nodes_explored
@@ -0,0 +1,135 @@
+import os
+import struct
+from array import array
+
+from campusnav.graph import INF
+from campusnav.search import dijkstra_costs, heuristic_search
+
+# ====================================================================
+# ALT: A* WITH LANDMARKS AND THE TRIANGLE INEQUALITY
+# =====================================================================
+
+# For a landmark L, the triangle inequality gives two lower bounds on the
+# distance from v to the goal t:
+#     d(L, t) - d(L, v)      (forward distances from L)
+#     d(v, L) - d(t, L)      (backward distances to L)
+# The heuristic is the largest bound over all landmarks. Unlike the
+# Euclidean heuristic it needs no coordinates and is always admissible.
+
+MAGIC = b"CNLM"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sIIQI")
+
+DEFAULT_LANDMARK_COUNT = 8
+
+
+def build_landmarks(graph, count=DEFAULT_LANDMARK_COUNT):
+    """Chooses landmarks by farthest-point selection and computes their distance arrays."""
+    node_count = graph.node_count
+    count = min(count, node_count)
+    reverse_offsets, reverse_sources, reverse_weights = graph.reverse_edges()
+
+    chosen = []
+    forward = array('d')
+    backward = array('d')
+    # Distance from the nearest chosen landmark, in either direction.
+    nearest = array('d', [INF]) * node_count
+    candidate = 0
+    while len(chosen) < count:
+        to_node = dijkstra_costs(graph.offsets, graph.targets, graph.weights, node_count, candidate)
+        from_node = dijkstra_costs(reverse_offsets, reverse_sources, reverse_weights, node_count, candidate)
+        chosen.append(candidate)
+        forward.extend(to_node)
+        backward.extend(from_node)
+        for node in range(node_count):
+            nearest[node] = min(nearest[node], to_node[node], from_node[node])
+
+        # Next landmark: the node farthest from every landmark so far. Nodes no
+        # landmark reaches at all (other components) are preferred outright.
+        best_node, best_score = -1, -1.0
+        for node in range(node_count):
+            if node in chosen:
+                continue
+            score = nearest[node]
+            if score > best_score:
+                best_node, best_score = node, score
+        if best_node < 0:
+            break
+        candidate = best_node
+
+    return Landmarks(graph.fingerprint(), node_count, array('i', chosen), forward, backward)
+
+
+class Landmarks:
+    """Landmark IDs with their forward d(L, v) and backward d(v, L) distance arrays."""
+
+    def __init__(self, fingerprint, node_count, landmark_ids, forward, backward):
+        self.fingerprint = fingerprint
+        self.node_count = node_count
+        self.landmark_ids = landmark_ids
+        self.forward = forward
+        self.backward = backward
+
+    def save(self, path):
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(self.landmark_ids), self.node_count, self.fingerprint))
+            self.landmark_ids.tofile(f)
+            self.forward.tofile(f)
+            self.backward.tofile(f)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path, graph):
+        """Reads saved landmark arrays; returns None if missing or built for another graph."""
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return None
+            magic, version, count, node_count, fingerprint = HEADER.unpack(header)
+            if (magic, version) != (MAGIC, FORMAT_VERSION):
+                return None
+            if node_count != graph.node_count or fingerprint != graph.fingerprint():
+                return None
+            landmark_ids = array('i')
+            forward = array('d')
+            backward = array('d')
+            try:
+                landmark_ids.fromfile(f, count)
+                forward.fromfile(f, count * node_count)
+                backward.fromfile(f, count * node_count)
+            except EOFError:
+                return None
+        return cls(fingerprint, node_count, landmark_ids, forward, backward)
+
+    def lower_bound(self, node, goal):
+        """Admissible estimate of d(node, goal); INF when node provably cannot reach goal."""
+        forward, backward = self.forward, self.backward
+        best = 0
+        for base in range(0, len(forward), self.node_count):
+            landmark_to_goal = forward[base + goal]
+            landmark_to_node = forward[base + node]
+            if landmark_to_goal < INF:
+                if landmark_to_node < INF and landmark_to_goal - landmark_to_node > best:
+                    best = landmark_to_goal - landmark_to_node
+            elif landmark_to_node < INF:
+                return INF  # L reaches node but not goal, so node cannot reach goal.
+
+            node_to_landmark = backward[base + node]
+            goal_to_landmark = backward[base + goal]
+            if node_to_landmark < INF:
+                if goal_to_landmark < INF and node_to_landmark - goal_to_landmark > best:
+                    best = node_to_landmark - goal_to_landmark
+            elif goal_to_landmark < INF:
+                return INF  # goal reaches L but node does not, so node cannot reach goal.
+        return best
+
+    def route(self, graph, start, goal, stats=None):
+        """ALT search; ID-based signature for ``CompiledGraph.run``."""
+        if goal < 0:
+            return heuristic_search(graph, start, goal, lambda node: 0, stats)
+        return heuristic_search(graph, start, goal, lambda node: self.lower_bound(node, goal), stats)
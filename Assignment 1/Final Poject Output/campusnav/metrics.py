@@ -0,0 +1,118 @@
+import bisect
+import threading
+
+# ====================================================================
+# PROMETHEUS-STYLE COUNTERS AND HISTOGRAMS
+# =====================================================================
+
+# A small, dependency-free subset of the Prometheus client: labelled
+# counters and cumulative histograms, rendered in the text exposition
+# format (version 0.0.4) for a /metrics endpoint. Values live in the
+# process that records them; under a multi-worker server each worker
+# reports its own.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 4, 16, 64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield self.name + _format_labels(self.label_names, labels), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.label_names = tuple(label_names)
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                label_text = _format_labels(self.label_names, labels, [("le", _format_value(bound))])
+                yield f"{self.name}_bucket{label_text}", cumulative
+            label_text = _format_labels(self.label_names, labels)
+            yield f"{self.name}_sum{label_text}", values[-1]
+            yield f"{self.name}_count{label_text}", cumulative
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them all for a scrape."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help_text, label_names=()):
+        metric = Counter(name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, buckets, label_names=()):
+        metric = Histogram(name, help_text, buckets, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            help_text = metric.help_text.replace("\\", r"\\").replace("\n", r"\n")
+            lines.append(f"# HELP {metric.name} {help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{sample} {_format_value(value)}" for sample, value in metric.samples())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,187 @@
+import os
+import re
+import unicodedata
+from array import array
+from collections import Counter
+
+# ====================================================================
+# LOCATION NAME RESOLUTION
+# =====================================================================
+
+# Typed location names are matched against the map in three steps:
+#   1. the exact name, then the name with case, accents, punctuation and
+#      spacing ignored and "&" read as "and", so "cricket ground" and
+#      "Cricket-Ground" both find "Cricket Ground";
+#   2. the same normalized match against the aliases from the map file;
+#   3. fuzzy matching on character trigrams, ranked by Dice similarity, for
+#      suggestions. A query within one or two typos of exactly one name or
+#      alias is taken to mean that location.
+# Steps 1 and 2 are dict lookups. Step 3 counts trigram hits from an
+# inverted index, taking the query's rarest trigrams first and stopping once
+# POSTING_BUDGET postings have been counted, then rescores at most RESCORE
+# of the best-counted candidates exactly; a lookup never scans the whole
+# name list.
+
+POSTING_BUDGET = 5000
+RESCORE = 32
+# Suggestions below this Dice similarity are dropped.
+MIN_SCORE = 0.3
+# Typo correction needs at least this many characters, so "H3" is not read as "H1".
+MIN_TYPO_LENGTH = 5
+
+_WORD = re.compile(r"[^\W_]+")
+_DIGITS = re.compile(r"\d+")
+_AMBIGUOUS = -1
+
+
+def normalize(text):
+    """Lower-cased words of ``text`` joined by single spaces, without accents or punctuation."""
+    if not text.isascii():
+        text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+    return " ".join(_WORD.findall(text.casefold().replace("&", " and ")))
+
+
+def _trigrams(key):
+    padded = f" {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _within_edits(a, b, limit):
+    """Whether ``a`` and ``b`` are at most ``limit`` edits apart (insert, delete, replace, swap neighbours)."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    # A shared prefix and suffix never change the distance; what is left of a typo is short.
+    prefix = len(os.path.commonprefix([a, b]))
+    a, b = a[prefix:], b[prefix:]
+    suffix = len(os.path.commonprefix([a[::-1], b[::-1]]))
+    a, b = a[:len(a) - suffix], b[:len(b) - suffix]
+    before, row = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(row[j] + 1, current[j - 1] + 1, row[j - 1] + cost)
+            if before is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return False
+        before, row = row, current
+    return row[-1] <= limit
+
+
+class LocationIndex:
+    """Resolves typed location names to map names.
+
+    ``names`` are the map's location names; ``aliases`` maps a name to its
+    other names. Build it once per map load (``from_store``).
+    """
+
+    def __init__(self, names, aliases=None):
+        self.names = list(names)
+        self._index_of = {name: index for index, name in enumerate(self.names)}
+        self._exact = {}  # normalized name or alias -> name index, or _AMBIGUOUS
+        self._keys = []  # fuzzy entries: normalized name or alias ...
+        self._targets = array('i')  # ... and the name index it stands for
+        self._sizes = array('i')  # trigram count of each entry
+        self._postings = {}  # trigram -> array of entry numbers
+        for index, name in enumerate(self.names):
+            self._add(normalize(name), index)
+        # Names come first: an alias never hides a name that normalizes the same.
+        name_keys = set(self._exact)
+        for name, extra in (aliases or {}).items():
+            for alias in extra:
+                key = normalize(alias)
+                if key not in name_keys:
+                    self._add(key, self._index_of[name])
+
+    @classmethod
+    def from_store(cls, store):
+        return cls(store.graph.names, store.aliases)
+
+    def _add(self, key, index):
+        if not key:
+            return
+        known = self._exact.get(key)
+        if known == index:
+            return  # e.g. an alias that only differs from the name in case
+        self._exact[key] = index if known is None else _AMBIGUOUS
+        entry = len(self._keys)
+        self._keys.append(key)
+        self._targets.append(index)
+        trigrams = _trigrams(key)
+        self._sizes.append(len(trigrams))
+        for trigram in trigrams:
+            postings = self._postings.get(trigram)
+            if postings is None:
+                postings = self._postings[trigram] = array('i')
+            postings.append(entry)
+
+    def lookup(self, text):
+        """The map name ``text`` stands for by exact, normalized or alias match; None otherwise."""
+        index = self._index_of.get(text)
+        if index is None:
+            index = self._exact.get(normalize(text), _AMBIGUOUS)
+        return self.names[index] if index >= 0 else None
+
+    def _ranked(self, key, limit):
+        """[(name, score, matched key)] of the best fuzzy matches for a normalized query."""
+        query = _trigrams(key) if key else set()
+        lists = sorted((self._postings[trigram] for trigram in query if trigram in self._postings), key=len)
+        counts = Counter()
+        counted = 0
+        for postings in lists:
+            if counted and counted + len(postings) > POSTING_BUDGET:
+                break
+            counts.update(postings)
+            counted += len(postings)
+
+        # Entries sharing the most counted trigrams; ties are common, so this
+        # is a threshold pass rather than a heap over every candidate.
+        best = max(counts.values(), default=0)
+        candidates = [entry for entry, count in counts.items() if count >= best - 1]
+        if len(candidates) > RESCORE:
+            candidates = [entry for entry in candidates if counts[entry] == best][:RESCORE]
+        scored = []
+        for entry in candidates:
+            shared = len(query & _trigrams(self._keys[entry]))
+            score = 2 * shared / (len(query) + self._sizes[entry])
+            if score >= MIN_SCORE:
+                scored.append((-score, len(self._keys[entry]), self._keys[entry], entry))
+        scored.sort()
+        ranked, seen = [], set()
+        for negative_score, _, matched, entry in scored:
+            name = self.names[self._targets[entry]]
+            if name not in seen:
+                seen.add(name)
+                ranked.append((name, round(-negative_score, 3), matched))
+                if len(ranked) == limit:
+                    break
+        return ranked
+
+    def suggest(self, text, limit=5):
+        """Up to ``limit`` (name, similarity) pairs for ``text``, best first."""
+        return [(name, score) for name, score, _ in self._ranked(normalize(text), limit)]
+
+    def resolve(self, text, limit=5):
+        """Returns (name, suggestions) for typed ``text``.
+
+        ``name`` is the map name ``text`` stands for, or None; suggestions
+        (ranked names) are only given when it is None. A near miss is taken
+        as a typo when it is close to a single location and keeps the
+        query's numbers, so "Hostel Building 3" is not read as Hostel 2.
+        """
+        if not isinstance(text, str):
+            return None, []
+        name = self.lookup(text)
+        if name is not None:
+            return name, []
+        key = normalize(text)
+        ranked = self._ranked(key, limit)
+        if len(key) >= MIN_TYPO_LENGTH:
+            edits = 1 if len(key) <= 10 else 2
+            digits = _DIGITS.findall(key)
+            close = {name for name, _, matched in ranked
+                     if _DIGITS.findall(matched) == digits and _within_edits(key, matched, edits)}
+            if len(close) == 1:
+                return close.pop(), []
+        return None, [name for name, _, _ in ranked]
@@ -0,0 +1,45 @@
+import gzip
+import hashlib
+
+try:
+    import brotli
+except ImportError:  # optional: without it payloads are offered as gzip and identity only
+    brotli = None
+
+# ====================================================================
+# PRECOMPRESSED RESPONSE BODIES
+# =====================================================================
+
+# Read-mostly responses (the page itself, the location listing, the graph
+# metadata) only change when the map is reloaded. Each is rendered once and
+# compressed once at the highest levels, so serving it costs a dict lookup
+# instead of a serialization and a compression per request. The ETag is a
+# hash of the body, the same in every worker process, so a kiosk that
+# reloads gets a 304 from whichever worker answers.
+
+# Codings offered, most preferred first.
+PREFERRED_CODINGS = ('br', 'gzip')
+
+
+class Payload:
+    """One response body with its precompressed encodings and content-hash ETag."""
+
+    def __init__(self, body, content_type):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.content_type = content_type
+        self.etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.encodings = {'identity': body}
+        compressed = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed['br'] = brotli.compress(body, quality=11)
+        for coding, data in compressed.items():
+            if len(data) < len(body):
+                self.encodings[coding] = data
+
+    def encoded(self, quality):
+        """(coding, bytes) to send; ``quality(coding)`` is the client's preference for it, 0 if refused."""
+        for coding in PREFERRED_CODINGS:
+            if coding in self.encodings and quality(coding) > 0:
+                return coding, self.encodings[coding]
+        return 'identity', self.encodings['identity']
@@ -0,0 +1,85 @@
+import collections
+import threading
+
+# ====================================================================
+# BOUNDED LRU CACHE FOR RENDERED ROUTE RESPONSES
+# =====================================================================
+
+
+class RouteCache:
+    """LRU cache bounded by both entry count and total payload bytes.
+
+    Keys are expected to carry the graph version, e.g.
+    ``(start, goal, algorithm, graph_version)``, so entries computed on an
+    older graph are simply never hit again and age out of the LRU order.
+    Values are ``(status, body)`` pairs where ``body`` is the serialized
+    response, and its size in bytes (UTF-8, for a str body) is what counts
+    against the byte budget. An
+    optional ``meta`` object stored alongside lets ``invalidate`` drop just
+    the entries an edge update affects.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=8 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Returns the cached value for ``key`` (marking it most recent), or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value[:2]
+
+    def put(self, key, status, body, meta=None):
+        """Stores a rendered response, evicting least-recently-used entries to fit."""
+        size = len(body.encode("utf-8")) if isinstance(body, str) else len(body)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes_used -= old[3]
+            self._entries[key] = (status, body, meta, size)
+            self.bytes_used += size
+            while len(self._entries) > self.max_entries or self.bytes_used > self.max_bytes:
+                _, (_, _, _, evicted_size) = self._entries.popitem(last=False)
+                self.bytes_used -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, predicate):
+        """Drops every entry for which ``predicate(key, meta)`` is true; returns how many."""
+        with self._lock:
+            stale = [key for key, (_, _, meta, _) in self._entries.items() if predicate(key, meta)]
+            for key in stale:
+                self.bytes_used -= self._entries.pop(key)[3]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes_used = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes_used,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,120 @@
+import mmap
+import os
+import struct
+from array import array
+
+from campusnav.graph import INF
+from campusnav.search import shortest_path_tree
+
+# ====================================================================
+# ALL-PAIRS ROUTE TABLE (PRECOMPUTED, MEMORY-MAPPED)
+# =====================================================================
+
+# File layout (little endian):
+#   header   magic, format version, node count, graph fingerprint
+#   costs    node_count * node_count float64, row = source, column = target
+#   parents  node_count * node_count int32, predecessor of target on the
+#            shortest path from source (-1 at the source, -2 if unreachable)
+#
+# A predecessor table is stored rather than next hops: reading a row back
+# from the target gives exactly the path ``ucs`` returns from that source,
+# ties included, while next-hop chains would mix trees of different sources.
+MAGIC = b"CNRT"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sIQI4x")
+
+
+def build_route_table(graph, path):
+    """Runs Dijkstra from every node and writes the distance/predecessor table to ``path``."""
+    node_count = graph.node_count
+    costs = array('d')
+    parents = array('i')
+    for source in range(node_count):
+        row_costs, row_parents = shortest_path_tree(graph, source)
+        costs.extend(row_costs)
+        parents.extend(row_parents)
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, node_count, graph.fingerprint()))
+        costs.tofile(f)
+        parents.tofile(f)
+    os.replace(temp_path, path)
+
+
+class RouteTable:
+    """Memory-mapped view of a file written by ``build_route_table``.
+
+    The mapping is read-only. Rows that ``recompute_rows`` repairs after an
+    edge update are kept in ``patched_rows`` and read in place of the mapped
+    ones, so an edit costs two rows of memory, not a copy of the table.
+    """
+
+    def __init__(self, graph, mapped):
+        self.graph = graph
+        self._mapped = mapped
+        node_count = graph.node_count
+        cells = node_count * node_count
+        view = memoryview(mapped)
+        costs_start = HEADER.size
+        parents_start = costs_start + cells * 8
+        self.costs = view[costs_start:parents_start].cast('d')
+        self.parents = view[parents_start:parents_start + cells * 4].cast('i')
+        self.patched_rows = {}  # source -> (costs, parents) recomputed since loading
+
+    @classmethod
+    def open(cls, path, graph):
+        """Maps the table at ``path``; returns None if it is missing or built for another graph."""
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return None
+            magic, version, node_count, fingerprint = HEADER.unpack(header)
+            if (magic, version) != (MAGIC, FORMAT_VERSION):
+                return None
+            if node_count != graph.node_count or fingerprint != graph.fingerprint():
+                return None
+            expected_size = HEADER.size + node_count * node_count * 12
+            if os.fstat(f.fileno()).st_size != expected_size:
+                return None
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(graph, mapped)
+
+    def row(self, source):
+        """(costs, parents) from ``source`` to every node, indexed by target."""
+        patched = self.patched_rows.get(source)
+        if patched is not None:
+            return patched
+        node_count = self.graph.node_count
+        row = source * node_count
+        return self.costs[row:row + node_count], self.parents[row:row + node_count]
+
+    def recompute_rows(self, sources):
+        """Re-runs Dijkstra for the given source rows against the graph's current weights."""
+        for source in sources:
+            self.patched_rows[source] = shortest_path_tree(self.graph, source)
+
+    def lookup(self, start, goal):
+        """Returns (path_of_ids, distance) from the table, or (None, 0) if unreachable."""
+        if goal < 0:
+            return None, 0
+        costs, parents = self.row(start)
+        distance = costs[goal]
+        if distance == INF:
+            return None, 0
+        path = []
+        node = goal
+        while node != -1:
+            path.append(node)
+            node = parents[node]
+        path.reverse()
+        return path, distance
+
+    def route(self, graph, start, goal, stats=None):
+        """ID-based search signature for ``CompiledGraph.run``; table hits explore 0 nodes."""
+        path, distance = self.lookup(start, goal)
+        return path, distance, 0
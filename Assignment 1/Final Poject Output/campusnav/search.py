@@ -0,0 +1,538 @@
+import collections
+import heapq
+import math
+from array import array
+
+from campusnav.graph import INF
+
+# ====================================================================
+# SEARCH ALGORITHMS OVER A CompiledGraph
+# =====================================================================
+
+# Every function takes integer node IDs and returns
+# (path_of_ids, distance, nodes_explored); CompiledGraph.run() converts
+# names to IDs and back at the edge of the API. Searches keep a predecessor
+# map and only rebuild the path once the goal is popped, instead of copying
+# a path list on every push.
+
+
+# Closed edges carry weight INF; every search must treat them as absent.
+
+# Predecessor entries: -1 marks the start, UNSEEN a node not reached yet.
+UNSEEN = -2
+
+# Deepest round iddfs runs when no max_depth is given. Each round can walk
+# every loopless path up to its limit, exponentially many in the limit.
+DEFAULT_DEPTH_LIMIT = 8
+
+
+class DepthLimitReached(Exception):
+    """Raised by the depth-limited searches when they find no path but their limit cut some off.
+
+    The goal may then still be reachable by a longer path, so this is not
+    a plain "no path". ``nodes_explored`` is the effort spent all the same.
+    """
+
+    def __init__(self, max_depth, nodes_explored):
+        super().__init__(max_depth, nodes_explored)
+        self.max_depth = max_depth
+        self.nodes_explored = nodes_explored
+
+    def __str__(self):
+        return f"No path within {self.max_depth} corridors; a longer one may exist"
+
+
+def _parent_array(graph):
+    return array('i', [UNSEEN]) * graph.node_count
+
+
+def _cost_array(graph):
+    return array('d', [INF]) * graph.node_count
+
+
+class SearchStats:
+    """Effort counters a search adds to when it is called with ``stats=``.
+
+    pushes and pops count frontier (heap, queue or stack) operations,
+    stale entries included; edges_relaxed counts edges that improved a
+    node's cost and were queued; peak_frontier is the largest frontier
+    after an expansion.
+    """
+
+    __slots__ = ('pushes', 'pops', 'edges_relaxed', 'peak_frontier')
+
+    def __init__(self):
+        self.pushes = 0
+        self.pops = 0
+        self.edges_relaxed = 0
+        self.peak_frontier = 0
+
+    def add(self, pushes, pops, edges_relaxed, peak_frontier):
+        self.pushes += pushes
+        self.pops += pops
+        self.edges_relaxed += edges_relaxed
+        self.peak_frontier = max(self.peak_frontier, peak_frontier)
+
+    def merge(self, other):
+        self.add(other.pushes, other.pops, other.edges_relaxed, other.peak_frontier)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _record(stats, pops, frontier_left, peak_frontier, roots=1):
+    """Adds one search's effort to ``stats``.
+
+    Every push is either popped or still queued, and every push but the
+    ``roots`` is a relaxed edge, so the hot loops only need to track the peak.
+    """
+    if stats is not None:
+        pushes = pops + frontier_left
+        stats.add(pushes, pops, pushes - roots, peak_frontier)
+
+
+def _rebuild_path(parents, goal):
+    """Walks the predecessor array back from ``goal`` to the start."""
+    path = []
+    node = goal
+    while node != -1:
+        path.append(node)
+        node = parents[node]
+    path.reverse()
+    return path
+
+
+def bfs(graph, start, goal, stats=None):
+    """Breadth-First Search (BFS) explores the graph layer by layer."""
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    queue = collections.deque([start])
+    parents = _parent_array(graph)
+    parents[start] = -1
+    distances = _cost_array(graph)
+    distances[start] = 0
+    nodes_explored = 0
+    peak_frontier = 0
+    while queue:
+        nodes_explored += 1
+        current_node = queue.popleft()
+        if current_node == goal:
+            _record(stats, nodes_explored, len(queue), peak_frontier)
+            return _rebuild_path(parents, goal), distances[goal], nodes_explored
+        distance = distances[current_node]
+        for edge in range(offsets[current_node], offsets[current_node + 1]):
+            neighbor = targets[edge]
+            if parents[neighbor] == UNSEEN and weights[edge] < INF:
+                parents[neighbor] = current_node
+                distances[neighbor] = distance + weights[edge]
+                queue.append(neighbor)
+        peak_frontier = max(peak_frontier, len(queue))
+    _record(stats, nodes_explored, len(queue), peak_frontier)
+    return None, 0, nodes_explored
+
+
+def dfs(graph, start, goal, stats=None):
+    """Depth-First Search (DFS) dives deep into a single path first."""
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    stack = [(start, -1, 0)]
+    parents = _parent_array(graph)
+    nodes_explored = 0
+    peak_frontier = 0
+    while stack:
+        nodes_explored += 1
+        current_node, parent, distance = stack.pop()
+        if parents[current_node] != UNSEEN:
+            continue
+        parents[current_node] = parent
+        if current_node == goal:
+            _record(stats, nodes_explored, len(stack), peak_frontier)
+            return _rebuild_path(parents, goal), distance, nodes_explored
+        for edge in reversed(range(offsets[current_node], offsets[current_node + 1])):
+            neighbor = targets[edge]
+            if parents[neighbor] == UNSEEN and weights[edge] < INF:
+                stack.append((neighbor, current_node, distance + weights[edge]))
+        peak_frontier = max(peak_frontier, len(stack))
+    _record(stats, nodes_explored, len(stack), peak_frontier)
+    return None, 0, nodes_explored
+
+
+def _depth_limited(graph, start, goal, limit):
+    """DFS over loopless paths of at most ``limit`` edges, keeping only the current path.
+
+    Returns (path, distance, nodes_explored, cut_off, peak_depth). cut_off
+    tells whether some node at the limit still had edges, i.e. whether a
+    larger limit could find more.
+    """
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    if start == goal:
+        return [start], 0, 1, False, 1
+    # One frame per path step: the node, its cost so far and its next edge to try.
+    path = [start]
+    costs = [0]
+    next_edges = [offsets[start]]
+    on_path = {start}
+    nodes_explored = 1
+    peak_depth = 1
+    cut_off = False
+    while path:
+        node = path[-1]
+        edge = next_edges[-1]
+        if len(path) > limit or edge == offsets[node + 1]:
+            if len(path) > limit and offsets[node] < offsets[node + 1]:
+                cut_off = True
+            path.pop()
+            costs.pop()
+            next_edges.pop()
+            on_path.discard(node)
+            continue
+        next_edges[-1] = edge + 1
+        neighbor = targets[edge]
+        if neighbor in on_path or weights[edge] == INF:
+            continue
+        nodes_explored += 1
+        cost = costs[-1] + weights[edge]
+        if neighbor == goal:
+            return path + [neighbor], cost, nodes_explored, cut_off, peak_depth
+        path.append(neighbor)
+        costs.append(cost)
+        next_edges.append(offsets[neighbor])
+        on_path.add(neighbor)
+        peak_depth = max(peak_depth, len(path))
+    return None, 0, nodes_explored, cut_off, peak_depth
+
+
+def depth_limited_dfs(graph, start, goal, max_depth, stats=None):
+    """Depth-limited DFS: the first path of at most ``max_depth`` edges in DFS order.
+
+    Unlike ``dfs`` it keeps no per-node arrays: memory is O(max_depth), the
+    current path and its untried edges. The path found need not be short.
+    Raises DepthLimitReached when the limit may have hidden the goal.
+    """
+    path, distance, nodes_explored, cut_off, peak_depth = _depth_limited(graph, start, goal, max_depth)
+    # Every visited node was entered once and left or kept on the path.
+    _record(stats, nodes_explored, 0, peak_depth)
+    if path is None and cut_off:
+        raise DepthLimitReached(max_depth, nodes_explored)
+    return path, distance, nodes_explored
+
+
+def iddfs(graph, start, goal, max_depth=DEFAULT_DEPTH_LIMIT, stats=None):
+    """Iterative deepening DFS: depth-limited searches with limits 0, 1, 2, ... ``max_depth``.
+
+    Finds a path with the fewest edges, as BFS does, in O(depth) memory
+    instead of BFS's queue, as long as that path has at most ``max_depth``
+    edges; otherwise raises DepthLimitReached. Stops early once a limit
+    cuts nothing off. nodes_explored sums every round.
+    """
+    max_depth = min(max_depth, graph.node_count - 1)  # no loopless path is longer
+    nodes_explored = 0
+    peak_depth = 0
+    rounds = 0
+    path, distance, cut_off = None, 0, False
+    for limit in range(max_depth + 1):
+        path, distance, explored, cut_off, depth = _depth_limited(graph, start, goal, limit)
+        nodes_explored += explored
+        peak_depth = max(peak_depth, depth)
+        rounds += 1
+        if path is not None or not cut_off:
+            break
+    _record(stats, nodes_explored, 0, peak_depth, roots=rounds)
+    if path is None and cut_off:
+        raise DepthLimitReached(max_depth, nodes_explored)
+    return path, distance, nodes_explored
+
+
+def ucs(graph, start, goal, stats=None):
+    """Uniform Cost Search (UCS) finds the path with the lowest total cost."""
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    priority_queue = [(0, start)]
+    visited_costs = _cost_array(graph)
+    visited_costs[start] = 0
+    parents = _parent_array(graph)
+    parents[start] = -1
+    nodes_explored = 0
+    peak_frontier = 0
+    while priority_queue:
+        nodes_explored += 1
+        cost, current_node = heapq.heappop(priority_queue)
+        if current_node == goal:
+            _record(stats, nodes_explored, len(priority_queue), peak_frontier)
+            return _rebuild_path(parents, goal), cost, nodes_explored
+        if cost > visited_costs[current_node]:
+            continue  # Stale entry; a cheaper one was already expanded.
+        for edge in range(offsets[current_node], offsets[current_node + 1]):
+            neighbor = targets[edge]
+            new_cost = cost + weights[edge]
+            if new_cost < visited_costs[neighbor]:
+                visited_costs[neighbor] = new_cost
+                parents[neighbor] = current_node
+                heapq.heappush(priority_queue, (new_cost, neighbor))
+        peak_frontier = max(peak_frontier, len(priority_queue))
+    _record(stats, nodes_explored, len(priority_queue), peak_frontier)
+    return None, 0, nodes_explored
+
+
+def ucs_many(graph, start, goals):
+    """One UCS expansion from ``start`` that answers every goal in ``goals``.
+
+    Returns {goal: (path_of_ids, distance, nodes_explored)}. The pop order is
+    the same as ``ucs``, so each goal gets the path and nodes_explored count
+    a separate ``ucs(start, goal)`` call would report. The search stops as
+    soon as the last requested goal is popped.
+    """
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    pending = {goal for goal in goals if goal >= 0}
+    results = {}
+    priority_queue = [(0, start)]
+    visited_costs = _cost_array(graph)
+    visited_costs[start] = 0
+    parents = _parent_array(graph)
+    parents[start] = -1
+    nodes_explored = 0
+    while priority_queue and pending:
+        nodes_explored += 1
+        cost, current_node = heapq.heappop(priority_queue)
+        if current_node in pending:
+            pending.discard(current_node)
+            results[current_node] = (_rebuild_path(parents, current_node), cost, nodes_explored)
+            if not pending:
+                break
+        if cost > visited_costs[current_node]:
+            continue
+        for edge in range(offsets[current_node], offsets[current_node + 1]):
+            neighbor = targets[edge]
+            new_cost = cost + weights[edge]
+            if new_cost < visited_costs[neighbor]:
+                visited_costs[neighbor] = new_cost
+                parents[neighbor] = current_node
+                heapq.heappush(priority_queue, (new_cost, neighbor))
+    for goal in goals:
+        if goal not in results:
+            results[goal] = (None, 0, nodes_explored)
+    return results
+
+
+def ucs_within(graph, start, max_cost, stats=None):
+    """UCS from ``start`` bounded at ``max_cost``: nodes beyond the budget are never queued.
+
+    Returns (reached, nodes_explored), where ``reached`` lists (node, cost)
+    for every node within ``max_cost`` in the order they were settled, i.e.
+    by increasing cost, starting with (start, 0).
+    """
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    priority_queue = [(0, start)]
+    visited_costs = _cost_array(graph)
+    visited_costs[start] = 0
+    reached = []
+    nodes_explored = 0
+    peak_frontier = 0
+    while priority_queue:
+        nodes_explored += 1
+        cost, current_node = heapq.heappop(priority_queue)
+        if cost > visited_costs[current_node]:
+            continue
+        reached.append((current_node, cost))
+        for edge in range(offsets[current_node], offsets[current_node + 1]):
+            neighbor = targets[edge]
+            new_cost = cost + weights[edge]
+            if new_cost < visited_costs[neighbor] and new_cost <= max_cost:
+                visited_costs[neighbor] = new_cost
+                heapq.heappush(priority_queue, (new_cost, neighbor))
+        peak_frontier = max(peak_frontier, len(priority_queue))
+    _record(stats, nodes_explored, len(priority_queue), peak_frontier)
+    return reached, nodes_explored
+
+
+def shortest_path_tree(graph, start):
+    """Runs UCS from ``start`` without a goal and returns (costs, parents).
+
+    Uses the same heap ordering and strict-improvement rule as ``ucs``, so
+    the path read back from ``parents`` is the one ``ucs`` would return.
+    """
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    priority_queue = [(0, start)]
+    costs = _cost_array(graph)
+    costs[start] = 0
+    parents = _parent_array(graph)
+    parents[start] = -1
+    while priority_queue:
+        cost, current_node = heapq.heappop(priority_queue)
+        if cost > costs[current_node]:
+            continue
+        for edge in range(offsets[current_node], offsets[current_node + 1]):
+            neighbor = targets[edge]
+            new_cost = cost + weights[edge]
+            if new_cost < costs[neighbor]:
+                costs[neighbor] = new_cost
+                parents[neighbor] = current_node
+                heapq.heappush(priority_queue, (new_cost, neighbor))
+    return costs, parents
+
+
+def dijkstra_costs(offsets, others, weights, node_count, source):
+    """Distances from ``source`` over one CSR direction (forward, or reverse_edges())."""
+    costs = array('d', [INF]) * node_count
+    costs[source] = 0
+    priority_queue = [(0, source)]
+    while priority_queue:
+        cost, current_node = heapq.heappop(priority_queue)
+        if cost > costs[current_node]:
+            continue
+        for edge in range(offsets[current_node], offsets[current_node + 1]):
+            neighbor = others[edge]
+            new_cost = cost + weights[edge]
+            if new_cost < costs[neighbor]:
+                costs[neighbor] = new_cost
+                heapq.heappush(priority_queue, (new_cost, neighbor))
+    return costs
+
+
+def euclidean_distance(graph, node1, node2):
+    """Straight-line distance between two node IDs, or 0 if either has no coordinates."""
+    if node1 < 0 or node2 < 0 or not (graph.has_coords[node1] and graph.has_coords[node2]):
+        return 0
+    x1, y1 = graph.xs[node1], graph.ys[node1]
+    x2, y2 = graph.xs[node2], graph.ys[node2]
+    return math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
+
+
+def a_star(graph, start, goal, stats=None):
+    """A* Search combines cost with a heuristic for efficient pathfinding."""
+    return heuristic_search(graph, start, goal, lambda node: euclidean_distance(graph, node, goal), stats)
+
+
+def heuristic_search(graph, start, goal, heuristic, stats=None):
+    """A* with a pluggable ``heuristic(node)`` estimate of the remaining distance to ``goal``.
+
+    A heuristic may return INF for nodes it can prove cannot reach the goal;
+    those are never queued.
+    """
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    priority_queue = [(0 + heuristic(start), 0, start)]
+    visited_costs = _cost_array(graph)
+    visited_costs[start] = 0
+    parents = _parent_array(graph)
+    parents[start] = -1
+    nodes_explored = 0
+    peak_frontier = 0
+    while priority_queue:
+        nodes_explored += 1
+        f_cost, g_cost, current_node = heapq.heappop(priority_queue)
+        if current_node == goal:
+            _record(stats, nodes_explored, len(priority_queue), peak_frontier)
+            return _rebuild_path(parents, goal), g_cost, nodes_explored
+        if g_cost > visited_costs[current_node]:
+            continue
+        for edge in range(offsets[current_node], offsets[current_node + 1]):
+            neighbor = targets[edge]
+            new_g_cost = g_cost + weights[edge]
+            if new_g_cost < visited_costs[neighbor]:
+                visited_costs[neighbor] = new_g_cost
+                parents[neighbor] = current_node
+                new_f_cost = new_g_cost + heuristic(neighbor)
+                if new_f_cost < INF:
+                    heapq.heappush(priority_queue, (new_f_cost, new_g_cost, neighbor))
+        peak_frontier = max(peak_frontier, len(priority_queue))
+    _record(stats, nodes_explored, len(priority_queue), peak_frontier)
+    return None, 0, nodes_explored
+
+
+def _bidirectional(graph, start, goal, potential, stats=None):
+    """Shared forward/backward search behind ``bidirectional_ucs`` and ``bidirectional_a_star``.
+
+    ``potential(node)`` is the forward potential p(v); the forward queue is
+    keyed on g(v) + p(v) and the backward queue on g'(v) - p(v). With
+    consistent potentials, the search can stop once the two queue tops add
+    up to at least the best start-goal distance seen so far.
+    """
+    if start == goal:
+        _record(stats, 1, 0, 0)
+        return [start], 0, 1
+    if goal < 0:
+        return ucs(graph, start, goal, stats)
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    reverse_offsets, reverse_sources, reverse_weights = graph.reverse_edges()
+
+    forward_costs = _cost_array(graph)
+    forward_costs[start] = 0
+    forward_parents = _parent_array(graph)
+    forward_parents[start] = -1
+    backward_costs = _cost_array(graph)
+    backward_costs[goal] = 0
+    # For the backward search the "parent" is the next node towards the goal.
+    backward_parents = _parent_array(graph)
+    backward_parents[goal] = -1
+
+    forward_queue = [(potential(start), start)]
+    backward_queue = [(-potential(goal), goal)]
+    best_distance = INF
+    meeting_node = -1
+    nodes_explored = 0
+    peak_frontier = 0
+    while forward_queue and backward_queue:
+        if forward_queue[0][0] + backward_queue[0][0] >= best_distance:
+            break
+        nodes_explored += 1
+        if forward_queue[0][0] <= backward_queue[0][0]:
+            key, current_node = heapq.heappop(forward_queue)
+            cost = forward_costs[current_node]
+            if key > cost + potential(current_node):
+                continue
+            for edge in range(offsets[current_node], offsets[current_node + 1]):
+                neighbor = targets[edge]
+                new_cost = cost + weights[edge]
+                if new_cost < forward_costs[neighbor]:
+                    forward_costs[neighbor] = new_cost
+                    forward_parents[neighbor] = current_node
+                    heapq.heappush(forward_queue, (new_cost + potential(neighbor), neighbor))
+                    if new_cost + backward_costs[neighbor] < best_distance:
+                        best_distance = new_cost + backward_costs[neighbor]
+                        meeting_node = neighbor
+        else:
+            key, current_node = heapq.heappop(backward_queue)
+            cost = backward_costs[current_node]
+            if key > cost - potential(current_node):
+                continue
+            for edge in range(reverse_offsets[current_node], reverse_offsets[current_node + 1]):
+                neighbor = reverse_sources[edge]
+                new_cost = cost + reverse_weights[edge]
+                if new_cost < backward_costs[neighbor]:
+                    backward_costs[neighbor] = new_cost
+                    backward_parents[neighbor] = current_node
+                    heapq.heappush(backward_queue, (new_cost - potential(neighbor), neighbor))
+                    if new_cost + forward_costs[neighbor] < best_distance:
+                        best_distance = new_cost + forward_costs[neighbor]
+                        meeting_node = neighbor
+        peak_frontier = max(peak_frontier, len(forward_queue) + len(backward_queue))
+
+    _record(stats, nodes_explored, len(forward_queue) + len(backward_queue), peak_frontier, roots=2)
+    if meeting_node < 0:
+        return None, 0, nodes_explored
+    path = _rebuild_path(forward_parents, meeting_node)
+    node = backward_parents[meeting_node]
+    while node != -1:
+        path.append(node)
+        node = backward_parents[node]
+    return path, best_distance, nodes_explored
+
+
+def bidirectional_ucs(graph, start, goal, stats=None):
+    """Bidirectional UCS: Dijkstra forward from the start and backward from the goal."""
+    return _bidirectional(graph, start, goal, lambda node: 0, stats)
+
+
+def bidirectional_a_star(graph, start, goal, stats=None):
+    """Bidirectional A* using the average of the forward and backward Euclidean heuristics.
+
+    p(v) = (h(v, goal) - h(start, v)) / 2 keeps both directions working on
+    the same reduced edge costs, so the stopping rule is exact because h is
+    consistent: the straight-line distance scaled by graph.heuristic_scale.
+    Where no such scale holds (a node without coordinates, or an edge
+    lowered at runtime below its compiled weight) this is bidirectional UCS.
+    """
+    scale = graph.heuristic_scale
+    if not scale or graph.lowered_edges:
+        return bidirectional_ucs(graph, start, goal, stats)
+
+    def potential(node):
+        return scale * (euclidean_distance(graph, node, goal) - euclidean_distance(graph, start, node)) / 2
+    return _bidirectional(graph, start, goal, potential, stats)
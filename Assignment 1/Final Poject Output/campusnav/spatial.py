@@ -0,0 +1,124 @@
+import heapq
+import math
+from array import array
+
+# ====================================================================
+# SPATIAL INDEX OVER LOCATION COORDINATES
+# =====================================================================
+
+# Locations with coordinates are bucketed into a uniform grid of square
+# cells, sized for a few locations per cell. A bounding-box query reads only
+# the cells the box overlaps. A nearest-location query reads rings of cells
+# outward from the query point's cell and stops once no unread cell can hold
+# anything closer than the k-th best found (or anything within
+# ``max_distance``), so clicks and GPS fixes cost the same on a campus map
+# and on a district map. Coordinates are in the map file's frame.
+
+# Target average number of locations per occupied cell.
+POINTS_PER_CELL = 4
+
+
+class SpatialIndex:
+    """Grid buckets over the nodes of a CompiledGraph that have coordinates."""
+
+    def __init__(self, graph):
+        self.graph = graph
+        nodes = [node for node in range(graph.node_count) if graph.has_coords[node]]
+        self.size = len(nodes)
+        self.cells = {}
+        if not nodes:
+            return
+        xs, ys = graph.xs, graph.ys
+        self.min_x, self.max_x = min(xs[node] for node in nodes), max(xs[node] for node in nodes)
+        self.min_y, self.max_y = min(ys[node] for node in nodes), max(ys[node] for node in nodes)
+        width, height = self.max_x - self.min_x, self.max_y - self.min_y
+        area = width * height
+        if area > 0:
+            self.cell_size = math.sqrt(area * POINTS_PER_CELL / len(nodes))
+        else:
+            # Every location on one line (or one point).
+            self.cell_size = max(width, height, 1.0) * POINTS_PER_CELL / len(nodes) or 1.0
+        for node in nodes:
+            key = self._cell(xs[node], ys[node])
+            bucket = self.cells.get(key)
+            if bucket is None:
+                bucket = self.cells[key] = array('i')
+            bucket.append(node)
+        self.cell_bounds = (self._cell(self.min_x, self.min_y), self._cell(self.max_x, self.max_y))
+
+    def __len__(self):
+        return self.size
+
+    def _cell(self, x, y):
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def within(self, min_x, min_y, max_x, max_y):
+        """Nodes whose coordinates lie in the box (edges included), in node order."""
+        if not self.size or min_x > max_x or min_y > max_y:
+            return []
+        (low_x, low_y), (high_x, high_y) = self.cell_bounds
+        (from_x, from_y), (to_x, to_y) = self._cell(min_x, min_y), self._cell(max_x, max_y)
+        from_x, from_y, to_x, to_y = max(from_x, low_x), max(from_y, low_y), min(to_x, high_x), min(to_y, high_y)
+        if from_x > to_x or from_y > to_y:
+            return []
+        if (to_x - from_x + 1) * (to_y - from_y + 1) > len(self.cells):
+            buckets = (bucket for (x, y), bucket in self.cells.items() if from_x <= x <= to_x and from_y <= y <= to_y)
+        else:
+            buckets = (self.cells.get((x, y), ()) for x in range(from_x, to_x + 1) for y in range(from_y, to_y + 1))
+        xs, ys = self.graph.xs, self.graph.ys
+        found = [node for bucket in buckets for node in bucket
+                 if min_x <= xs[node] <= max_x and min_y <= ys[node] <= max_y]
+        found.sort()
+        return found
+
+    def _ring(self, center_x, center_y, radius):
+        """Cells at Chebyshev distance ``radius`` from the center cell, clipped to the occupied extent."""
+        (low_x, low_y), (high_x, high_y) = self.cell_bounds
+        if radius == 0:
+            yield center_x, center_y
+            return
+        left, right = max(center_x - radius, low_x), min(center_x + radius, high_x)
+        for y in (center_y - radius, center_y + radius):
+            if low_y <= y <= high_y:
+                for x in range(left, right + 1):
+                    yield x, y
+        bottom, top = max(center_y - radius + 1, low_y), min(center_y + radius - 1, high_y)
+        for x in (center_x - radius, center_x + radius):
+            if low_x <= x <= high_x:
+                for y in range(bottom, top + 1):
+                    yield x, y
+
+    def nearest(self, x, y, k=1, max_distance=None):
+        """The ``k`` nodes closest to (x, y), as [(distance, node)] nearest first.
+
+        Only nodes within ``max_distance`` are returned when it is given. Ties
+        go to the lower node ID.
+        """
+        if not self.size or k < 1:
+            return []
+        limit = math.inf if max_distance is None else max_distance
+        xs, ys = self.graph.xs, self.graph.ys
+        center_x, center_y = self._cell(x, y)
+        (low_x, low_y), (high_x, high_y) = self.cell_bounds
+        # Rings that miss the occupied extent entirely are skipped.
+        radius = max(low_x - center_x, center_x - high_x, low_y - center_y, center_y - high_y, 0)
+        last_radius = max(center_x - low_x, high_x - center_x, center_y - low_y, high_y - center_y)
+        best = []  # max-heap of (-distance, -node), the k best so far
+        while radius <= last_radius:
+            # Nothing outside the rings read so far is closer than this.
+            reach = min(x - (center_x - radius) * self.cell_size, (center_x + radius + 1) * self.cell_size - x,
+                        y - (center_y - radius) * self.cell_size, (center_y + radius + 1) * self.cell_size - y)
+            for cell in self._ring(center_x, center_y, radius):
+                for node in self.cells.get(cell, ()):
+                    distance = math.hypot(xs[node] - x, ys[node] - y)
+                    if distance > limit:
+                        continue
+                    entry = (-distance, -node)
+                    if len(best) < k:
+                        heapq.heappush(best, entry)
+                    elif entry > best[0]:
+                        heapq.heapreplace(best, entry)
+            if reach > limit or (len(best) == k and -best[0][0] < reach):
+                break
+            radius += 1
+        return sorted((-distance, -node) for distance, node in best)
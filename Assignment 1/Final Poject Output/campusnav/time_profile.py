@@ -0,0 +1,157 @@
+import heapq
+from array import array
+
+from campusnav.graph import INF
+from campusnav.search import _cost_array, _parent_array, _rebuild_path, _record
+
+# ====================================================================
+# TIME-DEPENDENT (TIME-OF-DAY) EDGE WEIGHTS
+# =====================================================================
+
+# Edge cost is travel time in seconds: distance / (speed * speed_factor * crowding),
+# where crowding comes from a profile of periods such as
+#     ("12:00", "14:00", {'Cafeteria', 'Food Court'}, 0.6)
+# applied to every edge touching one of the listed locations. The day is cut
+# into fixed intervals and one weight array is precomputed per distinct set
+# of active periods, so a query only indexes arrays and never recomputes factors.
+#
+# The speed on an edge changes at the interval boundary even mid-edge: the
+# part walked before it goes at the old rate, the rest at the new one. So
+# entering an edge later never means leaving it earlier (the FIFO property),
+# which is what makes Dijkstra on arrival times an exact earliest-arrival
+# search. Charging the whole edge at its entry interval's rate would not be.
+
+MINUTES_PER_DAY = 24 * 60
+SECONDS_PER_DAY = MINUTES_PER_DAY * 60
+
+
+def parse_clock(value):
+    """Converts "HH:MM" into minutes after midnight; raises ValueError if malformed."""
+    if not isinstance(value, str) or value.count(":") != 1:
+        raise ValueError(f"invalid time of day: {value!r}")
+    hours, minutes = value.split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"invalid time of day: {value!r}")
+    return hours * 60 + minutes
+
+
+class TimeDependentWeights:
+    """Per-interval travel-time arrays for a CompiledGraph and a crowding profile."""
+
+    def __init__(self, graph, walking_speed, profile, interval_minutes=15):
+        self.interval_minutes = interval_minutes
+        interval_count = -(-MINUTES_PER_DAY // interval_minutes)
+
+        self.walking_speed = walking_speed
+        self.periods = []
+        for begin, end, locations, factor in profile:
+            node_ids = {graph.node_id(name) for name in locations} - {-1}
+            self.periods.append((parse_clock(begin), parse_clock(end), node_ids, factor))
+
+        # Map every interval to the set of periods active at its start, then
+        # give each distinct set its own weight array.
+        self.slot_of_interval = array('i', [0]) * interval_count
+        slot_keys = {}
+        for interval in range(interval_count):
+            minute = interval * interval_minutes
+            active = frozenset(
+                index for index, (begin, end, _, _) in enumerate(self.periods)
+                if (begin <= minute < end if begin <= end else minute >= begin or minute < end)
+            )
+            if active not in slot_keys:
+                slot_keys[active] = len(slot_keys)
+            self.slot_of_interval[interval] = slot_keys[active]
+
+        self.slot_periods = [None] * len(slot_keys)
+        self.slot_weights = [None] * len(slot_keys)
+        for active, slot in slot_keys.items():
+            self.slot_periods[slot] = active
+            weights = array('d', [INF]) * graph.edge_count
+            for node in range(graph.node_count):
+                for edge in range(graph.offsets[node], graph.offsets[node + 1]):
+                    weights[edge] = self._travel_seconds(graph, node, edge, active)
+            self.slot_weights[slot] = weights
+
+    def _travel_seconds(self, graph, node, edge, active):
+        factor = graph.speeds[edge]
+        target = graph.targets[edge]
+        for index in active:
+            if node in self.periods[index][2] or target in self.periods[index][2]:
+                factor *= self.periods[index][3]
+        if factor > 0 and graph.weights[edge] < INF:
+            return graph.weights[edge] / (self.walking_speed * factor)
+        return INF
+
+    def update_edges(self, graph, source, target):
+        """Refreshes every slot's travel time for source -> target after a weight change."""
+        for edge in graph.edges_between(source, target):
+            for slot, active in enumerate(self.slot_periods):
+                self.slot_weights[slot][edge] = self._travel_seconds(graph, source, edge, active)
+
+    def weights_at(self, seconds):
+        """Travel-time array in effect at ``seconds`` after midnight (wrapping past midnight)."""
+        interval = int(seconds % SECONDS_PER_DAY) // 60 // self.interval_minutes
+        return self.slot_weights[self.slot_of_interval[interval]]
+
+    def interval_end(self, seconds):
+        """Time, on the same clock as ``seconds``, at which the interval in effect at ``seconds`` ends."""
+        interval_seconds = self.interval_minutes * 60
+        into_day = seconds % SECONDS_PER_DAY
+        day_start = seconds - into_day
+        return day_start + min((into_day // interval_seconds + 1) * interval_seconds, SECONDS_PER_DAY)
+
+    def crossing_seconds(self, edge, seconds):
+        """Seconds to walk ``edge`` entered at ``seconds``, each part at the rate of the interval it falls in."""
+        elapsed = 0.0
+        remaining = 1.0  # fraction of the edge still to walk
+        while True:
+            full = self.weights_at(seconds)[edge]  # whole edge at this interval's rate
+            if full == INF:
+                return INF
+            end = self.interval_end(seconds)
+            if seconds + remaining * full <= end:
+                return elapsed + remaining * full
+            remaining -= (end - seconds) / full
+            elapsed += end - seconds
+            seconds = end
+
+    def route(self, graph, start, goal, depart_seconds=0, stats=None):
+        """Earliest-arrival Dijkstra; returns (path, travel_seconds, nodes_explored).
+
+        An edge that ends within the interval it is entered in costs one
+        array lookup; only edges that cross an interval boundary go through
+        crossing_seconds, so a query costs about the same as ``ucs``.
+        """
+        offsets, targets = graph.offsets, graph.targets
+        priority_queue = [(0, start)]
+        visited_costs = _cost_array(graph)
+        visited_costs[start] = 0
+        parents = _parent_array(graph)
+        parents[start] = -1
+        nodes_explored = 0
+        peak_frontier = 0
+        while priority_queue:
+            nodes_explored += 1
+            cost, current_node = heapq.heappop(priority_queue)
+            if current_node == goal:
+                _record(stats, nodes_explored, len(priority_queue), peak_frontier)
+                return _rebuild_path(parents, goal), cost, nodes_explored
+            if cost > visited_costs[current_node]:
+                continue
+            weights = self.weights_at(depart_seconds + cost)
+            # Travel time still left in the current interval.
+            interval_left = self.interval_end(depart_seconds + cost) - depart_seconds - cost
+            for edge in range(offsets[current_node], offsets[current_node + 1]):
+                neighbor = targets[edge]
+                if weights[edge] <= interval_left:
+                    new_cost = cost + weights[edge]
+                else:
+                    new_cost = cost + self.crossing_seconds(edge, depart_seconds + cost)
+                if new_cost < visited_costs[neighbor]:
+                    visited_costs[neighbor] = new_cost
+                    parents[neighbor] = current_node
+                    heapq.heappush(priority_queue, (new_cost, neighbor))
+            peak_frontier = max(peak_frontier, len(priority_queue))
+        _record(stats, nodes_explored, len(priority_queue), peak_frontier)
+        return None, 0, nodes_explored
@@ -0,0 +1,192 @@
+from campusnav.graph import INF
+from campusnav.search import ucs_many
+
+# ====================================================================
+# MULTI-STOP TOURS
+# =====================================================================
+
+# A tour visits a list of stops starting at the first one. The pairwise
+# stop-to-stop distances come from one one-to-many UCS per stop (N searches
+# for N stops, not N * N), and the visiting order is then solved on that
+# matrix alone: exactly by Held-Karp dynamic programming for small stop
+# sets, otherwise by nearest neighbour improved with 2-opt and Or-opt moves.
+# Edges are directed, so the matrix need not be symmetric and every move
+# is costed in the direction it is walked.
+
+# Held-Karp is O(2^n * n^2); 12 stops is about 250k steps.
+HELD_KARP_MAX_STOPS = 12
+
+_EPSILON = 1e-9
+
+
+def distance_matrix(graph, stops):
+    """Shortest distances and paths between every ordered pair of ``stops`` (node IDs).
+
+    Returns (matrix, legs, nodes_explored): ``matrix[i][j]`` is the distance
+    from stop i to stop j (INF if unreachable) and ``legs[i][j]`` the path of
+    IDs, or None.
+    """
+    matrix, legs = [], []
+    nodes_explored = 0
+    for start in stops:
+        found = ucs_many(graph, start, stops)
+        matrix.append([found[goal][1] if found[goal][0] is not None else INF for goal in stops])
+        legs.append([found[goal][0] for goal in stops])
+        nodes_explored += max(result[2] for result in found.values())
+    return matrix, legs, nodes_explored
+
+
+def _leg_cost(matrix):
+    """Cost of walking a -> b, where b None is the free end of an open tour."""
+    return lambda a, b: 0 if b is None else matrix[a][b]
+
+
+def tour_cost(matrix, order):
+    return sum(matrix[a][b] for a, b in zip(order, order[1:]))
+
+
+def _tour_ends(stop_count, round_trip, fixed_end):
+    """Returns (stops whose position is free, fixed stops after them).
+
+    ``round_trip`` returns to stop 0 at the end; otherwise ``fixed_end``
+    keeps the last stop last.
+    """
+    if round_trip:
+        return list(range(1, stop_count)), [0]
+    if fixed_end and stop_count > 1:
+        return list(range(1, stop_count - 1)), [stop_count - 1]
+    return list(range(1, stop_count)), []
+
+
+def held_karp(matrix, round_trip=False, fixed_end=False):
+    """Exact visiting order over ``matrix``, starting at stop 0; a list of stop indices."""
+    free, tail = _tour_ends(len(matrix), round_trip, fixed_end)
+    if not free:
+        return [0] + tail
+
+    def closing(stop):
+        return matrix[stop][tail[0]] if tail else 0
+
+    size = len(free)
+    # costs[mask][i]: cheapest walk from stop 0 through the free stops in mask, ending at free[i].
+    costs = [[INF] * size for _ in range(1 << size)]
+    parents = [[-1] * size for _ in range(1 << size)]
+    for i, stop in enumerate(free):
+        costs[1 << i][i] = matrix[0][stop]
+    for mask in range(1, 1 << size):
+        row = costs[mask]
+        for i in range(size):
+            cost = row[i]
+            if cost == INF or not mask & (1 << i):
+                continue
+            from_row = matrix[free[i]]
+            for j in range(size):
+                if mask & (1 << j):
+                    continue
+                new_cost = cost + from_row[free[j]]
+                next_mask = mask | (1 << j)
+                if new_cost < costs[next_mask][j]:
+                    costs[next_mask][j] = new_cost
+                    parents[next_mask][j] = i
+
+    full = (1 << size) - 1
+    last = min(range(size), key=lambda i: costs[full][i] + closing(free[i]))
+    if costs[full][last] + closing(free[last]) == INF:
+        return [0] + free + tail  # no order connects every stop
+    order = []
+    mask = full
+    while last >= 0:
+        order.append(free[last])
+        mask, last = mask & ~(1 << last), parents[mask][last]
+    return [0] + order[::-1] + tail
+
+
+def _nearest_neighbour(matrix, round_trip, fixed_end):
+    free, tail = _tour_ends(len(matrix), round_trip, fixed_end)
+    remaining = set(free)
+    order = [0]
+    while remaining:
+        here = matrix[order[-1]]
+        # Ties go to the lower index, so the result does not depend on set order.
+        nearest = min(remaining, key=lambda stop: (here[stop], stop))
+        order.append(nearest)
+        remaining.discard(nearest)
+    return order + tail
+
+
+def _two_opt(order, last_movable, leg):
+    """Applies the first improving segment reversal; returns whether one was found."""
+    for i in range(1, last_movable):
+        before = order[i - 1]
+        forward = backward = 0
+        for j in range(i + 1, last_movable + 1):
+            forward += leg(order[j - 1], order[j])
+            backward += leg(order[j], order[j - 1])
+            after = order[j + 1] if j + 1 < len(order) else None
+            old = leg(before, order[i]) + forward + leg(order[j], after)
+            new = leg(before, order[j]) + backward + leg(order[i], after)
+            if new < old - _EPSILON:
+                order[i:j + 1] = order[i:j + 1][::-1]
+                return True
+    return False
+
+
+def _or_opt(order, last_movable, leg):
+    """Applies the first improving move of a 1-3 stop segment elsewhere; returns whether one was found."""
+    fixed_tail = len(order) - 1 - last_movable
+    for length in (1, 2, 3):
+        for i in range(1, last_movable - length + 2):
+            segment = order[i:i + length]
+            before = order[i - 1]
+            after = order[i + length] if i + length < len(order) else None
+            saved = leg(before, segment[0]) + leg(segment[-1], after) - leg(before, after)
+            rest = order[:i] + order[i + length:]
+            for k in range(len(rest) - fixed_tail):
+                if k == i - 1:
+                    continue
+                left = rest[k]
+                right = rest[k + 1] if k + 1 < len(rest) else None
+                added = leg(left, segment[0]) + leg(segment[-1], right) - leg(left, right)
+                if added < saved - _EPSILON:
+                    order[:] = rest[:k + 1] + segment + rest[k + 1:]
+                    return True
+    return False
+
+
+def improve_tour(matrix, round_trip=False, fixed_end=False):
+    """Heuristic visiting order: nearest neighbour, then 2-opt and Or-opt until neither improves it."""
+    order = _nearest_neighbour(matrix, round_trip, fixed_end)
+    leg = _leg_cost(matrix)
+    last_movable = len(order) - 1 - len(_tour_ends(len(matrix), round_trip, fixed_end)[1])
+    while _two_opt(order, last_movable, leg) or _or_opt(order, last_movable, leg):
+        pass
+    return order
+
+
+def plan_tour(graph, stops, optimize=True, round_trip=False, fixed_end=False):
+    """Plans a tour over ``stops`` (node IDs), starting at the first one.
+
+    Without ``optimize`` the stops are visited in the given order.
+    ``round_trip`` ends back at the first stop; otherwise ``fixed_end``
+    keeps the last stop last. Returns
+    (order, path_of_ids, distance, leg_distances, nodes_explored, solver):
+    ``order`` lists stop indices in visiting order, ``leg_distances`` the
+    distance between each consecutive pair of it. The path is None if some
+    leg of the best order found is unreachable.
+    """
+    matrix, legs, nodes_explored = distance_matrix(graph, stops)
+    if not optimize:
+        order, solver = list(range(len(stops))) + ([0] if round_trip else []), "fixed"
+    elif len(stops) <= HELD_KARP_MAX_STOPS:
+        order, solver = held_karp(matrix, round_trip, fixed_end), "held-karp"
+    else:
+        order, solver = improve_tour(matrix, round_trip, fixed_end), "heuristic"
+
+    leg_distances = [matrix[a][b] for a, b in zip(order, order[1:])]
+    distance = sum(leg_distances)
+    if distance == INF:
+        return order, None, 0, leg_distances, nodes_explored, solver
+    path = [stops[order[0]]]
+    for a, b in zip(order, order[1:]):
+        path.extend(legs[a][b][1:])
+    return order, path, distance, leg_distances, nodes_explored, solver
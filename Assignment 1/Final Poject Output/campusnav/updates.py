@@ -0,0 +1,63 @@
+from campusnav.graph import INF
+from campusnav.search import dijkstra_costs
+
+# ====================================================================
+# INCREMENTAL REPAIR AFTER AN EDGE CHANGE
+# =====================================================================
+
+# When a single edge u -> v changes from ``old`` to ``new`` weight, only some
+# shortest-path trees can change:
+#   heavier (or closed): trees that actually use u -> v
+#   lighter (or reopened): trees where d(s, u) + new <= d(s, v), i.e. the
+#                          edge now ties or beats the current route to v
+# Ties count as affected so repaired routes match a fresh ucs exactly.
+
+
+def affected_table_rows(table, source, target, old_weight, new_weight):
+    """Source rows of a RouteTable whose shortest-path tree depends on source -> target."""
+    rows = []
+    for row_source in range(table.graph.node_count):
+        costs, parents = table.row(row_source)
+        if new_weight > old_weight:
+            if parents[target] == source:
+                rows.append(row_source)
+        else:
+            to_source = costs[source]
+            if to_source < INF and to_source + new_weight <= costs[target]:
+                rows.append(row_source)
+    return rows
+
+
+def stale_route_predicate(graph, source, target, old_weight, new_weight, exact_algorithms):
+    """Builds a RouteCache.invalidate predicate for one edge change.
+
+    Cache metadata is (algorithm, start_id, goal_id, distance, path_ids),
+    with distance INF and path None for "No path found" entries. Routes
+    from ``exact_algorithms`` (always-optimal searches) are kept unless the
+    change can affect them. Results of every other algorithm depend on
+    exploration order, so any change drops them.
+    """
+    if new_weight > old_weight:
+        def is_stale(key, meta):
+            algorithm, _, _, _, path = meta
+            if algorithm not in exact_algorithms:
+                return True
+            return path is not None and any(
+                u == source and v == target for u, v in zip(path, path[1:]))
+        return is_stale
+
+    # A cheaper edge helps (start, goal) only if d(start, u) + new + d(v, goal)
+    # ties or beats the cached distance; two Dijkstra runs answer that for all entries.
+    reverse_offsets, reverse_sources, reverse_weights = graph.reverse_edges()
+    to_source = dijkstra_costs(reverse_offsets, reverse_sources, reverse_weights, graph.node_count, source)
+    from_target = dijkstra_costs(graph.offsets, graph.targets, graph.weights, graph.node_count, target)
+
+    def is_stale(key, meta):
+        algorithm, start, goal, distance, _ = meta
+        if algorithm not in exact_algorithms:
+            return True
+        if start < 0 or goal < 0:
+            return False
+        via_edge = to_source[start] + new_weight + from_target[goal]
+        return via_edge < INF and via_edge <= distance
+    return is_stale
@@ -0,0 +1,36 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from campusnav import CompiledGraph
+from campusnav.campus_map import parse_map
+
+
+@pytest.fixture(scope="session")
+def campus_graph():
+    """The CompiledGraph of campus_map.json, compiled in memory (no campus_map.bin is written)."""
+    with open(os.path.join(ROOT, "campus_map.json"), encoding="utf-8") as f:
+        graph, coords, *_ = parse_map(f.read())
+    return CompiledGraph.from_dict(graph, coords)
+
+
+@pytest.fixture(scope="session")
+def campus_pairs(campus_graph):
+    """Every (start, goal) pair of campus node IDs, including start == goal."""
+    return [(start, goal) for start in range(campus_graph.node_count) for goal in range(campus_graph.node_count)]
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """OUTPUT WITH FRONTEND/app.py, imported on a copy of the campus map so its compiled file lands in a temp dir."""
+    map_path = tmp_path_factory.mktemp("map") / "campus_map.json"
+    shutil.copyfile(os.path.join(ROOT, "campus_map.json"), map_path)
+    os.environ["CAMPUS_MAP_PATH"] = str(map_path)
+    sys.path.insert(0, os.path.join(ROOT, "OUTPUT WITH FRONTEND"))
+    import app
+    return app
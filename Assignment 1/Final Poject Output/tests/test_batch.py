@@ -0,0 +1,43 @@
+import io
+import multiprocessing
+
+import pytest
+
+
+def test_grouped_ucs_batch_matches_single_queries(app_module, monkeypatch):
+    overlay = app_module.map_state.building_overlay
+    assert overlay, "the shipped map has buildings, so batches go through the overlay"
+    calls = []
+
+    def route_many(graph, start, goals):
+        calls.append(start)
+        return type(overlay).route_many(overlay, graph, start, goals)
+
+    monkeypatch.setattr(overlay, "route_many", route_many)
+    names = sorted(app_module.map_state.coords)
+    queries = [{"start": start, "goal": goal, "algorithm": "UCS"} for start in names for goal in names]
+    client = app_module.app.test_client()
+
+    app_module.route_cache.clear()
+    batch = client.post("/api/navigate/batch", json={"queries": queries}).get_json()["results"]
+    assert len(calls) == len(names)
+
+    app_module.route_cache.clear()
+    for query, body in zip(queries, batch):
+        assert client.post("/api/navigate", json=query).get_json() == body, query
+
+
+@pytest.mark.parametrize("start_method", multiprocessing.get_all_start_methods())
+def test_bot_batch_workers_match_a_serial_run(start_method, monkeypatch):
+    import BOTBRAIN
+
+    monkeypatch.setattr(BOTBRAIN, "BATCH_START_METHOD", start_method)
+    names = sorted(BOTBRAIN.building_coords)[:6]
+    lines = ["start,goal,algorithm\n"] + [f"{start},{goal},{algorithm}\n" for start in names for goal in names
+                                          for algorithm in ("UCS", "BFS", "A*")] + ["Nowhere,Library,UCS\n"]
+    outputs = []
+    for workers in (1, 2):
+        output = io.StringIO()
+        assert BOTBRAIN.run_batch(iter(lines), "csv", output, "UCS", workers) == (len(lines) - 1, 1)
+        outputs.append(output.getvalue())
+    assert outputs[0] == outputs[1]
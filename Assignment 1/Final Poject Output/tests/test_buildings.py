@@ -0,0 +1,46 @@
+import random
+from array import array
+
+from benchmarks.synthetic_graphs import grid_graph
+from campusnav import CompiledGraph, search
+from campusnav.buildings import BuildingOverlay
+
+
+def add_buildings(graph, coords, side, buildings, floors, rooms, rng):
+    """Adds indoor locations ``b{i}f{floor}r{room}`` to the grid; returns {indoor name: building}."""
+    building_of = {}
+
+    def link(a, b, dist):
+        graph.setdefault(a, []).append((b, dist, 1.0))
+        graph.setdefault(b, []).append((a, dist, 1.0))
+
+    for building in range(buildings):
+        row, col = rng.randrange(side), rng.randrange(side - 1)
+        entrances = (f"g{row}_{col}", f"g{row}_{col + 1}")
+        x, y = coords[entrances[0]]
+        for floor in range(floors):
+            for room in range(rooms):
+                name = f"b{building}f{floor}r{room}"
+                building_of[name] = building
+                coords[name] = (x + room, y)
+                if room:
+                    link(f"b{building}f{floor}r{room - 1}", name, 4)
+            if floor:
+                link(f"b{building}f{floor - 1}r0", f"b{building}f{floor}r0", 6)
+        link(entrances[0], f"b{building}f0r0", 3)
+        link(entrances[1], f"b{building}f0r{rooms - 1}", 3)
+    return building_of
+
+
+def test_overlay_distances_match_the_flat_graph():
+    rng = random.Random(0)
+    graph, coords = grid_graph(10, 10)
+    indoor = add_buildings(graph, coords, 10, 6, 3, 5, rng)
+    compiled = CompiledGraph.from_dict(graph, coords)
+    building_of = array('i', [indoor.get(name, -1) for name in compiled.names])
+    overlay = BuildingOverlay(compiled, building_of, [f"Block {i}" for i in range(6)])
+    for _ in range(200):
+        start, goal = rng.sample(range(compiled.node_count), 2)
+        flat, layered = search.ucs(compiled, start, goal), overlay.route(compiled, start, goal)
+        assert abs(flat[1] - layered[1]) < 1e-6, (compiled.names[start], compiled.names[goal])
+        assert compiled.path_length(compiled.path_names(layered[0])) == layered[1]
@@ -0,0 +1,49 @@
+import json
+
+from benchmarks.synthetic_graphs import grid_graph
+from campusnav import search
+from campusnav.campus_map import compiled_path_for, load_map
+
+
+def write_map(path, graph, coords):
+    with open(path, "w") as f:
+        json.dump({
+            "locations": [{"name": name, "coords": list(point)} for name, point in coords.items()],
+            "edges": [[source, target, distance, speed_factor]
+                      for source, edges in graph.items() for target, distance, speed_factor in edges],
+        }, f)
+
+
+def test_warm_load_maps_the_compiled_file(tmp_path):
+    graph, coords = grid_graph(12, 12)
+    path = str(tmp_path / "campus_map.json")
+    write_map(path, graph, coords)
+    cold = load_map(path)
+    compiled = tmp_path / "campus_map.bin"
+    assert compiled_path_for(path) == str(compiled) and compiled.is_file()
+    written = compiled.stat().st_mtime_ns
+    warm = load_map(path)
+    assert compiled.stat().st_mtime_ns == written
+    assert list(warm.graph.names) == list(cold.graph.names)
+    assert warm.graph.run(search.ucs, "g0_0", "g11_11") == cold.graph.run(search.ucs, "g0_0", "g11_11")
+
+
+def test_compiled_file_is_rebuilt_when_stale_or_corrupt(tmp_path):
+    graph, coords = grid_graph(6, 6)
+    path = str(tmp_path / "campus_map.json")
+    write_map(path, graph, coords)
+    load_map(path)
+    compiled = tmp_path / "campus_map.bin"
+
+    graph["g0_0"] = [(target, distance * 2, speed) for target, distance, speed in graph["g0_0"]]
+    write_map(path, graph, coords)
+    edited = load_map(path)
+    assert edited.graph.run(search.ucs, "g0_0", "g0_1")[1] == graph["g0_0"][0][1]
+    assert load_map(path).graph.fingerprint() == edited.graph.fingerprint()
+
+    data = bytearray(compiled.read_bytes())
+    data[-1] ^= 0xFF
+    compiled.write_bytes(data)
+    rebuilt = load_map(path)
+    assert rebuilt.graph.fingerprint() == edited.graph.fingerprint()
+    assert compiled.read_bytes() != bytes(data)
@@ -0,0 +1,46 @@
+import logging
+import random
+
+from benchmarks.synthetic_graphs import grid_graph
+from campusnav import CompiledGraph, search
+from campusnav.contraction import build_hierarchy
+
+
+def test_routes_match_ucs_on_campus(campus_graph, campus_pairs):
+    hierarchy = build_hierarchy(campus_graph)
+    for start, goal in campus_pairs:
+        expected = search.ucs(campus_graph, start, goal)[:2]
+        assert hierarchy.route(campus_graph, start, goal)[:2] == expected, \
+            (campus_graph.names[start], campus_graph.names[goal])
+
+
+def test_routes_match_ucs_when_many_routes_tie():
+    graph, coords = grid_graph(12, 12)
+    rng = random.Random(0)
+    graph = {name: [(neighbor, rng.choice((1, 2)), speed) for neighbor, _, speed in edges]
+             for name, edges in graph.items()}
+    compiled = CompiledGraph.from_dict(graph, coords)
+    hierarchy = build_hierarchy(compiled)
+    for _ in range(300):
+        start, goal = rng.randrange(compiled.node_count), rng.randrange(compiled.node_count)
+        assert hierarchy.route(compiled, start, goal)[:2] == search.ucs(compiled, start, goal)[:2], (start, goal)
+
+
+def test_zero_weight_edges_fall_back_to_ucs_visibly(caplog):
+    graph = CompiledGraph.from_dict({"a": [("b", 0, 1.0), ("c", 5, 1.0)], "b": [("c", 2, 1.0)], "c": [("a", 1, 1.0)]})
+    hierarchy = build_hierarchy(graph)
+    with caplog.at_level(logging.WARNING, logger="campusnav.contraction"):
+        assert hierarchy.falls_back_to_ucs(graph)
+        assert hierarchy.route(graph, 0, 2) == search.ucs(graph, 0, 2)
+    assert ["0-weight" in record.getMessage() for record in caplog.records] == [True]
+
+
+def test_tie_lookups_are_logged(caplog):
+    graph, coords = grid_graph(6, 6)
+    compiled = CompiledGraph.from_dict(graph, coords)
+    hierarchy = build_hierarchy(compiled)
+    assert not hierarchy.falls_back_to_ucs(compiled)
+    with caplog.at_level(logging.DEBUG, logger="campusnav.contraction"):
+        for goal in range(compiled.node_count):
+            assert hierarchy.route(compiled, 0, goal)[:2] == search.ucs(compiled, 0, goal)[:2]
+    assert any("lookups" in record.getMessage() for record in caplog.records)
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from conftest import ROOT
+
+VENDOR_DIR = os.path.join(ROOT, "OUTPUT WITH FRONTEND", "static", "vendor")
+
+
+@pytest.mark.skipif(not os.path.isdir(VENDOR_DIR), reason="static/vendor is not committed yet: run "
+                    "`python app.py --vendor-assets` where unpkg.com is reachable and commit the files")
+def test_leaflet_is_vendored(app_module):
+    assert app_module.leaflet_vendored(), app_module.leaflet_notice()
+
+
+def test_leaflet_comes_from_the_cdn_until_every_file_is_local(app_module, tmp_path, monkeypatch):
+    flask_app = app_module.app
+    monkeypatch.setattr(flask_app, "static_folder", str(tmp_path))
+    monkeypatch.setattr(app_module.map_state, "payloads", {})
+    directory = tmp_path / app_module.LEAFLET_VENDOR_DIR
+    with flask_app.test_request_context():
+        assert app_module.leaflet_url() == app_module.LEAFLET_CDN
+        for name in app_module.LEAFLET_FILES:
+            assert app_module.leaflet_url() == app_module.LEAFLET_CDN
+            (directory / name).parent.mkdir(parents=True, exist_ok=True)
+            (directory / name).write_bytes(b"/* leaflet */")
+        local = f"/static/{app_module.LEAFLET_VENDOR_DIR}"
+        assert app_module.leaflet_url() == local
+
+    client = flask_app.test_client()
+    assert f'src="{local}leaflet.js"' in client.get("/").get_data(as_text=True)
+    response = client.get(f"{local}leaflet.js")
+    assert response.status_code == 200 and response.cache_control.immutable
+
+
+def test_cdn_fallback_is_logged(app_module, tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(app_module.app, "static_folder", str(tmp_path))
+    assert app_module.LEAFLET_CDN in app_module.leaflet_notice()
+    with app_module.app.test_request_context():
+        app_module.leaflet_url()
+    assert any(app_module.LEAFLET_CDN in record.getMessage() for record in caplog.records)
@@ -0,0 +1,31 @@
+from benchmarks.synthetic_graphs import grid_graph
+from campusnav import CompiledGraph, search
+from campusnav.graph_store import HEADER, SECTION, SECTIONS, GraphStore, write_graph_store
+
+
+def test_mapped_store_routes_like_the_compiled_graph(tmp_path):
+    graph, coords = grid_graph(15, 15)
+    compiled = CompiledGraph.from_dict(graph, coords)
+    path = str(tmp_path / "graph_store.bin")
+    write_graph_store(path, compiled, coords)
+    store = GraphStore.open(path)
+    assert list(store.graph.names) == list(compiled.names)
+    assert dict(store.coords) == coords
+    start, goal = "g0_0", "g14_14"
+    assert store.graph.run(search.ucs, start, goal) == compiled.run(search.ucs, start, goal)
+
+
+def test_a_corrupted_section_fails_its_crc(tmp_path):
+    graph, coords = grid_graph(6, 6)
+    compiled = CompiledGraph.from_dict(graph, coords)
+    path = tmp_path / "graph_store.bin"
+    write_graph_store(str(path), compiled, coords, checksum=7)
+    assert GraphStore.open(str(path), checksum=7) is not None
+    assert GraphStore.open(str(path), checksum=8) is None  # built from another source map
+
+    data = bytearray(path.read_bytes())
+    names = [name for name, _ in SECTIONS]
+    offset, length, _ = SECTION.unpack_from(data, HEADER.size + names.index("weights") * SECTION.size)
+    data[offset + length // 2] ^= 0xFF
+    path.write_bytes(data)
+    assert GraphStore.open(str(path), checksum=7) is None
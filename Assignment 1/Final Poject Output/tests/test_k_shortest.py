@@ -0,0 +1,40 @@
+import random
+
+from campusnav import CompiledGraph
+from campusnav.k_shortest import k_shortest_paths
+
+
+def _simple_paths(graph, node, goal, path, cost, found):
+    if node == goal:
+        found.append((cost, path))
+        return
+    for edge in range(graph.offsets[node], graph.offsets[node + 1]):
+        neighbor = graph.targets[edge]
+        if neighbor not in path:
+            _simple_paths(graph, neighbor, goal, path + [neighbor], cost + graph.weights[edge], found)
+
+
+def test_routes_come_shortest_first_and_match_every_loopless_route():
+    rng = random.Random(0)
+    for _ in range(30):
+        names = [f"n{i}" for i in range(7)]
+        compiled = CompiledGraph.from_dict({
+            name: [(other, rng.randint(1, 20), 1.0) for other in names if other != name and rng.random() < 0.4]
+            for name in names})
+        found = []
+        _simple_paths(compiled, 0, 6, [0], 0, found)
+        found.sort()
+        routes, _ = k_shortest_paths(compiled, 0, 6, 5)
+        distances = [distance for _, distance in routes]
+        assert distances == sorted(distances) == [cost for cost, _ in found[:5]]
+        assert len({tuple(path) for path, _ in routes}) == len(routes)
+        for path, distance in routes:
+            assert path[0] == 0 and path[-1] == 6 and len(set(path)) == len(path)
+            assert compiled.path_length(compiled.path_names(path)) == distance
+
+
+def test_alternatives_in_navigate(app_module):
+    query = {"start": "Entry Gate", "goal": "Library", "algorithm": "UCS", "alternatives": 3}
+    body = app_module.app.test_client().post("/api/navigate", json=query).get_json()
+    distances = [route["distance"] for route in body["alternatives"]]
+    assert distances == sorted(distances) and distances[0] == body["distance"]
@@ -0,0 +1,40 @@
+from campusnav.metrics import MetricsRegistry
+
+
+def test_counters_and_histograms_render_cumulatively():
+    registry = MetricsRegistry()
+    lookups = registry.counter("lookups_total", "Lookups.", ("result",))
+    seconds = registry.histogram("seconds", "Time.", (0.1, 1.0), ("endpoint",))
+    lookups.inc("hit")
+    lookups.inc("hit", amount=2)
+    lookups.inc("miss")
+    for value in (0.05, 0.5, 5.0):
+        seconds.observe(value, 'say "hi"')
+    lines = registry.render().splitlines()
+    assert lines[:4] == ["# HELP lookups_total Lookups.", "# TYPE lookups_total counter",
+                         'lookups_total{result="hit"} 3', 'lookups_total{result="miss"} 1']
+    assert lines[6:] == [
+        'seconds_bucket{endpoint="say \\"hi\\"",le="0.1"} 1',
+        'seconds_bucket{endpoint="say \\"hi\\"",le="1.0"} 2',
+        'seconds_bucket{endpoint="say \\"hi\\"",le="+Inf"} 3',
+        'seconds_sum{endpoint="say \\"hi\\""} 5.55',
+        'seconds_count{endpoint="say \\"hi\\""} 3',
+    ]
+
+
+def _sample(text, name):
+    return next((float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(name + " ")), 0.0)
+
+
+def test_navigate_counts_cache_lookups(app_module):
+    client = app_module.app.test_client()
+    hit, miss = ('campusnav_route_cache_lookups_total{result="%s"}' % result for result in ("hit", "miss"))
+    before = client.get("/metrics").get_data(as_text=True)
+    app_module.route_cache.clear()
+    query = {"start": "Exit Gate", "goal": "Food Court", "algorithm": "BFS"}
+    client.post("/api/navigate", json=query)
+    client.post("/api/navigate", json=query)
+    after = client.get("/metrics").get_data(as_text=True)
+    assert _sample(after, miss) - _sample(before, miss) == 1
+    assert _sample(after, hit) - _sample(before, hit) == 1
+    assert 'campusnav_search_seconds_count{algorithm="BFS"}' in after
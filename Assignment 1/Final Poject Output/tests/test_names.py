@@ -0,0 +1,42 @@
+import random
+
+from campusnav.names import LocationIndex
+
+BLOCKS = ("Science", "Arts", "Commerce", "Law", "Design", "Medical", "Hostel", "Admin", "Sports", "Library")
+KINDS = ("Room", "Lab", "Office", "Store", "Studio")
+
+
+def synthetic_names(count, rng):
+    names = set()
+    while len(names) < count:
+        names.add(f"{rng.choice(BLOCKS)} Block {rng.randint(1, 40)} {rng.choice(KINDS)} {rng.randint(1, 9)}"
+                  f"{rng.randint(0, 30):02d}")
+    return sorted(names)
+
+
+def test_exact_and_normalized_names_resolve():
+    rng = random.Random(0)
+    names = synthetic_names(2000, rng)
+    index = LocationIndex(names)
+    for name in rng.sample(names, 100):
+        assert index.resolve(name) == (name, [])
+        assert index.resolve(name.lower().replace(" ", "-"))[0] == name
+
+
+def test_misspelled_names_resolve_through_trigrams():
+    rng = random.Random(1)
+    names = synthetic_names(2000, rng)
+    index = LocationIndex(names)
+    for name in rng.sample(names, 100):
+        block, rest = name.split(" ", 1)
+        assert index.resolve(block[:2] + block[3:] + " " + rest)[0] == name
+
+
+def test_campus_typos_aliases_and_numbers(app_module):
+    index = app_module.map_state.location_index
+    assert index.resolve("cafetria")[0] == "Cafeteria"
+    assert index.resolve("central libary")[0] == "Library"
+    assert index.resolve("ab1")[0] == "Academic Block 1 Entrance"
+    location, suggestions = index.resolve("Hostel Building 3")
+    assert location is None and {"Hostel Building 1", "Hostel Building 2"} <= set(suggestions)
+    assert index.suggest("Hostel Bulding")[0][0].startswith("Hostel Building")
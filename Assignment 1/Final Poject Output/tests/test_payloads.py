@@ -0,0 +1,38 @@
+import gzip
+import json
+import random
+
+from campusnav import payloads
+from campusnav.payloads import Payload
+
+
+def test_every_encoding_holds_the_same_body():
+    rng = random.Random(0)
+    body = json.dumps([{"name": f"Block {i // 100} Room {i % 100:02d}", "coords": [rng.uniform(-5000, 5000), 0]}
+                       for i in range(2000)])
+    payload = Payload(body, "application/json")
+    assert payload.encodings["identity"] == body.encode()
+    assert gzip.decompress(payload.encodings["gzip"]) == body.encode()
+    if payloads.brotli is not None:
+        assert payloads.brotli.decompress(payload.encodings["br"]) == body.encode()
+    assert payload.encoded(lambda coding: coding == "gzip") == ("gzip", payload.encodings["gzip"])
+    assert payload.encoded(lambda coding: 0) == ("identity", body.encode())
+    assert Payload(body, "application/json").etag == payload.etag != Payload(body + " ", "application/json").etag
+
+
+def test_etag_revalidation_and_precompressed_bodies(app_module):
+    client = app_module.app.test_client()
+    for url in ("/api/buildings", "/api/graph", "/"):
+        plain = client.get(url)
+        etag = plain.headers["ETag"]
+        assert plain.status_code == 200 and plain.cache_control.no_cache
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+        assert client.get(url, headers={"If-None-Match": 'W/"other"'}).status_code == 200
+
+        zipped = client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert zipped.headers["Vary"] == "Accept-Encoding" and zipped.headers["ETag"] == etag
+        if zipped.headers.get("Content-Encoding") == "gzip":
+            assert gzip.decompress(zipped.get_data()) == plain.get_data()
+
+        pinned = client.get(url, query_string={"v": etag.split('"')[1]})
+        assert pinned.cache_control.immutable and pinned.cache_control.max_age == app_module.IMMUTABLE_MAX_AGE
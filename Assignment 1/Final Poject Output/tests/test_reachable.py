@@ -0,0 +1,23 @@
+def _reachable(app_module, minutes):
+    response = app_module.app.test_client().get(f"/api/reachable?start=Security Gate&minutes={minutes}")
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_budget_under_one_bucket_is_not_rounded_up(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "REACHABLE_BUCKET_MINUTES", 0.5)
+    body = _reachable(app_module, 0.2)
+    assert body["minutes"] == 0.2
+    budget = 0.2 * 60 * app_module.WALKING_SPEED_MPS
+    assert all(entry["distance"] <= budget for entry in body["reachable"])
+    assert [entry["location"] for entry in body["reachable"]] == ["Security Gate"]
+
+
+def test_budget_on_a_bucket_boundary_keeps_that_bucket(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "REACHABLE_BUCKET_MINUTES", 0.5)
+    # Flag Post is 60 m from Security Gate: 0.74 minutes at WALKING_SPEED_MPS.
+    exact, under = _reachable(app_module, 1.0), _reachable(app_module, 0.999)
+    assert (exact["minutes"], under["minutes"]) == (1.0, 0.5)
+    assert "Flag Post" in [entry["location"] for entry in exact["reachable"]]
+    assert "Flag Post" not in [entry["location"] for entry in under["reachable"]]
+    assert _reachable(app_module, 1.2) == exact
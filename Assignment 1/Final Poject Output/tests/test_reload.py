@@ -0,0 +1,45 @@
+import json
+import os
+
+from campusnav import INF
+
+
+def _save(path, text):
+    mtime = os.stat(path).st_mtime_ns
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.utime(path, ns=(mtime + 10**9, mtime + 10**9))  # a new mtime even on coarse clocks
+
+
+def test_requests_keep_the_map_they_started_with(app_module):
+    path = app_module.CAMPUS_MAP_PATH
+    with open(path, encoding="utf-8") as f:
+        original = f.read()
+    edited = json.loads(original)
+    edited["locations"].append({"name": "Bike Shed", "coords": [200, -160]})
+    edited["edges"] += [["Bike Shed", "Entry Gate", 30, 1.0], ["Entry Gate", "Bike Shed", 30, 1.0]]
+    flask_app = app_module.app
+    client = flask_app.test_client()
+    closed = {"action": "close", "from": "Entry Gate", "to": "Security Gate", "bidirectional": False}
+    assert client.post("/api/edges", json=closed).status_code == 200
+    try:
+        with flask_app.test_request_context():
+            flask_app.preprocess_request()
+            before = app_module.current_map()
+            _save(path, json.dumps(edited))
+            app_module.reload_if_map_changed()
+            assert app_module.map_state is not before
+            assert app_module.current_map() is before
+            assert app_module.resolve_locations("Bike Shed")[0] is None
+
+        state = app_module.map_state
+        graph = state.graph
+        assert graph.edge_weight(graph.node_id("Entry Gate"), graph.node_id("Security Gate")) == INF
+        response = client.post("/api/navigate", json={"start": "Bike Shed", "goal": "Entry Gate", "algorithm": "UCS"})
+        assert response.get_json()["path"] == ["Bike Shed", "Entry Gate"]
+        assert client.get("/api/graph").get_json()["version"] == state.version != before.version
+    finally:
+        closed["action"] = "reopen"
+        client.post("/api/edges", json=closed)
+        _save(path, original)
+        app_module.reload_if_map_changed()
@@ -0,0 +1,13 @@
+from campusnav.route_cache import RouteCache
+
+
+def test_byte_budget_counts_utf8_bytes():
+    cache = RouteCache(max_bytes=10)
+    cache.put("a", 200, "é" * 5)  # 5 characters, 10 bytes
+    assert cache.stats()["bytes"] == 10
+    cache.put("b", 200, "x")
+    assert cache.get("a") is None and cache.stats()["bytes"] == 1
+    cache.put("c", 200, "€" * 4)  # 4 characters, 12 bytes: never stored
+    assert cache.get("c") is None
+    cache.invalidate(lambda key, meta: True)
+    assert cache.stats()["bytes"] == 0
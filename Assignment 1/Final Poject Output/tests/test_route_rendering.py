@@ -0,0 +1,56 @@
+import json
+
+
+def dict_payload(app_module, path, distance, nodes_explored):
+    """The body built as one dict, which render_route's joined fragments must reproduce."""
+    state = app_module.map_state
+    graph = state.graph
+    path_details = []
+    for i, location in enumerate(path):
+        direction = ""
+        if i < len(path) - 1:
+            edge = graph.edge_weight(graph.node_id(location), graph.node_id(path[i + 1]))
+            direction = f"From {location}, walk {app_module.as_number(edge)} meters to {path[i + 1]}."
+        path_details.append({"location": location, "image": state.images.get(location), "direction": direction})
+    return app_module.app.json.dumps({
+        "path": path,
+        "path_coords": [(x, -y) for x, y in (state.coords[loc] for loc in path if loc in state.coords)],
+        "distance": round(distance, 2),
+        "time": app_module.calculate_time(distance),
+        "nodes_explored": nodes_explored,
+        "path_details": path_details,
+    })
+
+
+def test_rendered_bodies_and_streams_match_the_dict_payload(app_module):
+    names = sorted(app_module.map_state.coords)
+    with app_module.app.app_context():
+        for start in names:
+            for goal in names:
+                path, distance, nodes_explored = app_module.ucs(start, goal)
+                body = app_module.render_route(path, distance, nodes_explored)[1]
+                assert body == dict_payload(app_module, path, distance, nodes_explored), (start, goal)
+
+                expected = json.loads(body)
+                header, *lines = [json.loads(line) for line in app_module.route_stream(path, distance, nodes_explored)]
+                assert header == {key: expected[key] for key in ("distance", "time", "nodes_explored")} | \
+                    {"locations": len(path)}
+                assert [{key: line[key] for key in line if key != "coords"} for line in lines] == expected["path_details"]
+
+
+def test_navigate_streams_one_json_object_per_line(app_module):
+    client = app_module.app.test_client()
+    query = {"start": "Entry Gate", "goal": "Cricket Ground", "algorithm": "UCS"}
+    plain = client.post("/api/navigate", json=query).get_json()
+    response = client.post("/api/navigate?stream=1", json=dict(query, timing=True))
+    assert response.mimetype == "application/x-ndjson"
+    text = response.get_data(as_text=True)
+    assert text.endswith("\n") and "\n\n" not in text
+    header, *lines = [json.loads(line) for line in text.splitlines()]
+    assert header["locations"] == len(lines) == len(plain["path"])
+    assert header["timing"]["cache"] == "bypass"
+    assert [line["location"] for line in lines] == plain["path"]
+    assert [line["coords"] for line in lines] == plain["path_coords"]
+
+    query["goal"] = "Nowhere at all"
+    assert client.post("/api/navigate", json=dict(query, stream=True)).mimetype == "application/json"
@@ -0,0 +1,29 @@
+import random
+from array import array
+
+from campusnav import INF, CompiledGraph, search, updates
+from campusnav.route_table import RouteTable, build_route_table
+
+
+def test_repaired_rows_match_ucs_without_copying_the_table(campus_graph, campus_pairs, tmp_path):
+    graph = CompiledGraph(campus_graph.names, campus_graph.offsets, campus_graph.targets,
+                          array("d", campus_graph.weights), campus_graph.speeds, campus_graph.xs,
+                          campus_graph.ys, campus_graph.has_coords)
+    path = str(tmp_path / "route_table.bin")
+    build_route_table(graph, path)
+    table = RouteTable.open(path, graph)
+
+    rng = random.Random(0)
+    edges = [(node, graph.targets[edge]) for node in range(graph.node_count)
+             for edge in range(graph.offsets[node], graph.offsets[node + 1])]
+    for _ in range(20):
+        source, target = rng.choice(edges)
+        old_weight = graph.edge_weight(source, target)
+        graph.set_edge_weight(source, target, rng.choice([INF, None, rng.randint(1, 300)]))
+        new_weight = graph.edge_weight(source, target)
+        table.recompute_rows(updates.affected_table_rows(table, source, target, old_weight, new_weight))
+        for start, goal in campus_pairs:
+            path_ids, distance, _ = search.ucs(graph, start, goal)
+            assert table.lookup(start, goal) == ((path_ids, distance) if path_ids else (None, 0))
+
+    assert isinstance(table.costs, memoryview) and table.patched_rows
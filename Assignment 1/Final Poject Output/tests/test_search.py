@@ -0,0 +1,50 @@
+import pytest
+
+from campusnav import CompiledGraph, search
+
+
+def test_bidirectional_a_star_costs_match_ucs(campus_graph, campus_pairs):
+    for start, goal in campus_pairs:
+        expected = search.ucs(campus_graph, start, goal)[1]
+        assert search.bidirectional_a_star(campus_graph, start, goal)[1] == expected, \
+            (campus_graph.names[start], campus_graph.names[goal])
+
+
+def test_bidirectional_a_star_falls_back_without_coordinates():
+    graph = CompiledGraph.from_dict({"a": [("b", 1, 1.0)], "b": [("c", 1, 1.0)]}, {"a": (0, 0), "b": (5, 0)})
+    assert graph.heuristic_scale is None
+    assert search.bidirectional_a_star(graph, 0, 2)[:2] == ([0, 1, 2], 2)
+
+
+def test_dfs_stops_at_the_goal(campus_graph, campus_pairs):
+    for start, goal in campus_pairs:
+        path = search.dfs(campus_graph, start, goal)[0]
+        assert path[0] == start and path[-1] == goal
+
+
+def test_iddfs_depth_is_bounded_by_default():
+    chain = {f"n{i:02d}": [(f"n{i + 1:02d}", 1, 1.0)] for i in range(search.DEFAULT_DEPTH_LIMIT + 1)}
+    chain["island"] = []
+    graph = CompiledGraph.from_dict(chain)
+    start, goal = graph.node_id("n00"), graph.node_id(f"n{search.DEFAULT_DEPTH_LIMIT + 1:02d}")
+    with pytest.raises(search.DepthLimitReached) as raised:
+        search.iddfs(graph, start, goal)
+    assert raised.value.max_depth == search.DEFAULT_DEPTH_LIMIT
+    with pytest.raises(search.DepthLimitReached):
+        search.depth_limited_dfs(graph, start, goal, max_depth=3)
+    path = search.iddfs(graph, start, goal, max_depth=search.DEFAULT_DEPTH_LIMIT + 1)[0]
+    assert graph.path_names(path) == [f"n{i:02d}" for i in range(search.DEFAULT_DEPTH_LIMIT + 2)]
+    # With every path walked to its end it is a plain "no path".
+    assert search.iddfs(graph, start, graph.node_id("island"), max_depth=20)[0] is None
+
+
+def test_api_tells_a_depth_limit_from_no_path(app_module):
+    client = app_module.app.test_client()
+    query = {"start": "Entry Gate", "goal": "Exit Gate", "algorithm": "IDDFS", "max_depth": 1}
+    response = client.post("/api/navigate", json=query)
+    assert response.status_code == 404
+    assert response.get_json()["depth_limited"] is True and response.get_json()["max_depth"] == 1
+    batch = client.post("/api/navigate/batch", json={"queries": [query]}).get_json()["results"]
+    assert batch == [response.get_json()]
+    query["max_depth"] = 2
+    assert client.post("/api/navigate", json=query).get_json()["path"] == ["Entry Gate", "Security Gate", "Exit Gate"]
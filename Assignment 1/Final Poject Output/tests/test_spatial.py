@@ -0,0 +1,55 @@
+import math
+import random
+from array import array
+
+from campusnav import CompiledGraph
+from campusnav.spatial import SpatialIndex
+
+
+def scattered_graph(count, size, rng):
+    """A CompiledGraph of ``count`` locations with coordinates and no edges."""
+    xs = array('d', (rng.uniform(0, size) for _ in range(count)))
+    ys = array('d', (rng.uniform(0, size) for _ in range(count)))
+    names = [f"p{i:05d}" for i in range(count)]
+    return CompiledGraph(names, array('q', [0]) * (count + 1), array('i'), array('d'), array('d'),
+                         xs, ys, bytearray([1]) * count)
+
+
+def test_nearest_and_within_match_a_scan():
+    rng = random.Random(0)
+    graph = scattered_graph(3000, 2000.0, rng)
+    index = SpatialIndex(graph)
+    xs, ys = graph.xs, graph.ys
+    for _ in range(100):
+        x, y = rng.uniform(-100, 2100), rng.uniform(-100, 2100)
+        by_distance = sorted((math.hypot(xs[node] - x, ys[node] - y), node) for node in range(graph.node_count))
+        assert [node for _, node in index.nearest(x, y, 5)] == [node for _, node in by_distance[:5]]
+        assert [node for _, node in index.nearest(x, y, 5, 40)] == [node for d, node in by_distance[:5] if d <= 40]
+        box = (x, y, x + 200, y + 150)
+        inside = [node for node in range(graph.node_count)
+                  if box[0] <= xs[node] <= box[2] and box[1] <= ys[node] <= box[3]]
+        assert sorted(index.within(*box)) == inside
+
+
+def test_nearest_and_bbox_endpoints_use_the_flipped_frame(app_module):
+    client = app_module.app.test_client()
+    coords = {name: (x, -y) for name, (x, y) in app_module.map_state.coords.items()}  # /api/buildings frame
+    x, y = 10, -30
+    by_distance = sorted((math.hypot(px - x, py - y), name) for name, (px, py) in coords.items())
+    body = client.get(f"/api/nearest?x={x}&y={y}&k=3").get_json()
+    assert [entry["name"] for entry in body["nearest"]] == [name for _, name in by_distance[:3]]
+    assert all(tuple(entry["coords"]) == coords[entry["name"]] for entry in body["nearest"])
+    assert client.get(f"/api/nearest?x={x}&y={y}&max_distance=1").get_json()["nearest"] == []
+
+    box = (-100, -250, 100, 0)
+    inside = client.get("/api/buildings?bbox=" + ",".join(map(str, box))).get_json()
+    assert sorted(entry["name"] for entry in inside) == sorted(
+        name for name, (px, py) in coords.items() if box[0] <= px <= box[2] and box[1] <= py <= box[3])
+    assert client.get("/api/buildings?bbox=1,2,3").status_code == 400
+
+
+def test_nearest_rejects_a_negative_max_distance(app_module):
+    client = app_module.app.test_client()
+    for max_distance in ("-1", "-0.5", "nan", "far"):
+        assert client.get(f"/api/nearest?x=0&y=0&max_distance={max_distance}").status_code == 400
+    assert client.get("/api/nearest?x=0&y=0&max_distance=0").status_code == 200
@@ -0,0 +1,51 @@
+import random
+
+from campusnav import CompiledGraph
+from campusnav.time_profile import TimeDependentWeights
+
+
+def test_edge_changes_speed_at_the_interval_boundary():
+    graph = CompiledGraph.from_dict({"a": [("b", 100, 1.0)]})
+    weights = TimeDependentWeights(graph, 1.0, [("00:01", "00:10", {"b"}, 0.5)], interval_minutes=1)
+    # 30 m at 1 m/s before 00:01, then the other 70 m at 0.5 m/s.
+    assert weights.route(graph, 0, 1, depart_seconds=30)[1] == 170
+
+
+def test_leaving_later_never_arrives_earlier():
+    graph = CompiledGraph.from_dict({"a": [("b", 500, 1.0)]})
+    weights = TimeDependentWeights(graph, 1.0, [("00:05", "00:07", {"b"}, 4.0), ("00:09", "00:12", {"a"}, 0.25)],
+                                   interval_minutes=1)
+    arrivals = [depart + weights.crossing_seconds(0, depart) for depart in range(0, 900, 7)]
+    assert arrivals == sorted(arrivals)
+
+
+def _earliest_arrival(weights, graph, node, goal, seconds, on_path):
+    if node == goal:
+        return seconds
+    best = float("inf")
+    for edge in range(graph.offsets[node], graph.offsets[node + 1]):
+        neighbor = graph.targets[edge]
+        if neighbor not in on_path:
+            arrival = seconds + weights.crossing_seconds(edge, seconds)
+            best = min(best, _earliest_arrival(weights, graph, neighbor, goal, arrival, on_path | {neighbor}))
+    return best
+
+
+def test_route_is_earliest_arrival():
+    rng = random.Random(0)
+    for _ in range(40):
+        names = [f"n{i}" for i in range(6)]
+        graph = {name: [(other, rng.randint(20, 200), 1.0) for other in names if other != name and rng.random() < 0.5]
+                 for name in names}
+        compiled = CompiledGraph.from_dict(graph)
+        profile = [(f"00:{begin:02d}", f"00:{begin + 2:02d}", set(rng.sample(names, 2)), rng.choice((0.2, 3.0)))
+                   for begin in range(0, 20, 3)]
+        weights = TimeDependentWeights(compiled, 1.0, profile, interval_minutes=1)
+        depart = rng.randrange(0, 900)
+        for goal in range(1, len(names)):
+            expected = _earliest_arrival(weights, compiled, 0, goal, depart, {0}) - depart
+            path, seconds, _ = weights.route(compiled, 0, goal, depart_seconds=depart)
+            if path is None:
+                assert expected == float("inf")
+            else:
+                assert abs(seconds - expected) < 1e-6
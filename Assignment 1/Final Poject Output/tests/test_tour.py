@@ -0,0 +1,53 @@
+import itertools
+import random
+
+from benchmarks.synthetic_graphs import grid_graph
+from campusnav import CompiledGraph, search
+from campusnav.tour import HELD_KARP_MAX_STOPS, distance_matrix, held_karp, improve_tour, tour_cost
+
+
+def test_distance_matrix_matches_pairwise_ucs():
+    graph = CompiledGraph.from_dict(*grid_graph(12, 12))
+    stops = random.Random(0).sample(range(graph.node_count), 8)
+    matrix = distance_matrix(graph, stops)[0]
+    assert matrix == [[search.ucs(graph, a, b)[1] for b in stops] for a in stops]
+
+
+def test_held_karp_is_exact_and_the_heuristic_visits_every_stop():
+    graph = CompiledGraph.from_dict(*grid_graph(12, 12))
+    stops = random.Random(1).sample(range(graph.node_count), min(HELD_KARP_MAX_STOPS, 8))
+    matrix = distance_matrix(graph, stops)[0]
+    exact = held_karp(matrix)
+    brute = min(tour_cost(matrix, (0,) + rest) for rest in itertools.permutations(range(1, len(stops))))
+    assert exact[0] == 0 and abs(tour_cost(matrix, exact) - brute) < 1e-6
+    order = improve_tour(matrix)
+    assert order[0] == 0 and sorted(order) == list(range(len(stops)))
+    assert tour_cost(matrix, order) >= tour_cost(matrix, exact) - 1e-6
+
+
+def test_tour_endpoint_orders_and_optimizes(app_module):
+    client = app_module.app.test_client()
+    stops = ["Entry Gate", "Cricket Ground", "Flag Post", "Hostel Building 1", "Library"]
+    as_listed = client.post("/api/tour", json={"stops": stops, "optimize": False}).get_json()
+    assert as_listed["stops"] == stops
+    assert [leg["from"] for leg in as_listed["legs"]] == stops[:-1]
+    assert abs(sum(leg["distance"] for leg in as_listed["legs"]) - as_listed["distance"]) < 1e-6
+
+    optimized = client.post("/api/tour", json={"stops": stops}).get_json()
+    assert optimized["stops"][0] == stops[0] and sorted(optimized["stops"]) == sorted(stops)
+    assert optimized["distance"] <= as_listed["distance"]
+    assert optimized["path"][0] == stops[0] and optimized["path"][-1] == optimized["stops"][-1]
+
+    fixed = client.post("/api/tour", json={"stops": stops, "fixed_end": True}).get_json()
+    assert fixed["stops"][0] == stops[0] and fixed["stops"][-1] == stops[-1]
+    round_trip = client.post("/api/tour", json={"stops": stops, "round_trip": True}).get_json()
+    assert round_trip["path"][-1] == stops[0]
+
+
+def test_tour_flags_must_be_booleans(app_module):
+    client = app_module.app.test_client()
+    stops = ["Entry Gate", "Library", "Flag Post"]
+    for name, value in (("optimize", "false"), ("optimize", 0), ("round_trip", "yes"), ("fixed_end", None)):
+        response = client.post("/api/tour", json={"stops": stops, name: value})
+        assert response.status_code == 400 and name in response.get_json()["error"]
+    assert client.post("/api/tour", json={"stops": stops, "optimize": False}).get_json()["stops"] == stops